@@ -1,155 +1,248 @@
+import os
+import csv
+import json
+import difflib
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+__all__ = ["Instrument", "InstrumentRegistry", "load_instruments", "notation", "notation_code",
+           "notation_value", "get_code", "get_valeur"]
+
 # Store the notation of the website
-def notation(): 
-	return ['Addoha',
- 'AFMA',
- 'Afric Indus',
- 'Afriquia Gaz',
- 'Agma',
- 'Akdital',
- 'Alliances',
- 'Aluminium Maroc',
- 'Aradei Capital',
- 'AtlantaSanad',
- 'Attijariwafa',
- 'Auto Hall',
- 'Auto Nejma',
- 'BALIMA',
- 'BOA',
- 'BCP',
- 'BMCI',
- 'Cartier Saada',
- 'CDM',
- 'CFG',
- 'CIH',
- 'Ciments Maroc',
- 'CMT', 
- 'CMGP',
- 'Colorado',
- 'Cosumar',
- 'CTM',
- 'Dari Couspate', 
- 'Delta Holding',
- 'Disty Technolog',
- 'Disway',
- 'Ennakl',
- 'EQDOM',
- 'FENIE BROSSETTE',
- 'HPS',
- 'IBMaroc',
- 'Immr Invest',
- 'INVOLYS',
- 'Jet Contractors',
- 'Label Vie',
- 'LafargeHolcim',
- 'Lesieur Cristal',
- 'M2M Group',
- 'Maghreb Oxygene',
- 'Maghrebail',
- 'Managem',
- 'Maroc Leasing',
- 'Maroc Telecom',
- 'Microdata',
- 'Mutandis',
- 'Oulmes',
- 'PROMOPHARM',
- 'Rebab Company',
- 'Dar Saada',
- 'Risma',
- 'S2M',
- 'Sanlam Maroc',
- ' Salafin',
- 'SMI',
- 'Stokvis Nord Afr',
- 'SNEP',
- 'SODEP',
- 'Sonasid',
- 'Sothema',
- 'SRM',
- 'Ste Boissons',
- 'STROC Indus',
- 'TAQA Morocco',
- 'TGCC',
- 'Timar',
- 'Total Maroc',
- 'Unimer',
- 'Wafa Assur',
- 'Zellidja','MASI',"MSI20"]
-	
+# (nom, ISIN, code valeur casablanca-bourse, alias, coté) ; les alias portent
+# aussi les libellés officiels des pages de marché quand ils diffèrent du nom
+# (ils ne commencent pas par lui) : "BANK OF AFRICA", "ITISSALAT AL-MAGHRIB"...
+_LISTINGS = (
+    ('Addoha', 'MA0000011512', '9000', ('DOUJA PROM ADDOHA',), True),
+    ('AFMA', 'MA0000012296', '12200', (), True),
+    ('Afric Indus', 'MA0000012114', '11700', ('AFRIC INDUSTRIES SA',), True),
+    ('Afriquia Gaz', 'MA0000010951', '7100', (), True),
+    ('Agma', 'MA0000010944', '6700', (), True),
+    ('Akdital', 'MA0000012585', '35', (), True),
+    ('Alliances', 'MA0000011819', '11200', (), True),
+    ('Aluminium Maroc', 'MA0000010936', '6600', ('ALUMINIUM DU MAROC',), True),
+    ('Aradei Capital', 'MA0000012460', '27', (), True),
+    ('AtlantaSanad', 'MA0000011710', '10300', (), True),
+    ('Attijariwafa', 'MA0000012445', '8200', (), True),
+    ('Auto Hall', 'MA0000010969', '3200', (), True),
+    ('Auto Nejma', 'MA0000011009', '7000', (), True),
+    ('BALIMA', 'MA0000011991', '3300', (), True),
+    ('BOA', 'MA0000012437', '1100', ('BANK OF AFRICA',), True),
+    ('BCP', 'MA0000011884', '8000', ('BANQUE CENTRALE POPULAIRE',), True),
+    ('BMCI', 'MA0000010811', '5100', (), True),
+    ('Cartier Saada', 'MA0000011868', '8900', (), True),
+    ('CDM', 'MA0000010381', '3600', ('CREDIT DU MAROC',), True),
+    ('CFG', 'MA0000012627', None, (), True),
+    ('CIH', 'MA0000011454', '3100', (), True),
+    ('Ciments Maroc', 'MA0000010506', '4000', ('CIMENTS DU MAROC',), True),
+    ('CMT', 'MA0000011793', '11000', ('COMPAGNIE MINIERE DE TOUISSIT',), True),
+    ('CMGP', 'MA0000012718', None, ('CMPG',), True),
+    ('Colorado', 'MA0000011934', '9200', (), True),
+    ('Cosumar', 'MA0000012247', '4100', (), True),
+    ('CTM', 'MA0000010340', '2200', (), True),
+    ('Dari Couspate', 'MA0000011421', '8500', (), True),
+    ('Delta Holding', 'MA0000011850', '10900', (), True),
+    ('Disty Technolog', 'MA0000012536', '32', ('Disty Technologis', 'DISTY TECHNOLOGIES'), True),
+    ('Disway', 'MA0000011637', '9700', (), True),
+    ('Ennakl', 'MA0000011942', '11300', (), True),
+    ('EQDOM', 'MA0000010357', '2300', (), True),
+    ('FENIE BROSSETTE', 'MA0000011587', '9300', (), True),
+    ('HPS', 'MA0000012619', '9600', ('HIGHTECH PAYMENT SYSTEMS',), True),
+    ('IBMaroc', 'MA0000011132', '7600', ('IB MAROC.COM',), True),
+    ('Immr Invest', 'MA0000012387', '12', ('IMMORENTE INVEST',), True),
+    ('INVOLYS', 'MA0000011579', '9500', (), True),
+    ('Jet Contractors', 'MA0000012080', '11600', (), True),
+    ('Label Vie', 'MA0000011801', '11100', (), True),
+    ('LafargeHolcim', 'MA0000012320', '3800', ('HOLCIM MAROC',), True),
+    ('Lesieur Cristal', 'MA0000012031', '4800', (), True),
+    ('M2M Group', 'MA0000011678', '10000', (), True),
+    ('Maghreb Oxygene', 'MA0000010985', '7200', (), True),
+    ('Maghrebail', 'MA0000011215', '1600', (), True),
+    ('Managem', 'MA0000011058', '7300', (), True),
+    ('Maroc Leasing', 'MA0000010035', '2500', (), True),
+    ('Maroc Telecom', 'MA0000011488', '8001', ('ITISSALAT AL-MAGHRIB', 'IAM'), True),
+    ('Microdata', 'MA0000012163', '10600', (), True),
+    ('Mutandis', 'MA0000012395', '21', (), True),
+    ('Oulmes', 'MA0000010415', '5200', (), True),
+    ('PROMOPHARM', 'MA0000011660', '9900', (), True),
+    ('Rebab Company', 'MA0000010993', '5300', (), True),
+    ('Dar Saada', 'MA0000012239', '12000', ('RES DAR SAADA',), True),
+    ('Risma', 'MA0000011462', '8700', (), True),
+    ('S2M', 'MA0000012106', '11800', ('S.M MONETIQUE', 'SOCIETE MAROCAINE DE MONETIQUE'), True),
+    ('Sanlam Maroc', 'MA0000012007', '11400', ('Sanlam Assurance',), True),
+    ('Salafin', 'MA0000011744', '10700', (), True),
+    ('SMI', 'MA0000010068', '1500', ("SOCIETE METALLURGIQUE D'IMITER",), True),
+    ('Stokvis Nord Afr', 'MA0000011843', '10500', ('STOKVIS NORD AFRIQUE',), True),
+    ('SNEP', 'MA0000011728', '9400', (), True),
+    ('SODEP', 'MA0000012312', '12300', ('SODEP-MARSA MAROC', 'MARSA MAROC'), True),
+    ('Sonasid', 'MA0000010019', '1300', (), True),
+    ('Sothema', 'MA0000012502', '9800', (), True),
+    ('SRM', 'MA0000011595', '2000', ('REALISATIONS MECANIQUES',), True),
+    ('Ste Boissons', 'MA0000010365', '10400', ('SOCIETE DES BOISSONS DU MAROC',), True),
+    ('STROC Indus', 'MA0000012056', '11500', ('STROC INDUSTRIE',), True),
+    ('TAQA Morocco', 'MA0000012205', '11900', (), True),
+    ('TGCC', 'MA0000012528', '29', (), True),
+    ('Timar', 'MA0000011686', '10100', (), True),
+    ('Total Maroc', 'MA0000012262', '12100', ('TOTALENERGIES MARKETING MAROC',), True),
+    ('Unimer', 'MA0000012023', '7500', (), True),
+    ('Wafa Assur', 'MA0000010928', '6400', ('WAFA ASSURANCE',), True),
+    ('Zellidja', 'MA0000010571', '5800', (), True),
+    ('MASI', '', None, (), True),
+    ('MSI20', '', None, (), True),
+    ('Delattre Lev', '', '10800', (), False),
+    ('Med Paper', '', '6500', (), False),
+    ('Nexans Maroc', '', '7400', (), False),
+)
+
+Instrument = namedtuple("Instrument", ["name", "ISIN", "code", "aliases", "listed"])
+
+
+def _norm(text):
+    """Case- and whitespace-insensitive key"""
+    return " ".join(str(text).split()).casefold()
+
+
+class InstrumentRegistry:
+    """
+    Immutable name/ISIN/code index of the instruments, built once.
+    Every lookup is a dict access; ``search`` adds fuzzy matching.
+    """
+
+    def __init__(self, instruments):
+        instruments = tuple(instruments)
+        keys = {}
+        for inst in instruments:
+            for key in (inst.name, *inst.aliases, inst.ISIN, inst.code):
+                if key:
+                    keys.setdefault(_norm(key), inst)
+        self.instruments = instruments
+        self._keys = MappingProxyType(keys)
+        self._names = tuple(inst.name for inst in instruments if inst.listed)
+        self._by_name = MappingProxyType({inst.name: inst for inst in instruments})
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def __iter__(self):
+        return iter(self.instruments)
+
+    def __contains__(self, query):
+        return self.get(query) is not None
+
+    def get(self, query):
+        """Instrument for a name, alias, ISIN or exchange code, or None"""
+        inst = self._by_name.get(query)
+        if inst is None and query is not None:
+            inst = self._keys.get(_norm(query))
+        return inst
+
+    def resolve(self, query):
+        """Like get, but raises KeyError (with suggestions) for unknown queries"""
+        inst = self.get(query)
+        if inst is None:
+            suggestions = [inst.name for inst in self.search(query)]
+            hint = f", did you mean {suggestions}?" if suggestions else ""
+            raise KeyError(f"Unknown instrument: {query!r}{hint}")
+        return inst
+
+    def search(self, query, n=3, cutoff=0.6):
+        """Fuzzy matches of a (possibly misspelt) name, best first"""
+        matches = difflib.get_close_matches(_norm(query), list(self._keys), n=n * 3, cutoff=cutoff)
+        found = []
+        for key in matches:
+            inst = self._keys[key]
+            if inst not in found:
+                found.append(inst)
+        return found[:n]
+
+    def match(self, label, cutoff=0.8):
+        """
+        Instrument of a label as printed on the market pages (e.g.
+        "ATTIJARIWAFA BANK"): exact key, then the longest known name the
+        label starts with, then a close fuzzy match. None when nothing fits.
+        """
+        inst = self.get(label)
+        if inst is not None:
+            return inst
+        key = _norm(label)
+        prefixes = [k for k in self._keys if key.startswith(k + " ")]
+        if prefixes:
+            return self._keys[max(prefixes, key=len)]
+        found = self.search(label, n=1, cutoff=cutoff)
+        return found[0] if found else None
+
+    def names(self):
+        return list(self._names)
+
+
+def _read_instruments(path):
+    """Instruments from a JSON list of objects or a CSV file with a header"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+    instruments = []
+    for row in rows:
+        aliases = row.get("aliases") or ()
+        if isinstance(aliases, str):
+            aliases = [a for a in aliases.split(";") if a.strip()]
+        listed = row.get("listed", True)
+        if isinstance(listed, str):
+            listed = listed.strip().lower() not in ("0", "false", "no", "")
+        instruments.append(Instrument(str(row["name"]).strip(), row.get("ISIN") or "",
+                                      str(row["code"]) if row.get("code") else None,
+                                      tuple(a.strip() for a in aliases), bool(listed)))
+    return instruments
+
+
+_lock = threading.Lock()
+REGISTRY = InstrumentRegistry(Instrument(*row) for row in _LISTINGS)
+
+
+def load_instruments(path, replace=False):
+    """
+    Refresh the registry from a JSON/CSV data file (columns: name, ISIN,
+    code, aliases separated by ';', listed). Entries are merged over the
+    built-in table by name, or replace it when ``replace`` is True.
+    """
+    global REGISTRY
+    loaded = _read_instruments(path)
+    with _lock:
+        if replace:
+            instruments = loaded
+        else:
+            merged = {inst.name: inst for inst in REGISTRY}
+            merged.update((inst.name, inst) for inst in loaded)
+            instruments = merged.values()
+        REGISTRY = InstrumentRegistry(instruments)
+    return REGISTRY
+
+
+if os.environ.get("BVCSCRAP_INSTRUMENTS"):
+    load_instruments(os.environ["BVCSCRAP_INSTRUMENTS"])
+
+
+def notation():
+    return REGISTRY.names()
+
+
 def notation_code():
-      return [{'name': 'Addoha', 'ISIN': 'MA0000011512'},
- {'name': 'AFMA', 'ISIN': 'MA0000012296'},
- {'name': 'Afric Indus', 'ISIN': 'MA0000012114'},
- {'name': 'Afriquia Gaz', 'ISIN': 'MA0000010951'},
- {'name': 'Agma', 'ISIN': 'MA0000010944'},
- {'name': 'Akdital', 'ISIN': 'MA0000012585'},
- {'name': 'Alliances', 'ISIN': 'MA0000011819'},
- {'name': 'Aluminium Maroc', 'ISIN': 'MA0000010936'},
- {'name': 'Aradei Capital', 'ISIN': 'MA0000012460'},
- {'name': 'AtlantaSanad', 'ISIN': 'MA0000011710'},
- {'name': 'Attijariwafa', 'ISIN': 'MA0000012445'},
- {'name': 'Auto Hall', 'ISIN': 'MA0000010969'},
- {'name': 'Auto Nejma', 'ISIN': 'MA0000011009'},
- {'name': 'BALIMA', 'ISIN': 'MA0000011991'},
- {'name': 'BOA', 'ISIN': 'MA0000012437'},
- {'name': 'BCP', 'ISIN': 'MA0000011884'},
- {'name': 'BMCI', 'ISIN': 'MA0000010811'},
- {'name': 'Cartier Saada', 'ISIN': 'MA0000011868'},
- {'name': 'CDM', 'ISIN': 'MA0000010381'},
- {'name': 'CFG', 'ISIN': 'MA0000012627'},
- {'name': 'CIH', 'ISIN': 'MA0000011454'},
- {'name': 'Ciments Maroc', 'ISIN': 'MA0000010506'},
- {'name': 'CMT', 'ISIN': 'MA0000011793'},
- {'name': 'CMPG', 'ISIN': 'MA0000012718'},
- {'name': 'Colorado', 'ISIN': 'MA0000011934'},
- {'name': 'Cosumar', 'ISIN': 'MA0000012247'},
- {'name': 'CTM', 'ISIN': 'MA0000010340'},
- {'name': 'Dari Couspate', 'ISIN': 'MA0000011421'},
- {'name': 'Delta Holding', 'ISIN': 'MA0000011850'},
- {'name': 'Disty Technolog', 'ISIN': 'MA0000012536'},
- {'name': 'Disway', 'ISIN': 'MA0000011637'},
- {'name': 'Ennakl', 'ISIN': 'MA0000011942'},
- {'name': 'EQDOM', 'ISIN': 'MA0000010357'},
- {'name': 'FENIE BROSSETTE', 'ISIN': 'MA0000011587'},
- {'name': 'HPS', 'ISIN': 'MA0000012619'},
- {'name': 'IBMaroc', 'ISIN': 'MA0000011132'},
- {'name': 'Immr Invest', 'ISIN': 'MA0000012387'},
- {'name': 'INVOLYS', 'ISIN': 'MA0000011579'},
- {'name': 'Jet Contractors', 'ISIN': 'MA0000012080'},
- {'name': 'Label Vie', 'ISIN': 'MA0000011801'},
- {'name': 'LafargeHolcim', 'ISIN': 'MA0000012320'},
- {'name': 'Lesieur Cristal', 'ISIN': 'MA0000012031'},
- {'name': 'M2M Group', 'ISIN': 'MA0000011678'},
- {'name': 'Maghreb Oxygene', 'ISIN': 'MA0000010985'},
- {'name': 'Maghrebail', 'ISIN': 'MA0000011215'},
- {'name': 'Managem', 'ISIN': 'MA0000011058'},
- {'name': 'Maroc Leasing', 'ISIN': 'MA0000010035'},
- {'name': 'Maroc Telecom', 'ISIN': 'MA0000011488'},
- {'name': 'Microdata', 'ISIN': 'MA0000012163'},
- {'name': 'Mutandis', 'ISIN': 'MA0000012395'},
- {'name': 'Oulmes', 'ISIN': 'MA0000010415'},
- {'name': 'PROMOPHARM', 'ISIN': 'MA0000011660'},
- {'name': 'Rebab Company', 'ISIN': 'MA0000010993'},
- {'name': 'Dar Saada', 'ISIN': 'MA0000012239'},
- {'name': 'Risma', 'ISIN': 'MA0000011462'},
- {'name': 'S2M', 'ISIN': 'MA0000012106'},
- {'name': 'Sanlam Maroc', 'ISIN': 'MA0000012007'},
- {'name': 'Salafin', 'ISIN': 'MA0000011744'},
- {'name': 'SMI', 'ISIN': 'MA0000010068'},
- {'name': 'Stokvis Nord Afr', 'ISIN': 'MA0000011843'},
- {'name': 'SNEP', 'ISIN': 'MA0000011728'},
- {'name': 'SODEP', 'ISIN': 'MA0000012312'},
- {'name': 'Sonasid', 'ISIN': 'MA0000010019'},
- {'name': 'Sothema', 'ISIN': 'MA0000012502'},
- {'name': 'SRM', 'ISIN': 'MA0000011595'},
- {'name': 'Ste Boissons', 'ISIN': 'MA0000010365'},
- {'name': 'STROC Indus', 'ISIN': 'MA0000012056'},
- {'name': 'TAQA Morocco', 'ISIN': 'MA0000012205'},
- {'name': 'TGCC', 'ISIN': 'MA0000012528'},
- {'name': 'Timar', 'ISIN': 'MA0000011686'},
- {'name': 'Total Maroc', 'ISIN': 'MA0000012262'},
- {'name': 'Unimer', 'ISIN': 'MA0000012023'},
- {'name': 'Wafa Assur', 'ISIN': 'MA0000010928'},
- {'name': 'Zellidja', 'ISIN': 'MA0000010571'},{'name': 'MASI', 'ISIN': ''},{'name': 'MSI20', 'ISIN': ''}]
-    
+    return [{'name': inst.name, 'ISIN': inst.ISIN} for inst in REGISTRY if inst.listed]
+
+
 def notation_value():
-  return {'Addoha' : '9000' , 'AFMA' : '12200' , 'Afric Indus' : '11700' , 'Afriquia Gaz' : '7100' , 'Agma' : '6700' , 'Alliances' : '11200' , 'Aluminium Maroc' : '6600' , 'Aradei Capital' : '27' , 'AtlantaSanad' : '10300' , 'Attijariwafa' : '8200' , 'Auto Hall' : '3200' , 'Auto Nejma' : '7000' , 'BALIMA' : '3300' , 'BOA' : '1100' , 'BCP' : '8000' , 'BMCI' : '5100' , 'Cartier Saada' : '8900' , 'CDM' : '3600'  , 'CIH' : '3100' , 'Ciments Maroc' : '4000' , 'CMT' : '11000' , 'Colorado' : '9200' , 'Cosumar' : '4100' , 'CTM' : '2200' , 'Dari Couspate' : '8500' , 'Delattre Lev' : '10800' , 'Delta Holding' : '10900' , 'Disway' : '9700' , 'Ennakl' : '11300' , 'EQDOM' : '2300' , 'FENIE BROSSETTE' : '9300' , 'HPS' : '9600' , 'IBMaroc' : '7600' , 'Immr Invest' : '12' , 'INVOLYS' : '9500' , 'Jet Contractors' : '11600' , 'Label Vie' : '11100' , 'LafargeHolcim' : '3800' , 'Lesieur Cristal' : '4800' , 'M2M Group' : '10000' , 'Maghreb Oxygene' : '7200' , 'Maghrebail' : '1600' , 'Managem' : '7300' , 'Maroc Leasing' : '2500' , 'Maroc Telecom' : '8001' , 'Med Paper' : '6500' , 'Microdata' : '10600' , 'Mutandis' : '21' , 'Nexans Maroc' : '7400' , 'Oulmes' : '5200' , 'PROMOPHARM' : '9900' , 'Rebab Company' : '5300' , 'Dar Saada' : '12000' , 'Risma' : '8700' , 'S2M' : '11800' , 'Sanlam Assurance' : '11400' , 'Salafin' : '10700' ,  'SMI' : '1500' , 'Stokvis Nord Afr' : '10500' , 'SNEP' : '9400' , 'SODEP' : '12300' , 'Sonasid' : '1300' , 'Sothema' : '9800' , 'SRM' : '2000' , 'Ste Boissons' : '10400' , 'STROC Indus' : '11500' , 'TAQA Morocco' : '11900' , 'Timar' : '10100' , 'Total Maroc' : '12100' , 'Unimer' : '7500' , 'Wafa Assur' : '6400' , 'Zellidja' : '5800','Akdital':"35","Disty Technologis":"32","TGCC":"29"}
+    return {inst.name: inst.code for inst in REGISTRY if inst.code}
+
+
+def get_code(name):
+    """ISIN of an instrument ('' for the MASI/MSI20 indices), None if unknown"""
+    inst = REGISTRY.get(name)
+    return inst.ISIN if inst is not None else None
+
+
+def get_valeur(name):
+    """casablanca-bourse code valeur of an instrument, None if unknown"""
+    inst = REGISTRY.get(name)
+    return inst.code if inst is not None else None
@@ -1,3 +1,45 @@
-from .load import loadata,loadata_patch,loadmany,getIntraday
-from .Notation import notation,notation_code,notation_value
-from .tech import getCours,getKeyIndicators,getDividend,getIndex,getPond,getIndexRecap
+import logging
+import importlib
+
+# Les sous-modules (et pandas, Playwright, lxml...) ne sont importés qu'au
+# premier accès à l'un de leurs noms (PEP 562) : "import BVCscrap" reste léger
+_EXPORTS = {
+    "load": "loadata,loadata_patch,loadmany,getIntraday",
+    "Notation": "notation,notation_code,notation_value,load_instruments,get_code,get_valeur",
+    "tech": "getCours,getKeyIndicators,getDividend,getIndex,getPond,getIndexRecap,getCompanySnapshot,getCompanySnapshots,getMarketSnapshot",
+    "session": "BrowserPool,set_ready_timeout,last_wait_ms,last_load",
+    "intercept": "BrowserProfile,set_browser_profile,browser_profile,compare_profiles",
+    "cache": "enable_cache,disable_cache,cache_info,cache_clear",
+    "store": "Store,open_store",
+    "transport": "set_fixture_mode,fixture_mode",
+    "responses": "enable_response_cache,disable_response_cache,response_cache_stats,response_cache_clear",
+    "panel": "loadpanel,panel_to_arrow,panel_to_parquet,read_panel",
+    "stream": "stream_intraday,IntradayStream",
+    "errors": "BVCscrapError,UnknownTickerError,UpstreamError,ChallengeError,CircuitOpenError,ParseError",
+    "limits": "configure_host",
+    "flight": "enable_coalescing,disable_coalescing,coalescing_stats",
+    "metrics": "Hook,Recorder,LogHook,TracerHook,add_hook,remove_hook,instrument",
+}
+_LAZY = {name: module for module, names in _EXPORTS.items() for name in names.split(",")}
+_SUBMODULES = ("aio", "analytics", "cache", "cli", "errors", "flight", "intercept", "limits", "load", "metrics",
+               "Notation", "panel", "parse", "responses", "session", "store", "stream", "tech", "transport", "utils")
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY, *_SUBMODULES})
+
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -0,0 +1,405 @@
+"""
+Asyncio counterparts of the fetchers, for use inside an event loop.
+
+    from BVCscrap import aio
+
+    async with aio.AsyncBrowserPool(size=4):
+        data = await aio.loadmany(['BCP', 'Attijariwafa'], start="2020-01-01", end="2024-12-31")
+        cours = await aio.getCours("BCP", timeout=20)
+
+JSON endpoints go through the pooled HTTP session (in a worker thread) and
+fall back to ``playwright.async_api`` on a bot challenge; the HTML pages are
+rendered with ``playwright.async_api``. Every call waits on a shared
+concurrency limiter (``set_concurrency``) and accepts ``timeout`` in
+seconds; cancelling the task cancels the fetch. ``loadata`` and ``loadmany``
+take the same ``cache``, ``store`` and ``chunk`` options as the synchronous
+ones, served from a worker thread.
+"""
+import time
+import asyncio
+import weakref
+import contextvars
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from . import load, tech, metrics, responses, intercept, transport as sync_transport
+from .stream import IntradayStream
+from .cache import cache_enabled
+from .utils import intradata
+from .session import (POSTBACK_READY_JS, UPDATE_PANEL_IDLE_JS, JSON_READY_JS, POSTBACK_JS, ready_timeout,
+                      navigation_timeout, is_postback_response, elapsed_ms)
+from .errors import ChallengeError, wrap
+from .limits import acall, host_of
+from .transport import (TRANSPORTS, http_json_text, page_json_text, fall_back, replaying, recording, replay, record,
+                        with_meta)
+
+_concurrency = {"max": 8}
+_limiters = weakref.WeakKeyDictionary()
+_pool = contextvars.ContextVar("BVCscrap_async_pool", default=None)
+
+
+def set_concurrency(n):
+    """Maximum number of fetches running at once, shared by all async calls"""
+    if n < 1:
+        raise ValueError("n must be >= 1")
+    _concurrency["max"] = n
+    _limiters.clear()
+
+
+def limiter():
+    """The shared semaphore of the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _limiters.get(loop)
+    if semaphore is None:
+        semaphore = _limiters[loop] = asyncio.Semaphore(_concurrency["max"])
+    return semaphore
+
+
+async def limited(coro, timeout=None):
+    """Run a fetch under the shared limiter and an optional timeout (s)"""
+    async with limiter():
+        return await asyncio.wait_for(coro, timeout)
+
+
+class AsyncBrowserPool:
+    """Async version of ``BrowserPool``: one Chromium, up to ``size`` idle pages"""
+
+    def __init__(self, size=4, headless=True, launch_options=None):
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.size = size
+        self.headless = headless
+        self.launch_options = dict(launch_options or {})
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._idle = []
+        self._lock = asyncio.Lock()
+        self._token = None
+
+    @property
+    def is_open(self):
+        return self._browser is not None
+
+    async def open(self):
+        async with self._lock:
+            if self._browser is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless, **self.launch_options)
+                self._context = await self._browser.new_context()
+        return self
+
+    async def close(self):
+        while self._idle:
+            try:
+                await self._idle.pop().close()
+            except Exception:
+                pass
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            finally:
+                self._browser = None
+                self._context = None
+                await self._playwright.stop()
+                self._playwright = None
+        if self._token is not None:
+            _pool.reset(self._token)
+            self._token = None
+
+    async def __aenter__(self):
+        await self.open()
+        self._token = _pool.set(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @asynccontextmanager
+    async def page(self):
+        await self.open()
+        page = self._idle.pop() if self._idle else await self._context.new_page()
+        broken = False
+        try:
+            yield page
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            if broken or page.is_closed() or len(self._idle) >= self.size:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            else:
+                self._idle.append(page)
+
+
+@asynccontextmanager
+async def browser_page():
+    """Page from the active AsyncBrowserPool, or from a throw-away browser"""
+    pool = _pool.get()
+    if pool is not None and pool.is_open:
+        async with pool.page() as page:
+            yield page
+        return
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            yield await browser.new_page()
+        finally:
+            await browser.close()
+
+
+async def goto_ready(page, link, postback=False, timeout=None):
+    timeout = timeout or ready_timeout()
+    started = time.perf_counter()
+    state = await intercept.attach_async(page, link)
+    await page.goto(link, wait_until="domcontentloaded", timeout=navigation_timeout(timeout))
+    if postback:
+        await page.wait_for_function(POSTBACK_READY_JS, timeout=timeout)
+    else:
+        try:
+            await page.wait_for_load_state("networkidle", timeout=timeout)
+        except PlaywrightTimeoutError:
+            pass
+    elapsed = elapsed_ms(started)
+    state.report(elapsed)
+    return elapsed
+
+
+async def postback(page, target, argument="", navigation=False, timeout=None):
+    timeout = timeout or ready_timeout()
+    started = time.perf_counter()
+    state = await intercept.attach_async(page, page.url)
+    if navigation:
+        async with page.expect_navigation(wait_until="domcontentloaded", timeout=timeout):
+            await page.evaluate(POSTBACK_JS, [target, argument])
+    else:
+        async with page.expect_response(is_postback_response, timeout=timeout):
+            await page.evaluate(POSTBACK_JS, [target, argument])
+        await page.wait_for_function(UPDATE_PANEL_IDLE_JS, timeout=timeout)
+    elapsed = elapsed_ms(started)
+    state.report(elapsed)
+    return elapsed
+
+
+async def browser_json_text(link):
+    timeout = ready_timeout()
+    async with browser_page() as page:
+        started = time.perf_counter()
+        state = await intercept.attach_async(page, link)
+        await page.goto(link, wait_until="domcontentloaded", timeout=navigation_timeout(timeout))
+        await page.wait_for_function(JSON_READY_JS, timeout=timeout)
+        state.report(elapsed_ms(started))
+        content = await page.content()
+    return page_json_text(link, content)
+
+
+async def fetch_json_text(link, transport="auto"):
+    """Async ``transport.fetch_json_text``: returns (text, transport_used)"""
+    if transport not in TRANSPORTS:
+        raise ValueError(f"transport must be one of {TRANSPORTS}, got {transport!r}")
+    cache = responses.response_cache()
+    if cache is not None and not recording():
+        entry = cache.lookup((link, ()), lambda etag: sync_transport.load_json_text(link, transport, etag))
+        if entry is not None:
+            return entry.body, "cache"
+    text, used = await load_json_text(link, transport)
+    if cache is not None and not recording():
+        cache.put((link, ()), responses.Entry(text, time.time(), None, used))
+    return text, used
+
+
+async def load_json_text(link, transport="auto"):
+    if replaying():
+        return replay(link), "replay"
+    with metrics.span("fetch", link=link) as span:
+        text, used = await acall(host_of(link), lambda: live_json_text(link, transport))
+        span.set(transport=used)
+    if recording():
+        record(link, text)
+    return text, used
+
+
+async def live_json_text(link, transport="auto"):
+    if transport != "browser":
+        try:
+            return await asyncio.to_thread(http_json_text, link), "http"
+        except ChallengeError as e:
+            if transport == "http":
+                raise
+            fall_back(e)
+    return await browser_json_text(link), "browser"
+
+
+async def fetch_html(link, targets=(), navigation=False):
+    """Async ``transport.fetch_html``: returns (contents, wait_ms)"""
+    targets = tuple(targets)
+    cache = responses.response_cache()
+    if cache is not None and not recording():
+        entry = cache.lookup((link, targets), lambda etag: sync_transport.load_html(link, targets, navigation))
+        if entry is not None:
+            return list(entry.body), 0.0
+    contents, waited = await load_html(link, targets, navigation)
+    if cache is not None and not recording():
+        cache.put((link, targets), responses.Entry(contents, time.time(), None, waited))
+    return contents, waited
+
+
+async def load_html(link, targets=(), navigation=False):
+    if replaying():
+        return replay(link, targets), 0.0
+    with metrics.span("fetch", link=link, transport="browser"):
+        contents, waited = await acall(host_of(link), lambda: browser_html(link, targets, navigation))
+    if recording():
+        record(link, contents, targets)
+    return contents, waited
+
+
+async def browser_html(link, targets=(), navigation=False):
+    async with browser_page() as page:
+        waited = await goto_ready(page, link, postback=bool(targets))
+        if not targets:
+            return [await page.content()], waited
+        contents = []
+        for target in targets:
+            waited += await postback(page, target, navigation=navigation)
+            contents.append(await page.content())
+    return contents, waited
+
+
+# API publique (mêmes noms et résultats que la version synchrone)
+async def loadata(name, start=None, end=None, decode="utf-8", transport="auto", cache=None, store=None, chunk=None,
+                  workers=4, timeout=None):
+    code = load.check_name(name)
+    name = load.canonical_name(name)
+    try:
+        # Store, cache et fenêtres parallèles sont synchrones : dans un thread
+        if store is not None:
+            store = store if isinstance(store, load.Store) else load.open_store(store)
+            coro = asyncio.to_thread(load.stored_history, name, code, store, start, end, decode, transport, chunk,
+                                     workers)
+            return await limited(coro, timeout)
+        if name not in load.INDICES and (cache_enabled() if cache is None else cache):
+            coro = asyncio.to_thread(load.cached_history, name, code, start, end, decode, transport, chunk, workers)
+            return await limited(coro, timeout)
+        if name not in load.INDICES and chunk is not None:
+            coro = asyncio.to_thread(load.chunked_history, name, start, end, chunk, decode, transport, workers)
+            data, used = await limited(coro, timeout)
+            return with_meta(data, transport=used)
+        json_text, used = await limited(fetch_json_text(load.history_link(name, start, end), transport), timeout)
+        return with_meta(load.history_data(name, json_text, start, end, decode), transport=used)
+    except asyncio.TimeoutError:
+        raise
+    except Exception as e:
+        raise wrap(e, f"Error fetching data for {name}") from e
+
+
+async def loadmany(*args, start=None, end=None, feature="Value", decode="utf-8", transport="auto", store=None,
+                   timeout=None):
+    if type(args[0]) == list:
+        args = args[0]
+    if store is not None and not isinstance(store, load.Store):
+        store = load.open_store(store)
+    results = await asyncio.gather(*(loadata(stock, start, end, decode, transport, store=store, timeout=timeout)
+                                     for stock in args), return_exceptions=True)
+    series, errors = {}, {}
+    for stock, result in zip(args, results):
+        if isinstance(result, BaseException):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            errors[stock] = str(result) or type(result).__name__
+        else:
+            try:
+                series[stock] = result[feature]
+            except KeyError as e:
+                errors[stock] = f"No field {e} for {stock}"
+    return load.assemble(args, series, errors)
+
+
+async def getIntraday(name, decode="utf-8", transport="auto", timeout=None):
+    try:
+        json_text, used = await limited(fetch_json_text(load.intraday_link(name), transport), timeout)
+        return with_meta(intradata(json_text, decode), transport=used)
+    except asyncio.TimeoutError:
+        raise
+    except Exception as e:
+        raise wrap(e, f"Error fetching intraday data for {name}") from e
+
+
+async def getCompanySnapshot(name, sections=("cours", "indicators", "dividends"), timeout=None):
+    try:
+        sections, targets = tech.section_targets(sections)
+        contents, waited = await limited(fetch_html(tech.company_link(name), targets, navigation=True), timeout)
+        return tech.build_snapshot(name, sections, contents, waited)
+    except asyncio.TimeoutError:
+        raise
+    except Exception as e:
+        raise wrap(e, f"Error fetching snapshot for {name}") from e
+
+
+async def getCours(name, timeout=None):
+    return (await getCompanySnapshot(name, "cours", timeout)).cours
+
+
+async def getKeyIndicators(name, timeout=None):
+    return (await getCompanySnapshot(name, "indicators", timeout)).indicators
+
+
+async def getDividend(name, timeout=None):
+    return (await getCompanySnapshot(name, "dividends", timeout)).dividends
+
+
+async def _page(link, extractor, what, targets=(), timeout=None):
+    try:
+        (content,), waited = await limited(fetch_html(link, targets), timeout)
+        return with_meta(tech.extract(extractor, content), wait_ms=waited)
+    except asyncio.TimeoutError:
+        raise
+    except Exception as e:
+        raise wrap(e, f"Error fetching {what}") from e
+
+
+async def getIndex(timeout=None):
+    return await _page(tech.INDEX_LINK, tech.getAllIndex, "index data", timeout=timeout)
+
+
+async def getPond(timeout=None):
+    return await _page(tech.POND_LINK, tech.getPondval, "ponderation data", timeout=timeout)
+
+
+async def getIndexRecap(timeout=None):
+    return await _page(tech.RECAP_LINK, tech.getIndiceRecapScrap, "index recap", [tech.RECAP_TARGET], timeout)
+
+
+async def getMarketSnapshot(timeout=None):
+    """Async ``tech.getMarketSnapshot``: both market pages are loaded concurrently"""
+    try:
+        ((pond,), waited), ((recap,), recap_waited) = await asyncio.gather(
+            limited(fetch_html(tech.POND_LINK), timeout),
+            limited(fetch_html(tech.RECAP_LINK, [tech.RECAP_TARGET]), timeout))
+        data = tech.build_market(tech.extract(tech.getPondval, pond), tech.extract(tech.getIndiceRecapScrap, recap))
+        return with_meta(data, wait_ms=waited + recap_waited)
+    except asyncio.TimeoutError:
+        raise
+    except Exception as e:
+        raise wrap(e, "Error fetching market snapshot") from e
+
+
+async def stream_intraday(names, interval=5.0, maxlen=5000, transport="auto", decode="utf-8", max_polls=None):
+    """
+    Async iterator of (name, new ticks), see ``stream.IntradayStream``. The
+    instruments of one round are fetched concurrently.
+    """
+    stream = IntradayStream(names, interval, maxlen, transport, decode, max_polls)
+    while not stream.done():
+        started = time.monotonic()
+        stream.polls += 1
+        texts = await asyncio.gather(*(limited(fetch_json_text(load.intraday_link(name), transport))
+                                       for name in stream.names))
+        for name, (json_text, _) in zip(stream.names, texts):
+            new = stream.update(name, intradata(json_text, decode))
+            if len(new):
+                yield name, new
+        if not stream.done():
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
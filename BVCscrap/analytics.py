@@ -0,0 +1,294 @@
+"""
+Analytics on loaded histories: returns, rolling volatility, drawdowns,
+beta/correlation against MASI or MSI20, correlation matrices and
+index-weight attribution.
+
+Every function accepts a history frame (``loadata``), a ``loadmany``
+frame (one column per ticker), a ``loadpanel`` wide panel (the ``Value``
+field is used) or ticker names. With names, the histories are loaded and
+the result is memoized per (tickers, start, end, parameters), so a
+dashboard refreshing the same view does not recompute it:
+
+    from BVCscrap import analytics
+
+    analytics.rolling_volatility(['BCP', 'Attijariwafa'], window=20, start="2020-01-01", end="2024-12-31")
+    analytics.beta(['BCP', 'Cosumar'], benchmark="MASI", start="2020-01-01", end="2024-12-31")
+
+The kernels are column-wise NumPy (cumulative sums for the rolling
+windows, masked matrix products for pairwise statistics).
+"""
+import datetime
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from . import Notation
+from .utils import HISTORY_COLUMNS
+
+PERIODS_PER_YEAR = 252
+
+_lock = threading.Lock()
+_memo = OrderedDict()
+_memo_size = {"max": 256}
+
+
+def set_memo_size(n):
+    """Number of memoized results kept (least recently used dropped first)"""
+    with _lock:
+        _memo_size["max"] = n
+        while len(_memo) > n:
+            _memo.popitem(last=False)
+
+
+def clear_memo():
+    with _lock:
+        _memo.clear()
+
+
+def _remember(key, compute):
+    with _lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    result = compute()
+    with _lock:
+        _memo[key] = result
+        while len(_memo) > _memo_size["max"]:
+            _memo.popitem(last=False)
+    return result
+
+
+def _day(value):
+    # end=None veut dire "jusqu'à aujourd'hui" : la clé change chaque jour
+    return str(pd.Timestamp(value).date()) if value is not None else None
+
+
+def history(names, start=None, end=None):
+    """Value of each ticker (one column per name), loaded once per (names, start, end)"""
+    from .load import loadmany
+    names = (names,) if isinstance(names, str) else tuple(names)
+    key = ("history", names, _day(start), _day(end) or str(datetime.date.today()))
+    return _remember(key, lambda: loadmany(list(names), start=start, end=end))
+
+
+def prices(data, field="Value"):
+    """One column per ticker from any of the library's history layouts"""
+    if isinstance(data, pd.Series):
+        return data.to_frame(data.name or field)
+    if isinstance(data.columns, pd.MultiIndex):
+        return data.xs(field, axis=1, level="field")
+    if field in data.columns and set(data.columns) <= set(HISTORY_COLUMNS):
+        return data[[field]]
+    return data
+
+
+def memoized(fn):
+    """
+    Accept ticker names as well as frames. Results computed from names are
+    memoized per (tickers, start, end, parameters); a copy is returned.
+    Functions with ``start``/``end`` parameters receive the caller's range.
+    """
+    ranged = "start" in inspect.signature(fn).parameters
+
+    @functools.wraps(fn)
+    def wrapper(data, *args, start=None, end=None, **kwargs):
+        if ranged:
+            kwargs.update(start=start, end=end)
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            if start is not None or end is not None:
+                data = data.loc[start:end]
+            return fn(data, *args, **kwargs)
+        names = (data,) if isinstance(data, str) else tuple(data)
+        key = (fn.__name__, names, _day(start), _day(end) or str(datetime.date.today()), args,
+               tuple(sorted((k, v) for k, v in kwargs.items() if k not in ("start", "end"))))
+        try:
+            hash(key)
+        except TypeError:
+            # Paramètres non hashables (poids en dict, série...) : pas de mémo
+            return fn(history(names, start, end), *args, **kwargs)
+        result = _remember(key, lambda: fn(history(names, start, end), *args, **kwargs))
+        return result.copy() if hasattr(result, "copy") else result
+    return wrapper
+
+
+def _frame(values, like, index=None):
+    return pd.DataFrame(values, index=like.index if index is None else index, columns=like.columns)
+
+
+def _window_sums(x, window):
+    """Sums of every trailing window (NaN counted as missing) and the counts of values"""
+    valid = ~np.isnan(x)
+    zero = np.zeros((1, x.shape[1]))
+    total = np.concatenate([zero, np.cumsum(np.where(valid, x, 0.0), axis=0)])
+    count = np.concatenate([zero, np.cumsum(valid, axis=0)])
+    sums = np.full(x.shape, np.nan)
+    counts = np.zeros(x.shape)
+    if len(x) >= window:
+        sums[window - 1:] = total[window:] - total[:-window]
+        counts[window - 1:] = count[window:] - count[:-window]
+    return sums, counts
+
+
+@memoized
+def returns(data, kind="log"):
+    """Daily returns, "log" or "simple" (first row dropped)"""
+    p = prices(data)
+    v = p.to_numpy(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = v[1:] / v[:-1]
+        r = np.log(ratio) if kind == "log" else ratio - 1
+    return _frame(r, p, p.index[1:])
+
+
+@memoized
+def rolling_volatility(data, window=20, annualize=True):
+    """Rolling standard deviation of the log returns over ``window`` sessions"""
+    r = returns(data)
+    x = r.to_numpy()
+    s, n = _window_sums(x, window)
+    ss, _ = _window_sums(x * x, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (ss - s * s / n) / (n - 1)
+    var[n < window] = np.nan
+    vol = np.sqrt(np.maximum(var, 0.0))
+    if annualize:
+        vol *= np.sqrt(PERIODS_PER_YEAR)
+    return _frame(vol, r)
+
+
+@memoized
+def drawdown(data):
+    """Drawdown from the running peak (0 at a new high, -0.25 25 % below it)"""
+    p = prices(data)
+    v = p.to_numpy(np.float64)
+    peak = np.fmax.accumulate(v, axis=0)
+    return _frame(v / peak - 1, p)
+
+
+@memoized
+def max_drawdown(data):
+    return drawdown(data).min()
+
+
+def _benchmark_returns(benchmark, data, index, kind, start=None, end=None):
+    """
+    Returns of the benchmark on ``index``. A name is loaded on the caller's
+    range (by default the first price of ``data``, not its first return,
+    so that the first return of the benchmark exists too).
+    """
+    if isinstance(benchmark, str):
+        if start is None:
+            start = prices(data).index.min()
+        benchmark = history([benchmark], start, end if end is not None else index.max())
+    b = returns(benchmark, kind=kind)
+    return b.iloc[:, 0].reindex(index).to_numpy()
+
+
+def _pairwise(x, y, window=None):
+    """Covariance of x columns with y, variances of both, on the rows where both exist"""
+    mask = ~(np.isnan(x) | np.isnan(y[:, None]))
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y[:, None], 0.0)
+    m = mask.astype(np.float64)
+    terms = [m, x, y, x * y, x * x, y * y]
+    if window is None:
+        n, sx, sy, sxy, sxx, syy = (t.sum(axis=0) for t in terms)
+    else:
+        n, sx, sy, sxy, sxx, syy = (_window_sums(t, window)[0] for t in terms)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (sxy - sx * sy / n) / (n - 1)
+        var_x = (sxx - sx * sx / n) / (n - 1)
+        var_y = (syy - sy * sy / n) / (n - 1)
+    return n, cov, var_x, var_y
+
+
+@memoized
+def beta(data, benchmark="MASI", window=None, kind="log", start=None, end=None):
+    """
+    Beta of each ticker against ``benchmark`` (a name such as "MASI"/"MSI20"
+    or a history), over the whole range or rolling over ``window`` sessions.
+    """
+    r = returns(data, kind=kind)
+    b = _benchmark_returns(benchmark, data, r.index, kind, start, end)
+    n, cov, _, var_b = _pairwise(r.to_numpy(), b, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = cov / var_b
+    if window is None:
+        return pd.Series(result, index=r.columns, name="beta")
+    result[n < window] = np.nan
+    return _frame(result, r)
+
+
+@memoized
+def correlation(data, benchmark=None, window=None, kind="log", start=None, end=None):
+    """
+    Correlation of the returns: the pairwise matrix of the tickers, or each
+    ticker against ``benchmark`` (whole range or rolling ``window``).
+    """
+    r = returns(data, kind=kind)
+    x = r.to_numpy()
+    if benchmark is not None:
+        b = _benchmark_returns(benchmark, data, r.index, kind, start, end)
+        n, cov, var_x, var_b = _pairwise(x, b, window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = cov / np.sqrt(var_x * var_b)
+        if window is None:
+            return pd.Series(result, index=r.columns, name="correlation")
+        result[n < window] = np.nan
+        return _frame(result, r)
+    # Matrice par paires (lignes communes à chaque paire) en produits matriciels
+    mask = (~np.isnan(x)).astype(np.float64)
+    x0 = np.nan_to_num(x)
+    n = mask.T @ mask
+    sx = x0.T @ mask
+    sxx = (x0 * x0).T @ mask
+    sxy = x0.T @ x0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sx.T / n
+        var = sxx - sx * sx / n
+        corr = cov / np.sqrt(var * var.T)
+    return pd.DataFrame(corr, index=r.columns, columns=r.columns)
+
+
+@memoized
+def total_return(data):
+    """Simple return between the first and the last price of each ticker"""
+    p = prices(data)
+    first = p.apply(lambda c: c.loc[c.first_valid_index()] if c.first_valid_index() is not None else np.nan)
+    last = p.apply(lambda c: c.loc[c.last_valid_index()] if c.last_valid_index() is not None else np.nan)
+    return (last / first - 1).rename("return")
+
+
+def index_weights():
+    """Index weights (fraction) per instrument name, from getPond (loaded once a day)"""
+    from .tech import getPond
+
+    def load():
+        pond = getPond()
+        column = next(c for c in pond.columns if "poids" in str(c).casefold())
+        weights = {}
+        for label, weight in pond[column].items():
+            inst = Notation.REGISTRY.match(str(label))
+            if inst is not None:
+                weights[inst.name] = weight / 100
+        return pd.Series(weights, name="weight")
+
+    return _remember(("index_weights", str(datetime.date.today())), load)
+
+
+@memoized
+def attribution(data, weights=None):
+    """
+    Contribution of each ticker to the index: weight x return over the range.
+    ``weights`` defaults to the current weights of getPond; the weighted sum
+    is in attrs["index_return"].
+    """
+    r = total_return(data)
+    if weights is None:
+        weights = index_weights()
+    weights = pd.Series(weights, dtype=np.float64).reindex(r.index)
+    result = pd.DataFrame({"weight": weights, "return": r, "contribution": weights * r})
+    result.attrs["index_return"] = float(result["contribution"].sum())
+    return result
@@ -0,0 +1,203 @@
+import os
+import json
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+
+# Séance de la Bourse de Casablanca : lundi-vendredi, clôture 15h30 (GMT+1)
+_config = {
+    "enabled": False,
+    "dir": os.environ.get("BVCSCRAP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "BVCscrap")),
+    "close": datetime.time(15, 30),
+    "holidays": frozenset(),
+    "max_age": None,
+}
+_lock = threading.Lock()
+
+
+def has_parquet():
+    """True when pyarrow is installed (parquet files instead of npz/csv)"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def enable_cache(path=None, close="15:30", holidays=(), max_age=None):
+    """
+    Turn on the local price-history cache used by ``loadata``.
+
+    path      directory of the cache (default ~/.cache/BVCscrap or $BVCSCRAP_CACHE_DIR)
+    close     session close time "HH:MM"; a cache checked before the last
+              close is stale
+    holidays  extra non-trading dates (iterable of dates or "YYYY-MM-DD")
+    max_age   optional datetime.timedelta; a cache checked longer ago than
+              this is stale whatever the calendar says
+    """
+    hour, minute = (int(x) for x in close.split(":"))
+    _config.update(
+        enabled=True,
+        dir=path or _config["dir"],
+        close=datetime.time(hour, minute),
+        holidays=frozenset(pd.Timestamp(d).date() for d in holidays),
+        max_age=max_age,
+    )
+    os.makedirs(_config["dir"], exist_ok=True)
+
+
+def disable_cache():
+    _config["enabled"] = False
+
+
+def cache_enabled():
+    return _config["enabled"]
+
+
+# Sans pyarrow : colonnes binaires de largeur fixe (.npz, lu sans pickle),
+# jamais de pickle dans un répertoire éventuellement partagé
+FORMATS = ("parquet", "npz")
+
+
+def _path(isin):
+    ext = "parquet" if has_parquet() else "npz"
+    return os.path.join(_config["dir"], f"{isin}.{ext}")
+
+
+def _existing_path(isin):
+    for ext in FORMATS:
+        path = os.path.join(_config["dir"], f"{isin}.{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _index_path():
+    return os.path.join(_config["dir"], "index.json")
+
+
+def _read_index():
+    try:
+        with open(_index_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(index):
+    tmp = _index_path() + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, _index_path())
+
+
+def last_session(now=None):
+    """Date of the last trading session whose close has passed"""
+    now = now or datetime.datetime.now()
+    day = now.date()
+    if now.time() < _config["close"]:
+        day -= datetime.timedelta(days=1)
+    while day.weekday() >= 5 or day in _config["holidays"]:
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def last_close(now=None):
+    """Datetime of the close of the last trading session"""
+    return datetime.datetime.combine(last_session(now), _config["close"])
+
+
+def read_history(isin):
+    """Cached history of an ISIN (DatetimeIndex) or None"""
+    path = _existing_path(isin)
+    if path is None:
+        return None
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return _read_columns(path)
+
+
+def _write_columns(data, f):
+    """History as int64 nanosecond dates + one fixed-width array per column"""
+    columns = {"Date": pd.DatetimeIndex(data.index).as_unit("ns").asi8}
+    for column in data.columns:
+        values = data[column].to_numpy()
+        columns[str(column)] = values if values.dtype.kind in "iuf" else values.astype(np.float64)
+    np.savez(f, **columns)
+
+
+def _read_columns(path):
+    with np.load(path, allow_pickle=False) as arrays:
+        columns = {name: arrays[name] for name in arrays.files}
+    index = pd.DatetimeIndex(columns.pop("Date").view("M8[ns]"), name="Date")
+    return pd.DataFrame(columns, index=index)
+
+
+def write_history(isin, data, name=None):
+    """Store the full history of an ISIN and mark it as checked now"""
+    with _lock:
+        os.makedirs(_config["dir"], exist_ok=True)
+        old = _existing_path(isin)
+        path = _path(isin)
+        tmp = path + ".tmp"
+        if path.endswith(".parquet"):
+            data.to_parquet(tmp)
+        else:
+            with open(tmp, "wb") as f:
+                _write_columns(data, f)
+        os.replace(tmp, path)
+        if old and old != path:
+            os.remove(old)
+        index = _read_index()
+        index[isin] = {"name": name, "checked": datetime.datetime.now().isoformat(timespec="seconds")}
+        _write_index(index)
+
+
+def is_stale(isin, now=None):
+    """True when the cached history of an ISIN may miss a closed session"""
+    entry = _read_index().get(isin)
+    if entry is None or _existing_path(isin) is None:
+        return True
+    now = now or datetime.datetime.now()
+    checked = datetime.datetime.fromisoformat(entry["checked"])
+    if _config["max_age"] is not None and now - checked > _config["max_age"]:
+        return True
+    return checked < last_close(now)
+
+
+def cache_info():
+    """One row per cached ISIN: name, first/last bar, rows, size, checked, stale"""
+    index = _read_index()
+    rows = []
+    for isin, entry in sorted(index.items()):
+        path = _existing_path(isin)
+        if path is None:
+            continue
+        data = read_history(isin)
+        rows.append({
+            "ISIN": isin,
+            "name": entry.get("name"),
+            "first": data.index.min() if len(data) else None,
+            "last": data.index.max() if len(data) else None,
+            "rows": len(data),
+            "bytes": os.path.getsize(path),
+            "checked": entry["checked"],
+            "stale": is_stale(isin),
+        })
+    columns = ["ISIN", "name", "first", "last", "rows", "bytes", "checked", "stale"]
+    return pd.DataFrame(rows, columns=columns).set_index("ISIN")
+
+
+def cache_clear(isin=None):
+    """Drop the cached history of one ISIN, or of everything when isin is None"""
+    with _lock:
+        index = _read_index()
+        targets = [isin] if isin is not None else list(index)
+        for key in targets:
+            path = _existing_path(key)
+            if path is not None:
+                os.remove(path)
+            index.pop(key, None)
+        if os.path.isdir(_config["dir"]):
+            _write_index(index)
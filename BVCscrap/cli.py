@@ -0,0 +1,255 @@
+"""
+``bvcscrap``: batch download of history, intraday or fundamentals.
+
+    bvcscrap history BCP Attijariwafa --start 2020-01-01 --end 2024-12-31 -o data
+    bvcscrap history --all --chunk year -o data
+    bvcscrap intraday --all -o data --format csv
+    bvcscrap fundamentals --all -o data --workers 2
+
+Each job keeps a manifest (``<out>/<kind>/manifest.json``) of what every
+ticker gave: rerunning the same command only fetches the tickers that
+failed, that are new, or whose data predates the last session close
+(``--force`` refetches everything).
+"""
+import os
+import re
+import sys
+import json
+import time
+import queue
+import argparse
+import datetime
+import threading
+from . import cache, tech
+from .load import loadata, getIntraday, INDICES, CHUNKS
+from .Notation import notation, get_code, get_valeur
+from .session import BrowserPool
+from .transport import TRANSPORTS
+
+KINDS = ("history", "intraday", "fundamentals")
+FORMATS = ("parquet", "csv")
+
+
+def day(text):
+    """argparse type of --start/--end: a YYYY-MM-DD date, kept as text"""
+    try:
+        datetime.date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {text!r}")
+    return text
+
+
+def slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
+
+
+class Manifest:
+    """Per-ticker status of a job, saved (atomically) after every ticker"""
+
+    def __init__(self, path, params):
+        self.path = path
+        self.params = params
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        # D'autres paramètres (dates, format...) : rien n'est réutilisable
+        self.entries = saved.get("tickers", {}) if saved.get("params") == params else {}
+
+    def pending(self, names, force=False, now=None):
+        """
+        Names to fetch: failed, never fetched, or fetched before the last
+        close. With a past ``end``, the last close on or before ``end``: a
+        fixed range fetched after it is complete and never refetched.
+        """
+        if force:
+            return list(names)
+        close = cache.last_close(now)
+        end = self.params.get("end")
+        if end is not None:
+            end_close = cache.last_close(datetime.datetime.combine(datetime.date.fromisoformat(end), datetime.time.max))
+            close = min(close, end_close)
+        todo = []
+        for name in names:
+            entry = self.entries.get(name)
+            if (entry is None or entry["status"] != "done"
+                    or datetime.datetime.fromisoformat(entry["finished"]) < close):
+                todo.append(name)
+        return todo
+
+    def update(self, name, **entry):
+        with self._lock:
+            self.entries[name] = dict(entry, finished=datetime.datetime.now().isoformat(timespec="seconds"))
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"params": self.params, "tickers": self.entries}, f, indent=1, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+
+def write(data, path, fmt):
+    """Write one frame, returns the number of bytes written"""
+    data = data.copy()
+    data.columns = [str(c) for c in data.columns]
+    if fmt == "parquet":
+        data.to_parquet(path)
+    else:
+        data.to_csv(path)
+    return os.path.getsize(path)
+
+
+def download(kind, name, args):
+    """Fetch one ticker: {file suffix: frame}"""
+    if kind == "history":
+        return {"": loadata(name, args.start, args.end, transport=args.transport, chunk=args.chunk)}
+    if kind == "intraday":
+        return {"": getIntraday(name, transport=args.transport)}
+    snapshot = tech.getCompanySnapshot(name)
+    return {f".{section}": getattr(snapshot, section) for section in tech.COMPANY_SECTIONS}
+
+
+def run_one(kind, name, args, folder, manifest):
+    started = time.perf_counter()
+    try:
+        frames = download(kind, name, args)
+        files, rows, size = [], 0, 0
+        for suffix, data in frames.items():
+            if data is None:
+                continue
+            path = os.path.join(folder, f"{slug(name)}{suffix}.{args.format}")
+            size += write(data, path, args.format)
+            rows += len(data)
+            files.append(os.path.basename(path))
+    except Exception as e:
+        manifest.update(name, status="failed", error=str(e))
+        return name, False, 0, 0, time.perf_counter() - started, str(e)
+    manifest.update(name, status="done", rows=rows, bytes=size, files=files)
+    return name, True, rows, size, time.perf_counter() - started, None
+
+
+def worker(kind, todo, results, args, folder, manifest):
+    # Un navigateur par thread (lancé seulement si un fetch en a besoin)
+    with BrowserPool(size=1):
+        while True:
+            try:
+                name = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                result = run_one(kind, name, args, folder, manifest)
+            except Exception as e:
+                # Manifeste illisible/disque plein... : le ticker est quand même rendu
+                result = name, False, 0, 0, 0.0, f"{type(e).__name__}: {e}"
+            results.put(result)
+
+
+def collect(results, threads, count):
+    """
+    Yield the ``count`` results of the workers; stop early (instead of
+    waiting forever) once every worker has died and the queue is empty.
+    """
+    received = 0
+    while received < count:
+        try:
+            result = results.get(timeout=0.5)
+        except queue.Empty:
+            if any(thread.is_alive() for thread in threads):
+                continue
+            try:
+                # Un worker a pu rendre son résultat juste avant de s'arrêter
+                result = results.get_nowait()
+            except queue.Empty:
+                return
+        received += 1
+        yield result
+
+
+def universe(kind):
+    names = notation()
+    if kind == "fundamentals":
+        return [name for name in names if get_valeur(name)]
+    return [name for name in names if get_code(name) or name in INDICES]
+
+
+def parser():
+    main = argparse.ArgumentParser(prog="bvcscrap", description=__doc__.strip().splitlines()[0])
+    commands = main.add_subparsers(dest="kind", required=True)
+    for kind in KINDS:
+        sub = commands.add_parser(kind, help=f"download {kind}")
+        sub.add_argument("tickers", nargs="*", help="names as in notation() (default: --all)")
+        sub.add_argument("--all", action="store_true", help="every instrument of notation()")
+        sub.add_argument("-o", "--out", default=".", help="output directory (default: .)")
+        sub.add_argument("--format", choices=FORMATS, default=None,
+                         help="parquet (default when pyarrow is installed) or csv")
+        sub.add_argument("-w", "--workers", type=int, default=4, help="parallel downloads (default 4)")
+        sub.add_argument("--force", action="store_true", help="ignore the manifest, refetch everything")
+        if kind != "fundamentals":
+            sub.add_argument("--transport", choices=TRANSPORTS, default="auto")
+        if kind == "history":
+            sub.add_argument("--start", type=day, help="YYYY-MM-DD")
+            sub.add_argument("--end", type=day, help="YYYY-MM-DD")
+            sub.add_argument("--chunk", choices=list(CHUNKS), help="fetch each history by year or quarter windows")
+    return main
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    kind = args.kind
+    if args.format is None:
+        args.format = "parquet" if cache.has_parquet() else "csv"
+    elif args.format == "parquet" and not cache.has_parquet():
+        print("bvcscrap: --format parquet needs pyarrow (pip install pyarrow)", file=sys.stderr)
+        return 2
+    names = list(dict.fromkeys(args.tickers or []))
+    if args.all or not names:
+        names = universe(kind)
+
+    folder = os.path.join(args.out, kind)
+    os.makedirs(folder, exist_ok=True)
+    params = {"format": args.format, "start": getattr(args, "start", None), "end": getattr(args, "end", None)}
+    manifest = Manifest(os.path.join(folder, "manifest.json"), params)
+    pending = manifest.pending(names, args.force)
+    skipped = len(names) - len(pending)
+    print(f"{kind}: {len(pending)} to fetch, {skipped} up to date", file=sys.stderr)
+
+    todo, results = queue.Queue(), queue.Queue()
+    for name in pending:
+        todo.put(name)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(kind, todo, results, args, folder, manifest), daemon=True)
+               for _ in range(max(1, min(args.workers, len(pending))))]
+    for thread in threads:
+        thread.start()
+
+    failed, rows, size = [], 0, 0
+    reported = set()
+    for i, (name, ok, n, written, seconds, error) in enumerate(collect(results, threads, len(pending)), 1):
+        reported.add(name)
+        rows += n
+        size += written
+        status = f"ok {n} rows" if ok else f"FAILED {error}"
+        print(f"[{i}/{len(pending)}] {name}: {status} ({seconds:.1f}s)", file=sys.stderr)
+        if not ok:
+            failed.append(name)
+    for name in pending:
+        if name not in reported:
+            manifest.update(name, status="failed", error="worker stopped")
+            print(f"{name}: FAILED worker stopped", file=sys.stderr)
+            failed.append(name)
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - started
+    done = len(pending) - len(failed)
+    rate = f"{done / elapsed:.2f} tickers/s, {rows / elapsed:,.0f} rows/s" if elapsed > 0 and pending else "-"
+    print(f"{done} done, {len(failed)} failed, {skipped} skipped; {rows:,} rows, {size / 1e6:.1f} MB "
+          f"in {elapsed:.1f}s ({rate})", file=sys.stderr)
+    if failed:
+        print(f"failed: {', '.join(failed)} (rerun the same command to retry them)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
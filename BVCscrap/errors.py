@@ -0,0 +1,65 @@
+import sys
+import copy
+
+
+class BVCscrapError(ValueError):
+    """
+    Base of the library errors. It subclasses ValueError, which is what every
+    fetcher used to raise, so existing ``except ValueError`` keep working.
+    """
+
+
+class UnknownTickerError(BVCscrapError):
+    """The name is not in the instrument registry (or has no ISIN/code)"""
+
+
+class UpstreamError(BVCscrapError):
+    """medias24 / casablanca-bourse failed: network, HTTP status, challenge"""
+
+    def __init__(self, message, host=None, status=None):
+        super().__init__(message)
+        self.host = host
+        self.status = status
+
+
+class ChallengeError(UpstreamError):
+    """The HTTP response is a bot-challenge page, not the API payload"""
+
+
+class CircuitOpenError(UpstreamError):
+    """The host failed repeatedly; calls fail fast until it cools down"""
+
+
+class ParseError(BVCscrapError):
+    """The response was received but could not be decoded"""
+
+
+BROWSER_ERRORS = ("playwright.sync_api.Error", "playwright.async_api.Error")
+
+
+def loaded_errors(*names):
+    """
+    Exception classes ("module.Class") of the modules already imported. An
+    error can only come from a loaded library, so none is imported here.
+    """
+    found = []
+    for name in names:
+        module, _, cls = name.rpartition(".")
+        if module in sys.modules:
+            found.append(getattr(sys.modules[module], cls))
+    return tuple(found)
+
+
+def wrap(error, context):
+    """
+    Prefix ``error`` with context, keeping its type when it is one of ours.
+    Network and browser failures become an UpstreamError, anything else a
+    BVCscrapError.
+    """
+    if isinstance(error, BVCscrapError):
+        wrapped = copy.copy(error)
+        wrapped.args = (f"{context}: {error}",)
+        return wrapped
+    if isinstance(error, (OSError, TimeoutError, *loaded_errors("requests.RequestException", *BROWSER_ERRORS))):
+        return UpstreamError(f"{context}: {error}")
+    return BVCscrapError(f"{context}: {error}")
@@ -0,0 +1,103 @@
+"""
+Single-flight coalescing of identical concurrent fetches.
+
+When several threads ask for the same request at the same time (same
+endpoint, ISIN/code, date range and postbacks), only the first one fetches
+it; the others wait for its result instead of launching their own browser
+or HTTP request. Each waiting caller gets its own copy of mutable results.
+
+    with ThreadPoolExecutor(8) as pool:
+        frames = list(pool.map(lambda _: loadata("Attijariwafa"), range(8)))   # one fetch
+    coalescing_stats()      # {'fetches': 1, 'coalesced': 7, 'in_flight': 0}
+"""
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from . import metrics
+
+
+def request_key(link, targets=()):
+    """
+    Normalized request: scheme and host lower-cased, query parameters sorted,
+    so the same endpoint/ISIN/range asked differently shares one fetch.
+    """
+    parts = urlsplit(link)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return (f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}?{query}", tuple(targets))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Flight:
+    """Thread-safe single-flight group"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"fetches": 0, "coalesced": 0}
+
+    def do(self, key, fn, copy=None):
+        """
+        ``fn()``, unless a call with the same ``key`` is running: then wait
+        for its result (its exception is raised the same way). ``copy``
+        gives every waiting caller its own copy of the result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["fetches"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            metrics.count("flight.coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy(call.result) if copy is not None else call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
+
+
+_flight = Flight()
+_config = {"enabled": True}
+
+
+def enable_coalescing():
+    _config["enabled"] = True
+
+
+def disable_coalescing():
+    """Every call fetches on its own"""
+    _config["enabled"] = False
+
+
+def coalesced(key, fn, copy=None):
+    """``Flight.do`` on the shared group, or just ``fn()`` when coalescing is off"""
+    if not _config["enabled"]:
+        return fn()
+    return _flight.do(key, fn, copy)
+
+
+def coalescing_stats():
+    """Upstream fetches, calls served by another caller's fetch, fetches running"""
+    return _flight.info()
@@ -0,0 +1,247 @@
+"""
+Request interception of the browser pages.
+
+The active BrowserProfile decides, for every request a page makes, whether
+it is loaded or aborted. The default "light" profile blocks what the
+scrapers never read (images, media, fonts, stylesheets) and third-party
+hosts (ads, analytics), except for the allowlist of the page's endpoint
+(longest URL prefix): the ASP.NET scripts behind ``__doPostBack``/UpdatePanel
+on the bourseweb pages, the bot-challenge scripts on the medias24 API.
+"full" loads everything. Blocked requests count the size last seen for their
+URL as ``saved_bytes`` (unknown until some profile loaded it once).
+
+    set_browser_profile("full")                  # everything, for every thread
+    with browser_profile(BrowserProfile(block_types=("image",), third_party=False)):
+        getPond()
+    last_load()     # {'profile': 'light', 'requests': 14, 'blocked': 37, 'bytes': 61204, 'saved_bytes': 402311, 'load_ms': 845.2}
+    compare_profiles(POND_LINK)                  # bytes and time saved, per profile
+"""
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from . import metrics
+
+NEVER_NEEDED = ("image", "media", "font", "stylesheet", "texttrack", "manifest")
+
+# Préfixe d'URL de la page (hôte + chemin, sans schéma) -> URLs chargées
+# quel que soit le profil (regex) ; le plus long préfixe s'applique
+ALLOW = {
+    # __doPostBack et Sys.WebForms (UpdatePanel) : WebResource/ScriptResource.axd,
+    # MicrosoftAjax et jQuery depuis les CDN quand EnableCdn est actif
+    "www.casablanca-bourse.com/bourseweb/": (r"/WebResource\.axd", r"/ScriptResource\.axd",
+                                             r"//ajax\.aspnetcdn\.com/", r"//ajax\.googleapis\.com/ajax/libs/jquery/"),
+    # Challenge anti-bot : ses scripts doivent passer pour que le JSON s'affiche
+    "medias24.com/content/api": (r"//challenges\.cloudflare\.com/", r"/cdn-cgi/"),
+}
+
+
+def site(link):
+    """Registrable domain of a URL (its last two labels)"""
+    host = urlsplit(link).hostname or ""
+    return ".".join(host.split(".")[-2:])
+
+
+def endpoint(link):
+    """Host and path of a URL, the form of the ALLOW keys"""
+    parts = urlsplit(link)
+    return (parts.hostname or "") + parts.path
+
+
+# Taille (content-length) vue pour chaque URL, pour chiffrer ce que le blocage économise
+SIZES = OrderedDict()
+MAX_SIZES = 4096
+_sizes_lock = threading.Lock()
+
+
+def remember_size(url, size):
+    with _sizes_lock:
+        SIZES[url] = size
+        SIZES.move_to_end(url)
+        if len(SIZES) > MAX_SIZES:
+            SIZES.popitem(last=False)
+
+
+class BrowserProfile:
+    """
+    Which requests a page may make: ``block_types`` are Playwright resource
+    types, ``third_party`` blocks hosts outside the page's site and
+    ``allow`` maps a page URL prefix (host and path) to the URL patterns
+    always loaded on the pages under it.
+    """
+
+    def __init__(self, name="custom", block_types=NEVER_NEEDED, third_party=True, allow=None):
+        self.name = name
+        self.block_types = frozenset(block_types)
+        self.third_party = third_party
+        allow = ALLOW if allow is None else allow
+        self.allow = {prefix: re.compile("|".join(patterns)) for prefix, patterns in allow.items() if patterns}
+
+    def __repr__(self):
+        return f"BrowserProfile({self.name!r})"
+
+    @property
+    def intercepts(self):
+        return bool(self.block_types) or self.third_party
+
+    def allowed(self, page_link):
+        """Allow pattern of the longest prefix matching ``page_link``, or None"""
+        page = endpoint(page_link)
+        prefixes = [prefix for prefix in self.allow if page.startswith(prefix)]
+        return self.allow[max(prefixes, key=len)] if prefixes else None
+
+    def blocks(self, url, resource_type, page_link):
+        """True when a request of ``resource_type`` to ``url``, made by ``page_link``, is aborted"""
+        allowed = self.allowed(page_link)
+        if allowed is not None and allowed.search(url):
+            return False
+        if resource_type in self.block_types:
+            return True
+        return self.third_party and site(url) != site(page_link)
+
+
+PROFILES = {
+    "full": BrowserProfile("full", block_types=(), third_party=False, allow={}),
+    "light": BrowserProfile("light"),
+}
+
+_profile = {"default": PROFILES["light"]}
+_local = threading.local()
+
+
+def _resolve(profile):
+    if isinstance(profile, BrowserProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown browser profile {profile!r}, expected one of {list(PROFILES)} or a BrowserProfile")
+    return PROFILES[profile]
+
+
+def set_browser_profile(profile):
+    """Profile of every browser page: "light" (default), "full" or a BrowserProfile"""
+    _profile["default"] = _resolve(profile)
+
+
+def current_profile():
+    return getattr(_local, "profile", None) or _profile["default"]
+
+
+@contextmanager
+def browser_profile(profile):
+    """Use ``profile`` for the pages loaded by this thread inside the block"""
+    previous = getattr(_local, "profile", None)
+    _local.profile = _resolve(profile)
+    try:
+        yield _local.profile
+    finally:
+        _local.profile = previous
+
+
+class PageLoad:
+    """Requests of one page since the last report: loaded, blocked, bytes loaded and saved"""
+
+    def __init__(self):
+        self.link = ""
+        self.profile = current_profile()
+        self.routed = False
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+        self.saved_bytes = 0
+
+    def reset(self, link):
+        """A navigation to ``link`` starts, under the current profile"""
+        self.link = link
+        self.profile = current_profile()
+        self.requests = self.blocked = self.bytes = self.saved_bytes = 0
+
+    def decide(self, request):
+        """True when ``request`` is aborted (the main document never is)"""
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            return False
+        if self.profile.blocks(request.url, request.resource_type, self.link):
+            self.blocked += 1
+            self.saved_bytes += SIZES.get(request.url, 0)
+            return True
+        return False
+
+    def response(self, response):
+        self.requests += 1
+        # Taille annoncée : lire le corps coûterait un aller-retour par réponse
+        size = int(response.headers.get("content-length") or 0)
+        self.bytes += size
+        if size:
+            remember_size(response.url, size)
+
+    def report(self, load_ms):
+        """Counts since the last report (then reset), with the load time"""
+        report = {"profile": self.profile.name, "requests": self.requests, "blocked": self.blocked,
+                  "bytes": self.bytes, "saved_bytes": self.saved_bytes, "load_ms": load_ms}
+        self.requests = self.blocked = self.bytes = self.saved_bytes = 0
+        metrics.count("browser.blocked", report["blocked"], profile=report["profile"])
+        metrics.count("browser.bytes", report["bytes"], profile=report["profile"])
+        metrics.count("browser.saved_bytes", report["saved_bytes"], profile=report["profile"])
+        return report
+
+
+_pages = weakref.WeakKeyDictionary()
+
+
+def _state(page):
+    state = _pages.get(page)
+    if state is None:
+        state = _pages[page] = PageLoad()
+        page.on("response", state.response)
+    return state
+
+
+def attach(page, link):
+    """PageLoad of a Playwright page about to load ``link``, its requests routed through the profile"""
+    state = _state(page)
+    state.reset(link)
+    if state.profile.intercepts and not state.routed:
+        page.route("**/*", lambda route: route.abort("blockedbyclient") if state.decide(route.request)
+                   else route.continue_())
+        state.routed = True
+    return state
+
+
+async def attach_async(page, link):
+    """attach for a page of the async API"""
+    state = _state(page)
+    state.reset(link)
+    if state.profile.intercepts and not state.routed:
+        async def handle(route):
+            if state.decide(route.request):
+                await route.abort("blockedbyclient")
+            else:
+                await route.continue_()
+        await page.route("**/*", handle)
+        state.routed = True
+    return state
+
+
+def compare_profiles(link, profiles=("full", "light")):
+    """
+    Load ``link`` once per profile and return, per profile, the requests,
+    blocked requests, bytes loaded and saved by blocking, and load time with
+    the ms saved against the first one. An unmeasured "full" load opens the
+    connections and records every resource size first, so that every
+    profile is measured in the same conditions.
+    """
+    import pandas as pd
+    from .session import browser_page, goto_ready, last_load
+
+    rows = {}
+    with browser_page() as page:
+        with browser_profile("full"):
+            goto_ready(page, link)
+        for profile in profiles:
+            with browser_profile(profile) as used:
+                goto_ready(page, link)
+            rows[used.name] = last_load()
+    data = pd.DataFrame.from_dict(rows, orient="index", columns=["requests", "blocked", "bytes", "saved_bytes", "load_ms"])
+    data["saved_ms"] = data["load_ms"].iloc[0] - data["load_ms"]
+    return data
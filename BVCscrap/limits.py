@@ -0,0 +1,192 @@
+"""
+Per-host pacing and failure handling for medias24 and casablanca-bourse.
+
+Every upstream call goes through ``call(host, fn)`` (``acall`` for
+coroutines): a token bucket paces the requests, retriable failures
+(timeouts, connection errors, HTTP 429/5xx, bot challenges) are retried with
+jittered exponential backoff, and a circuit breaker fails fast while a host
+keeps failing. The bucket is adaptive: its rate is halved on 429/challenge
+and grows back on success.
+
+    configure_host("medias24.com", rate=5, burst=10, retries=4)
+"""
+import time
+import random
+import logging
+import asyncio
+import threading
+from urllib.parse import urlsplit
+import requests
+from . import metrics
+from .errors import UpstreamError, ChallengeError, CircuitOpenError, BROWSER_ERRORS, loaded_errors
+
+log = logging.getLogger(__name__)
+
+RETRIABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket with multiplicative decrease / additive increase"""
+
+    def __init__(self, rate=4.0, burst=8):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; return how long (s) the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class CircuitBreaker:
+    """closed -> open after ``threshold`` consecutive failures -> half-open after ``cooldown`` s"""
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened >= self.cooldown else "open"
+
+    def check(self, host):
+        if self.state == "open":
+            remaining = self.cooldown - (time.monotonic() - self.opened)
+            metrics.count("circuit.open", host=host)
+            raise CircuitOpenError(f"{host} is failing, not retrying for {remaining:.0f}s", host=host)
+
+    def succeeded(self):
+        with self._lock:
+            self.failures = 0
+            self.opened = None
+
+    def failed(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold or self.opened is not None:
+                self.opened = time.monotonic()
+
+
+class HostPolicy:
+    def __init__(self, rate=4.0, burst=8, retries=3, backoff=0.5, max_backoff=20.0, threshold=5, cooldown=30.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(threshold, cooldown)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt):
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+_lock = threading.Lock()
+_defaults = {}
+_hosts = {}
+
+
+def configure_host(host=None, **options):
+    """
+    Set the policy of a host (or the default of all hosts when host is None):
+    rate (req/s), burst, retries, backoff, max_backoff (s), threshold,
+    cooldown (s).
+    """
+    with _lock:
+        if host is None:
+            _defaults.update(options)
+            _hosts.clear()
+        else:
+            _hosts[host] = HostPolicy(**{**_defaults, **options})
+
+
+def policy(host):
+    with _lock:
+        if host not in _hosts:
+            _hosts[host] = HostPolicy(**_defaults)
+        return _hosts[host]
+
+
+def host_of(link):
+    return urlsplit(link).hostname or link
+
+
+def retriable(error):
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, UpstreamError):
+        return isinstance(error, ChallengeError) or error.status in RETRIABLE_STATUS
+    return isinstance(error, (requests.Timeout, requests.ConnectionError, asyncio.TimeoutError,
+                              *loaded_errors(*BROWSER_ERRORS)))
+
+
+def _failed(host, rules, error, attempt):
+    if isinstance(error, ChallengeError) or getattr(error, "status", None) == 429:
+        rules.bucket.throttled()
+    rules.breaker.failed()
+    if attempt < rules.retries:
+        log.warning("%s failed (%s), retry %d/%d", host, error, attempt + 1, rules.retries,
+                    extra={"host": host, "attempt": attempt + 1, "error": repr(error)})
+        metrics.count("retry", host=host)
+
+
+def call(host, fn):
+    """Run ``fn()`` under the pacing, retry and breaker policy of ``host``"""
+    rules = policy(host)
+    for attempt in range(rules.retries + 1):
+        rules.breaker.check(host)
+        time.sleep(rules.bucket.reserve())
+        try:
+            result = fn()
+        except Exception as e:
+            if not retriable(e):
+                raise
+            _failed(host, rules, e, attempt)
+            if attempt == rules.retries:
+                raise
+            time.sleep(rules.delay(attempt))
+        else:
+            rules.bucket.succeeded()
+            rules.breaker.succeeded()
+            return result
+
+
+async def acall(host, fn):
+    """``call`` for a coroutine function ``fn``"""
+    rules = policy(host)
+    for attempt in range(rules.retries + 1):
+        rules.breaker.check(host)
+        await asyncio.sleep(rules.bucket.reserve())
+        try:
+            result = await fn()
+        except Exception as e:
+            if not retriable(e):
+                raise
+            _failed(host, rules, e, attempt)
+            if attempt == rules.retries:
+                raise
+            await asyncio.sleep(rules.delay(attempt))
+        else:
+            rules.bucket.succeeded()
+            rules.breaker.succeeded()
+            return result
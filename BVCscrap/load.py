@@ -1,154 +1,297 @@
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
 import pandas as pd
-import json
 import datetime
-from .utils import *
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .utils import get_data, intradata, produce_data
+from .Notation import get_code
+from . import metrics, Notation
+from .errors import UnknownTickerError, ParseError, wrap
+from .transport import fetch_json_text, with_meta
+from .cache import cache_enabled, read_history, write_history, is_stale, last_close
+from .store import Store, open_store
 
-def loadata(name, start=None, end=None, decode="utf-8"):
+API = "https://medias24.com/content/api?method="
+INDICES = ["MASI", "MSI20"]
+
+# periode des historiques d'indices -> jours couverts (jusqu'à aujourd'hui)
+PERIODS = (("1m", 28), ("3m", 89), ("6m", 180), ("1y", 362), ("3y", 1092), ("5y", 1822), ("10y", None))
+
+# Découpage des longues plages : fréquence pandas du début de chaque fenêtre
+CHUNKS = {"year": "YS", "quarter": "QS"}
+
+# Première séance servie par getPriceHistory
+FIRST_SESSION = "2011-09-18"
+
+def history_range(start=None, end=None):
     """
-    Load Data with Playwright to avoid blocking
+    Bounds of a history request as YYYY-MM-DD: the first session and today
+    stand in for a missing one
     """
+    return (str(pd.Timestamp(start or FIRST_SESSION).date()),
+            str(pd.Timestamp(end or datetime.date.today()).date()))
+
+def index_period(start=None):
+    """Shortest ``periode`` of the index endpoints that reaches back to ``start``"""
+    if not start:
+        return "10y"
+    days = (datetime.date.today() - pd.Timestamp(start).date()).days
+    for period, covered in PERIODS:
+        if covered is None or days <= covered:
+            return period
+
+def canonical_name(name):
+    """Registry name of ``name`` (any case, alias, ISIN or code); unchanged when unknown"""
+    inst = Notation.REGISTRY.get(name)
+    return inst.name if inst is not None else name
+
+def history_link(name, start=None, end=None):
+    """medias24 URL of the daily history of an equity or an index"""
+    name = canonical_name(name)
+    if name == "MASI":
+        return f"{API}getMasiHistory&periode={index_period(start)}&format=json"
+    if name == "MSI20":
+        return f"{API}getIndexHistory&ISIN=msi20&periode={index_period(start)}&format=json"
+    start, end = history_range(start, end)
+    return f"{API}getPriceHistory&ISIN={get_code(name)}&format=json&from={start}&to={end}"
+
+def intraday_link(name):
+    """medias24 URL of the intraday series of an equity or an index"""
+    name = canonical_name(name)
+    if name == "MASI":
+        return f"{API}getMarketIntraday&format=json"
+    if name == "MSI20":
+        return f"{API}getIndexIntraday&ISIN=msi20&format=json"
+    return f"{API}getStockIntraday&ISIN={get_code(name)}&format=json"
+
+def check_name(name):
+    """ISIN of an equity ('' for the indices); UnknownTickerError when unknown"""
+    # Le registre ne tient pas compte de la casse : "masi" est l'indice MASI
     code = get_code(name)
-    if not code and name not in ["MASI", "MSI20"]:
-        raise ValueError(f"Unknown name or missing ISIN for: {name}")
-
-    if name not in ["MASI", "MSI20"]:
-        if not start or not end:
-            start = '2011-09-18'
-            end = str(datetime.datetime.today().date())
-        link = f"https://medias24.com/content/api?method=getPriceHistory&ISIN={code}&format=json&from={start}&to={end}"
-    else:
-        if name == "MASI":
-            link = "https://medias24.com/content/api?method=getMasiHistory&periode=10y&format=json"
-        else:
-            link = "https://medias24.com/content/api?method=getIndexHistory&ISIN=msi20&periode=10y&format=json"
+    if not code and canonical_name(name) not in INDICES:
+        raise UnknownTickerError(f"Unknown name or missing ISIN for: {name}")
+    return code
 
+def history_data(name, json_text, start=None, end=None, decode="utf-8"):
+    """Decode a history payload (indices are trimmed to start/end locally)"""
+    if not json_text.strip().startswith('{'):
+        raise ParseError(f"Bad API response for {name}: Not a valid JSON")
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(link, timeout=60000)
-            
-            # Attendre que le contenu soit chargé
-            page.wait_for_timeout(3000)
-            
-            # Essayer de récupérer le contenu JSON
-            json_text = page.content()
-            
-            # Si c'est une page HTML avec un pre, extraire le texte
-            if '<pre>' in json_text:
-                json_text = page.locator('pre').inner_text(timeout=30000)
-            
-            browser.close()
-            
-            if not json_text.strip().startswith('{'):
-                raise ValueError(f"Bad API response for {name}: Not a valid JSON")
-            
-            data = get_data(json_text, decode)
-            
-            if name in ["MASI", "MSI20"] and start and end:
-                data = produce_data(data, start, end)
-                
-            return data
-            
-    except Exception as e:
-        raise ValueError(f"Error fetching data for {name}: {str(e)}")
+        data = get_data(json_text, decode)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ParseError(f"Bad API response for {name}: {e}") from e
+    if name in INDICES and (start or end):
+        data = produce_data(data, *history_range(start, end))
+    return data
 
-def loadata_patch(name, start=None, end=None, decode="utf-8"):
+def price_history(name, code, start, end, decode="utf-8", transport="auto", chunk=None, workers=4):
     """
-    Patch version with Playwright
+    Fetch getPriceHistory for one ISIN, returns (data, transport_used).
+    With ``chunk`` ("year" or "quarter") the range is fetched window by window.
     """
-    code = get_code(name)
-    
-    # Construire l'URL
-    if name not in ["MASI", "MSI20"]:
-        if not (start and end):
-            start = '2011-09-18'
-            end = str(datetime.date.today())
-        link = f"https://medias24.com/content/api?method=getPriceHistory&ISIN={code}&format=json&from={start}&to={end}"
+    if chunk is not None:
+        return chunked_history(name, start, end, chunk, decode, transport, workers)
+    json_text, used = fetch_json_text(history_link(name, start, end), transport)
+    return history_data(name, json_text, decode=decode), used
+
+def windows(start, end, chunk="year"):
+    """Consecutive (start, end) dates covering start..end, cut at each year or quarter start"""
+    if chunk not in CHUNKS:
+        raise ValueError(f"chunk must be one of {list(CHUNKS)}, got {chunk!r}")
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    if start > end:
+        raise ValueError(f"start {start.date()} is after end {end.date()}")
+    bounds = [start, *(cut for cut in pd.date_range(start, end, freq=CHUNKS[chunk]) if cut > start)]
+    stops = [cut - pd.Timedelta(days=1) for cut in bounds[1:]] + [end]
+    return [(first.date(), last.date()) for first, last in zip(bounds, stops)]
+
+def chunked_history(name, start, end, chunk="year", decode="utf-8", transport="auto", workers=4):
+    """
+    getPriceHistory window by window on ``workers`` threads, merged into one
+    sorted frame trimmed to [start, end]. Each window is a request of its
+    own, retried on its own by the host policy (limits.py): a failure only
+    refetches that window.
+    """
+    bounds = history_range(start, end)
+    spans = windows(*bounds, chunk)
+    metrics.count("history.windows", len(spans), chunk=chunk)
+
+    def fetch(span):
+        json_text, used = fetch_json_text(history_link(name, *map(str, span)), transport)
+        return history_data(name, json_text, decode=decode), used
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(spans)))) as executor:
+        futures = {executor.submit(fetch, span): span for span in spans}
+        results, failed = {}, {}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                failed[futures[future]] = e
+    if failed:
+        (first, last), error = min(failed.items())
+        raise wrap(error, f"{len(failed)} of {len(spans)} windows failed, first {first}..{last}")
+
+    frames = [results[span][0] for span in spans if len(results[span][0])] or [results[spans[0]][0]]
+    with metrics.span("merge", windows=len(spans)):
+        data = pd.concat(frames) if len(frames) > 1 else frames[0]
+        if not data.index.is_unique:
+            data = data[~data.index.duplicated(keep="last")]
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index()
+        # Des fenêtres qui débordent : pas de lignes hors de la plage demandée
+        data = produce_data(data, *bounds)
+    used = sorted({used for _, used in results.values()})
+    return data, used[0] if len(used) == 1 else "+".join(used)
+
+def cached_history(name, code, start=None, end=None, decode="utf-8", transport="auto", chunk=None, workers=4):
+    """
+    Serve the history of an equity from the local cache, fetching only the
+    sessions after the last cached bar when the cache is stale.
+    """
+    data = read_history(code)
+    used = "cache"
+    if data is None or is_stale(code):
+        metrics.count("cache.miss", isin=code)
+        today = datetime.date.today()
+        if data is None or not len(data):
+            since = datetime.date.fromisoformat(FIRST_SESSION)
+        else:
+            since = (data.index.max() + pd.Timedelta(days=1)).date()
+        if since <= today:
+            fresh, used = price_history(name, code, since, today, decode, transport, chunk, workers)
+            data = fresh if data is None else pd.concat([data, fresh])
+            data = data[~data.index.duplicated(keep="last")].sort_index()
+        write_history(code, data, name)
     else:
-        if name == "MASI":
-            link = "https://medias24.com/content/api?method=getMasiHistory&periode=10y&format=json"
+        metrics.count("cache.hit", isin=code)
+    if start or end:
+        data = produce_data(data, *history_range(start, end))
+    return with_meta(data.copy(), transport=used)
+
+def stored_history(name, code, store, start=None, end=None, decode="utf-8", transport="auto", chunk=None,
+                   workers=4):
+    """
+    Serve a history from the memory-mapped store, bringing it up to date
+    first (only the sessions after the last stored bar for equities) when it
+    was last updated before the last session close.
+    """
+    meta = store.meta(name)
+    used = "store"
+    if meta is None or datetime.datetime.fromisoformat(meta["updated"]) < last_close():
+        today = datetime.date.today()
+        fresh = None
+        if name in INDICES:
+            json_text, used = fetch_json_text(history_link(name), transport)
+            fresh = history_data(name, json_text, decode=decode)
         else:
-            link = "https://medias24.com/content/api?method=getIndexHistory&ISIN=msi20&periode=10y&format=json"
+            stored = store.read(name)
+            since = (datetime.date.fromisoformat(FIRST_SESSION) if stored is None or not len(stored)
+                     else (stored.index[-1] + pd.Timedelta(days=1)).date())
+            if since <= today:
+                fresh, used = price_history(name, code, since, today, decode, transport, chunk, workers)
+        store.write(name, fresh if fresh is not None else pd.DataFrame(index=pd.DatetimeIndex([], name="Date")))
+    return with_meta(store.read(name, start, end), transport=used)
+
+def loadata(name, start=None, end=None, decode="utf-8", transport="auto", cache=None, store=None, chunk=None,
+            workers=4):
+    """
+    Load Data: direct HTTP first, Playwright when the API answers with a
+    bot challenge. ``transport`` forces "http" or "browser"; the one used is
+    reported in ``data.attrs["transport"]`` ("cache" when served locally).
+    ``cache`` overrides the global setting of ``enable_cache`` for equities.
+    ``store`` (a Store or its directory) serves the history from the
+    memory-mapped store, as views on the mapped files.
+    ``chunk`` ("year" or "quarter") splits the range of an equity into
+    windows fetched on ``workers`` threads; the indices only request the
+    ``periode`` reaching back to ``start``.
+    """
+    code = check_name(name)
+    name = canonical_name(name)
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(link, timeout=60000)
-            page.wait_for_timeout(3000)
-            
-            json_text = page.content()
-            if '<pre>' in json_text:
-                json_text = page.locator('pre').inner_text(timeout=30000)
-            
-            browser.close()
-
-            # Charger le JSON en DataFrame
-            table = json.loads(json_text.encode().decode(decode))
-            df = pd.DataFrame(table["result"])
-
-            # Renommer selon nombre de colonnes
-            if name in ["MASI", "MSI20"] and df.shape[1] == 2:
-                df.columns = ["Date", "Value"]
-            else:
-                df.columns = ["Date", "Value", "Min", "Max", "Variation", "Volume"]
-
-            # Conversion de la colonne Date
-            if pd.api.types.is_numeric_dtype(df["Date"]):
-                df["Date"] = pd.to_datetime(df["Date"], unit="s", errors="coerce")
-            else:
-                df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-
-            return df.set_index("Date")
-            
+        if store is not None:
+            store = store if isinstance(store, Store) else open_store(store)
+            return stored_history(name, code, store, start, end, decode, transport, chunk, workers)
+
+        if name not in INDICES and (cache_enabled() if cache is None else cache):
+            return cached_history(name, code, start, end, decode, transport, chunk, workers)
+
+        if name not in INDICES and chunk is not None:
+            data, used = chunked_history(name, start, end, chunk, decode, transport, workers)
+            return with_meta(data, transport=used)
+
+        json_text, used = fetch_json_text(history_link(name, start, end), transport)
+        return with_meta(history_data(name, json_text, start, end, decode), transport=used)
+
     except Exception as e:
-        raise ValueError(f"Error in loadata_patch for {name}: {str(e)}")
+        raise wrap(e, f"Error fetching data for {name}") from e
 
-def loadmany(*args, start=None, end=None, feature="Value", decode="utf-8"):
+def loadata_patch(name, start=None, end=None, decode="utf-8", transport="auto"):
     """
-    Load the data of many equities with Playwright
+    Patch version of loadata (typed Date index)
     """
-    if type(args[0]) == list:
-        args = args[0]
-    
-    data = pd.DataFrame(columns=args)
-    for stock in args:
-        value = loadata(stock, start, end, decode)
-        data[stock] = value[feature]
+    try:
+        json_text, used = fetch_json_text(history_link(name, start, end), transport)
+
+        return with_meta(get_data(json_text, decode), transport=used)
+
+    except Exception as e:
+        raise wrap(e, f"Error in loadata_patch for {name}") from e
+
+def assemble(names, series, errors):
+    """One outer-join concat of the loaded columns, errors in attrs"""
+    if not series:
+        raise ValueError(f"Error fetching data for all of {list(names)}: {errors}")
+
+    # Un seul concat (outer join sur les dates) au lieu d'une colonne à la fois
+    loaded = [stock for stock in names if stock in series]
+    data = pd.concat([series[stock] for stock in loaded], axis=1, join="outer")
+    data.columns = loaded
+    data.attrs["errors"] = errors
     return data
 
-def getIntraday(name, decode="utf-8"):
+def load_frames(names, start=None, end=None, decode="utf-8", workers=4, transport="auto", store=None):
+    """loadata of every name on ``workers`` threads: ({name: data}, {name: error message})"""
+    frames = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as executor:
+        futures = {executor.submit(loadata, stock, start, end, decode, transport, store=store): stock for stock in names}
+        for future in as_completed(futures):
+            stock = futures[future]
+            try:
+                frames[stock] = future.result()
+            except Exception as e:
+                errors[stock] = str(e)
+    return frames, errors
+
+def loadmany(*args, start=None, end=None, feature="Value", decode="utf-8", workers=4, transport="auto", store=None):
     """
-    Load intraday data with Playwright
+    Load the data of many equities concurrently (``workers`` threads).
+    A ticker that fails does not stop the batch: its error message is kept in
+    ``data.attrs["errors"]`` and its column is left out. ``store`` is passed
+    to loadata.
     """
-    if name != "MASI" and name != "MSI20":
-        code = get_code(name)
-        link = f"https://medias24.com/content/api?method=getStockIntraday&ISIN={code}&format=json"
-    elif name == "MASI":
-        link = "https://medias24.com/content/api?method=getMarketIntraday&format=json"
-    else:
-        link = "https://medias24.com/content/api?method=getIndexIntraday&ISIN=msi20&format=json"
+    if type(args[0]) == list:
+        args = args[0]
 
+    frames, errors = load_frames(args, start, end, decode, workers, transport, store)
+    series = {}
+    for stock, data in frames.items():
+        try:
+            series[stock] = data[feature]
+        except KeyError as e:
+            errors[stock] = f"No field {e} for {stock}"
+
+    return assemble(args, series, errors)
+
+def getIntraday(name, decode="utf-8", transport="auto"):
+    """
+    Load intraday data (HTTP first, Playwright fallback)
+    """
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(link, timeout=60000)
-            page.wait_for_timeout(3000)
-            
-            json_text = page.content()
-            if '<pre>' in json_text:
-                json_text = page.locator('pre').inner_text(timeout=30000)
-            
-            browser.close()
-            
-            # Utiliser la fonction intradata existante
-            soup = BeautifulSoup(json_text, 'html.parser')
-            data = intradata(soup, decode)
-            return data
-            
+        json_text, used = fetch_json_text(intraday_link(name), transport)
+
+        data = intradata(json_text, decode)
+        return with_meta(data, transport=used)
+
     except Exception as e:
-        raise ValueError(f"Error fetching intraday data for {name}: {str(e)}")
+        raise wrap(e, f"Error fetching intraday data for {name}") from e
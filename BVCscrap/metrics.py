@@ -0,0 +1,202 @@
+"""
+Instrumentation of the fetch pipeline: timing spans per stage and counters.
+
+Stages (span names): ``fetch``, ``http.get``, ``browser.launch``,
+``browser.navigate``, ``browser.postback``, ``browser.extract``,
+``decode.json``, ``decode.frame``, ``parse``. Counters: ``bytes``,
+``retry``, ``fallback``, ``circuit.open``, ``cache.hit``, ``cache.miss``,
+``fixture.replay``.
+
+Nothing is measured until a hook is installed; without hooks ``span()``
+returns a shared no-op and ``count()`` returns at once.
+
+    from BVCscrap import metrics
+
+    with metrics.instrument(metrics.Recorder()) as recorder:
+        loadmany(TICKERS, start="2020-01-01", end="2024-12-31")
+    print(recorder.summary())
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_hooks = ()
+
+
+class Hook:
+    """
+    Base of the instrumentation hooks; override what you need.
+
+    ``start`` returns a token handed back to ``end`` (e.g. a tracer span),
+    ``end`` gets the duration in seconds and the exception raised, if any.
+    """
+
+    def start(self, name, attrs):
+        return None
+
+    def end(self, name, token, seconds, attrs, error):
+        pass
+
+    def count(self, name, value, attrs):
+        pass
+
+
+class Recorder(Hook):
+    """Aggregate spans and counters in memory (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+
+    def end(self, name, token, seconds, attrs, error):
+        with self._lock:
+            calls, total, longest, errors = self.spans.get(name, (0, 0.0, 0.0, 0))
+            self.spans[name] = (calls + 1, total + seconds, max(longest, seconds), errors + (error is not None))
+
+    def count(self, name, value, attrs):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """One row per stage: calls, errors, total/mean/max ms"""
+        import pandas as pd
+        with self._lock:
+            rows = {name: {"calls": calls, "errors": errors, "total_ms": total * 1000,
+                           "mean_ms": total * 1000 / calls, "max_ms": longest * 1000}
+                    for name, (calls, total, longest, errors) in self.spans.items()}
+        columns = ["calls", "errors", "total_ms", "mean_ms", "max_ms"]
+        return pd.DataFrame.from_dict(rows, orient="index", columns=columns).sort_values("total_ms", ascending=False)
+
+
+class LogHook(Hook):
+    """Emit every span and counter as a structured DEBUG record of ``BVCscrap.metrics``"""
+
+    def __init__(self, logger=log, level=logging.DEBUG):
+        self.logger = logger
+        self.level = level
+
+    def end(self, name, token, seconds, attrs, error):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s %.1f ms", name, seconds * 1000,
+                            extra={"span": name, "ms": seconds * 1000, "attrs": attrs,
+                                   "error": None if error is None else repr(error)})
+
+    def count(self, name, value, attrs):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s +%s", name, value, extra={"counter": name, "value": value, "attrs": attrs})
+
+
+class TracerHook(Hook):
+    """
+    Forward spans to an OpenTelemetry-style tracer (anything with
+    ``start_span(name, attributes=...)`` returning a span with
+    ``record_exception`` and ``end``).
+    """
+
+    def __init__(self, tracer, prefix="bvcscrap."):
+        self.tracer = tracer
+        self.prefix = prefix
+
+    def start(self, name, attrs):
+        return self.tracer.start_span(self.prefix + name, attributes=attrs)
+
+    def end(self, name, token, seconds, attrs, error):
+        if attrs:
+            token.set_attributes(attrs)
+        if error is not None:
+            token.record_exception(error)
+        token.end()
+
+
+def add_hook(hook):
+    global _hooks
+    with _lock:
+        _hooks = _hooks + (hook,)
+    return hook
+
+
+def remove_hook(hook):
+    global _hooks
+    with _lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def enabled():
+    return bool(_hooks)
+
+
+@contextmanager
+def instrument(hook):
+    """Install ``hook`` for the duration of the block and yield it"""
+    add_hook(hook)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "hooks", "tokens", "started")
+
+    def __init__(self, name, attrs, hooks):
+        self.name = name
+        self.attrs = attrs
+        self.hooks = hooks
+
+    def set(self, **attrs):
+        """Add attributes known only once the stage ran (sizes, status...)"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.tokens = [hook.start(self.name, self.attrs) for hook in self.hooks]
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, kind, error, tb):
+        seconds = time.perf_counter() - self.started
+        for hook, token in zip(self.hooks, self.tokens):
+            try:
+                hook.end(self.name, token, seconds, self.attrs, error)
+            except Exception:
+                log.exception("instrumentation hook %r failed", hook)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, error, tb):
+        return False
+
+
+_NOSPAN = _NoSpan()
+
+
+def span(name, **attrs):
+    """Context manager timing one stage (a shared no-op when no hook is installed)"""
+    hooks = _hooks
+    if not hooks:
+        return _NOSPAN
+    return _Span(name, attrs, hooks)
+
+
+def count(name, value=1, **attrs):
+    hooks = _hooks
+    if not hooks:
+        return
+    for hook in hooks:
+        try:
+            hook.count(name, value, attrs)
+        except Exception:
+            log.exception("instrumentation hook %r failed", hook)
@@ -0,0 +1,183 @@
+"""
+Multi-ticker, multi-field history in one pass.
+
+``loadpanel`` loads every field (Value, Min, Max, Variation, Volume) of many
+instruments at once and lays them out on one shared sorted date index:
+
+    panel = loadpanel(['BCP', 'Attijariwafa', 'MASI'], start="2020-01-01", end="2024-12-31")
+    panel["BCP"]                      # every field of one ticker
+    panel.xs("Value", axis=1, level="field")   # one field of every ticker
+
+The wide panel is backed by a single column-major float array, so each
+column is one contiguous buffer that ``panel_to_arrow`` hands to pyarrow
+without copying.
+"""
+import numpy as np
+import pandas as pd
+from .utils import HISTORY_COLUMNS
+from .load import load_frames
+
+LAYOUTS = ("wide", "long")
+FILLS = (None, "ffill", "bfill")
+
+
+def shared_index(frames, align="outer"):
+    """
+    Sorted date index of the panel: union ("outer") or intersection
+    ("inner") of the loaded dates, or an explicit calendar.
+    """
+    if not isinstance(align, str):
+        return pd.DatetimeIndex(align, name="Date").unique().sort_values()
+    if align not in ("outer", "inner"):
+        raise ValueError(f"align must be 'outer', 'inner' or a date index, got {align!r}")
+    index = None
+    for data in frames:
+        if index is None:
+            index = data.index
+        elif align == "outer":
+            index = index.union(data.index)
+        else:
+            index = index.intersection(data.index)
+    return pd.DatetimeIndex(index, name="Date").unique().sort_values()
+
+
+def fill_column(column, how, limit=None):
+    """Forward/backward fill of a 1-d float array, in place"""
+    if how == "bfill":
+        fill_column(column[::-1], "ffill", limit)
+        return
+    valid = ~np.isnan(column)
+    positions = np.arange(len(column))
+    last = np.where(valid, positions, -1)
+    np.maximum.accumulate(last, out=last)
+    fill = ~valid & (last >= 0)
+    if limit is not None:
+        fill &= positions - last <= limit
+    column[fill] = column[last[fill]]
+
+
+def build_panel(frames, fields=None, dtype="float64", align="outer", fill=None, limit=None):
+    """
+    Wide panel from {ticker: history}: MultiIndex columns (ticker, field) over
+    one shared date index, every value in a Fortran-ordered ``dtype`` array.
+    """
+    if fill not in FILLS:
+        raise ValueError(f"fill must be one of {FILLS}, got {fill!r}")
+    dtype = np.dtype(dtype)
+    if dtype.kind != "f":
+        raise ValueError(f"dtype must be a float type (missing values are NaN), got {dtype}")
+    tickers = list(frames)
+    if fields is None:
+        present = set().union(*(data.columns for data in frames.values()))
+        fields = [field for field in HISTORY_COLUMNS if field in present]
+    elif isinstance(fields, str):
+        fields = [fields]
+    fields = list(fields)
+    index = shared_index(frames.values(), align)
+
+    values = np.full((len(index), len(tickers) * len(fields)), np.nan, dtype=dtype, order="F")
+    for i, ticker in enumerate(tickers):
+        data = frames[ticker]
+        data = data[~data.index.duplicated(keep="last")]
+        rows = index.get_indexer(data.index)
+        kept = rows >= 0
+        rows = rows[kept]
+        for j, field in enumerate(fields):
+            if field in data.columns:
+                values[rows, i * len(fields) + j] = data[field].to_numpy()[kept]
+    if fill is not None:
+        for k in range(values.shape[1]):
+            fill_column(values[:, k], fill, limit)
+
+    columns = pd.MultiIndex.from_product([tickers, fields], names=["ticker", "field"])
+    return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def to_long(panel):
+    """Tidy layout: one row per (Date, ticker) with a column per field"""
+    tickers = list(panel.columns.get_level_values("ticker").unique())
+    fields = list(panel.columns.get_level_values("field").unique())
+    values = panel.to_numpy()
+    # (date, field, ticker) en ordre Fortran -> (date, ticker, field)
+    cube = values.reshape((len(panel.index), len(fields), len(tickers)), order="F").transpose(0, 2, 1)
+    index = pd.MultiIndex.from_product([panel.index, tickers], names=["Date", "ticker"])
+    data = pd.DataFrame(cube.reshape(-1, len(fields)), index=index, columns=pd.Index(fields, name=None))
+    return data[data.notna().any(axis=1)]
+
+
+def loadpanel(*args, start=None, end=None, fields=None, layout="wide", dtype="float64", align="outer",
+              fill=None, limit=None, decode="utf-8", workers=4, transport="auto"):
+    """
+    Load every field of many instruments in one pass.
+
+    ``layout="wide"`` returns MultiIndex (ticker, field) columns over one
+    shared date index; ``layout="long"`` a tidy frame indexed by
+    (Date, ticker). ``dtype`` is float64 or float32 (half the memory);
+    ``align`` is "outer", "inner" or an explicit calendar (e.g. the MASI
+    sessions); ``fill`` ("ffill"/"bfill", at most ``limit`` rows) fills
+    the gaps of the wide layout. Tickers that fail are left out, their
+    errors kept in ``attrs["errors"]``.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {LAYOUTS}, got {layout!r}")
+    if type(args[0]) == list:
+        args = args[0]
+
+    frames, errors = load_frames(args, start, end, decode, workers, transport)
+    if not frames:
+        raise ValueError(f"Error fetching data for all of {list(args)}: {errors}")
+    frames = {stock: frames[stock] for stock in args if stock in frames}
+    panel = build_panel(frames, fields, dtype, align, fill, limit)
+    if layout == "long":
+        panel = to_long(panel)
+    panel.attrs["errors"] = errors
+    return panel
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow/Parquet export: pip install pyarrow")
+    return pyarrow
+
+
+def panel_to_arrow(panel):
+    """
+    pyarrow Table of a panel. Wide columns are named "ticker/field"; float
+    columns are handed over without copying (NaN stays NaN).
+    """
+    pa = _pyarrow()
+    if isinstance(panel.columns, pd.MultiIndex):
+        names = [f"{ticker}/{field}" for ticker, field in panel.columns]
+        layout = "wide"
+    else:
+        names = [str(name) for name in panel.columns]
+        layout = "long"
+    arrays = [pa.array(panel.index.get_level_values("Date") if layout == "long" else panel.index)]
+    names = ["Date"] + names
+    if layout == "long":
+        arrays.append(pa.array(panel.index.get_level_values("ticker")))
+        names.insert(1, "ticker")
+    values = panel.to_numpy()
+    arrays += [pa.array(values[:, k]) for k in range(values.shape[1])]
+    return pa.Table.from_arrays(arrays, names=names, metadata={"bvcscrap.layout": layout})
+
+
+def panel_to_parquet(panel, path, compression="zstd"):
+    """Write a panel (wide or long) to a Parquet file"""
+    _pyarrow().parquet.write_table(panel_to_arrow(panel), path, compression=compression)
+
+
+def read_panel(path):
+    """Read back a panel written by ``panel_to_parquet``"""
+    table = _pyarrow().parquet.read_table(path)
+    layout = (table.schema.metadata or {}).get(b"bvcscrap.layout", b"wide").decode()
+    data = table.to_pandas()
+    if layout == "long":
+        return data.set_index(["Date", "ticker"])
+    data = data.set_index("Date")
+    data.columns = pd.MultiIndex.from_tuples([tuple(name.rsplit("/", 1)) for name in data.columns],
+                                             names=["ticker", "field"])
+    return data
@@ -0,0 +1,142 @@
+import re
+import numpy as np
+import pandas as pd
+import lxml.html
+
+# Nombres au format français : "1 234,56", "12,5 %", "-0,30%"
+_NUMBER = re.compile(r"^[+-]?\d+(?:\.\d+)?$")
+_DATE = re.compile(r"^\d{2}/\d{2}/\d{4}$")
+_SPACES = dict.fromkeys(map(ord, " \xa0\u202f\u2009"), None)
+
+
+def document(html):
+    """lxml root of a page given as a string, bytes or BeautifulSoup object"""
+    if not isinstance(html, (str, bytes)):
+        html = str(html)
+    return lxml.html.fromstring(html)
+
+
+def clean(text):
+    return " ".join(text.split())
+
+
+def number(text):
+    """French-formatted number -> float (NaN when it is not a number)"""
+    text = text.translate(_SPACES).replace("%", "").replace(",", ".")
+    if _NUMBER.match(text):
+        return float(text)
+    return np.nan
+
+
+def table_rows(table):
+    """Cells text of every row of an lxml table element"""
+    rows = []
+    for tr in table.iter("tr"):
+        cells = [clean(td.text_content()) for td in tr if td.tag in ("td", "th")]
+        if any(cells):
+            rows.append(cells)
+    return rows
+
+
+def leaf_tables(root, match=None):
+    """
+    Tables without nested tables (ASP.NET layouts nest tables for the page
+    grid). ``match`` keeps only tables whose text contains one of the words.
+    """
+    tables = root.xpath("//table[not(.//table)]")
+    if match:
+        words = [w.casefold() for w in ([match] if isinstance(match, str) else match)]
+        tables = [t for t in tables if any(w in t.text_content().casefold() for w in words)]
+    return tables
+
+
+def typed_column(values):
+    """Strings -> float64, datetime64 or string column, whichever fits all values"""
+    present = [v for v in values if v not in ("", "-", "--")]
+    if not present:
+        return pd.Series(np.full(len(values), np.nan))
+    numbers = np.array([number(v) if v not in ("", "-", "--") else np.nan for v in values])
+    if np.isfinite(numbers).sum() == len(present):
+        return pd.Series(numbers)
+    if all(_DATE.match(v) for v in present):
+        return pd.Series(pd.to_datetime(pd.Series(values).replace({"": None, "-": None, "--": None}),
+                                         format="%d/%m/%Y", errors="coerce"))
+    return pd.Series(values, dtype="string")
+
+
+def frame(rows, header=True):
+    """Typed DataFrame from table rows (first row as header)"""
+    if not rows:
+        return pd.DataFrame()
+    width = max(len(r) for r in rows)
+    rows = [r + [""] * (width - len(r)) for r in rows]
+    if header:
+        columns, rows = rows[0], rows[1:]
+        columns = [c or f"col{i}" for i, c in enumerate(columns)]
+    else:
+        columns = [f"col{i}" for i in range(width)]
+    return pd.DataFrame({c: typed_column([r[i] for r in rows]) for i, c in enumerate(columns)})
+
+
+def key_values(tables):
+    """Label/value pairs of 2-column tables -> one-row typed DataFrame"""
+    pairs = {}
+    for table in tables:
+        for row in table_rows(table):
+            cells = [c for c in row if c]
+            for label, value in zip(cells[::2], cells[1::2]):
+                pairs.setdefault(label.rstrip(" :"), value)
+    return pd.DataFrame({label: typed_column([value]) for label, value in pairs.items()})
+
+
+def largest(tables):
+    return max(tables, key=lambda t: len(t.xpath(".//tr")), default=None)
+
+
+def best_table(root, match):
+    table = largest(leaf_tables(root, match))
+    if table is None:
+        table = largest(leaf_tables(root))
+    return frame(table_rows(table)) if table is not None else pd.DataFrame()
+
+
+def indexed(data):
+    """Use the first (label) column as the index"""
+    if data.empty:
+        return data
+    return data.set_index(data.columns[0])
+
+
+# Extracteurs des pages casablanca-bourse (appelés par tech.py)
+def getTables(html):
+    """Séance (Societe-Cote.aspx, LBIndicCle): label/value pairs, one typed row"""
+    root = document(html)
+    tables = [t for t in leaf_tables(root) if all(len(r) in (2, 4) for r in table_rows(t))]
+    return key_values(tables)
+
+
+def getTablesFich(html):
+    """Key indicators (LBFicheTech): indicators x years, float columns"""
+    return indexed(best_table(document(html), ("Chiffre d'affaires", "Résultat net", "Capitaux propres", "PER")))
+
+
+def getDivi(html):
+    """Dividends (LBDividende): one row per detachment"""
+    return best_table(document(html), ("Dividende", "Détachement"))
+
+
+def getAllIndex(html):
+    """Indices summary (Activite-marche.aspx): one row per index"""
+    return indexed(best_table(document(html), ("Indice", "Variation")))
+
+
+def getPondval(html):
+    """Index weights (indice-ponderation.aspx): one row per constituent"""
+    return indexed(best_table(document(html), ("Poids", "Facteur", "Capitalisation")))
+
+
+def getIndiceRecapScrap(html):
+    """Session recap (index.aspx): every data table of the recap panel"""
+    root = document(html)
+    tables = [t for t in leaf_tables(root, ("MASI", "Indice", "Volume")) if len(table_rows(t)) > 1]
+    return [frame(table_rows(t)) for t in tables]
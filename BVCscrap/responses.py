@@ -0,0 +1,273 @@
+"""
+Response cache under the fetchers (``fetch_json_text`` / ``fetch_html``).
+
+Responses are kept in an in-memory LRU bounded in bytes and, optionally,
+in a directory shared by several processes. Each endpoint type has a TTL
+and a stale window:
+
+    intraday       10 s, served stale up to 30 s more
+    history        until the next session close, stale up to one day
+    fundamentals   until the next session close, stale up to one day
+    default        60 s, stale up to 60 s
+
+A fresh entry is returned directly; a stale one is returned at once while
+a background thread refetches it (conditionally, with ``If-None-Match``,
+when the server gave an ETag); past the stale window it is refetched
+before returning.
+
+    enable_response_cache(max_bytes=64 * 2**20, path="/var/cache/bvcscrap")
+    getPond(); getPond()     # the second call does not touch the network
+    response_cache_stats()
+"""
+import os
+import json
+import hashlib
+import time
+import logging
+import threading
+from collections import OrderedDict
+from . import metrics
+from .cache import last_close
+
+log = logging.getLogger(__name__)
+
+# type d'endpoint -> (ttl en s ou "session", fenêtre stale en s)
+POLICIES = {
+    "intraday": (10, 30),
+    "history": ("session", 86400),
+    "fundamentals": ("session", 86400),
+    "default": (60, 60),
+}
+
+_policies = dict(POLICIES)
+
+# Fichiers écrits par ce cache : seuls ceux-là sont effacés par clear()
+PREFIX = "response-"
+
+
+def endpoint(link):
+    """Endpoint type of a URL (key of POLICIES)"""
+    if "Intraday" in link:
+        return "intraday"
+    if "History" in link:
+        return "history"
+    if "casablanca-bourse.com" in link:
+        return "fundamentals"
+    return "default"
+
+
+class Entry:
+    __slots__ = ("body", "fetched", "etag", "meta", "size")
+
+    def __init__(self, body, fetched, etag=None, meta=None):
+        self.body = body
+        self.fetched = fetched
+        self.etag = etag
+        self.meta = meta
+        self.size = len(body) if isinstance(body, str) else sum(map(len, body))
+
+
+class ResponseCache:
+    """Thread-safe LRU of responses bounded by ``max_bytes``, with an optional disk store"""
+
+    def __init__(self, max_bytes=64 * 2 ** 20, path=None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.stats = dict.fromkeys(("hits", "stale", "misses", "revalidated", "disk_hits", "evictions"), 0)
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        digest = hashlib.sha1("\n".join([key[0], *key[1]]).encode()).hexdigest()
+        return os.path.join(self.path, f"{PREFIX}{digest}.json")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.path:
+            try:
+                with open(self._file(key), encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                return None
+            body = saved["body"] if isinstance(saved["body"], str) else tuple(saved["body"])
+            entry = Entry(body, saved["fetched"], saved.get("etag"), saved.get("meta"))
+            self._count("disk_hits")
+            self._insert(key, entry)
+            return entry
+        return None
+
+    def put(self, key, entry):
+        self._insert(key, entry)
+        if self.path:
+            path = self._file(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            body = entry.body if isinstance(entry.body, str) else list(entry.body)
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"url": key[0], "targets": list(key[1]), "body": body, "fetched": entry.fetched,
+                               "etag": entry.etag, "meta": entry.meta}, f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except OSError as e:
+                log.warning("response cache: cannot write %s: %s", path, e)
+
+    def _insert(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats["evictions"] += 1
+
+    def touch(self, key, entry):
+        """A 304: the entry is fresh again"""
+        self.put(key, Entry(entry.body, time.time(), entry.etag, entry.meta))
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+        metrics.count(f"response_cache.{name}")
+
+    def state(self, key, entry, now=None):
+        """"fresh", "stale" (servable while revalidating) or "expired" """
+        now = now or time.time()
+        ttl, stale = _policies[endpoint(key[0])]
+        if ttl == "session":
+            expires = last_close().timestamp()
+            if entry.fetched >= expires:
+                return "fresh"
+            # La fenêtre stale court depuis la clôture qui a rendu l'entrée périmée
+            return "stale" if now - expires <= stale else "expired"
+        age = now - entry.fetched
+        if age <= ttl:
+            return "fresh"
+        return "stale" if age <= ttl + stale else "expired"
+
+    def lookup(self, key, load):
+        """
+        The entry to serve for ``key``, or None on a miss. A stale entry is
+        served while ``load`` refreshes it in the background.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            state = self.state(key, entry)
+            if state == "fresh":
+                self._count("hits")
+                return entry
+            if state == "stale":
+                self._count("stale")
+                self.revalidate(key, entry, load)
+                return entry
+        self._count("misses")
+        return None
+
+    def fetch(self, key, load):
+        """
+        Cached ``load(etag)`` -> (body, etag, meta); ``body`` None means not
+        modified. Returns (body, meta, hit).
+        """
+        entry = self.lookup(key, load)
+        if entry is not None:
+            return entry.body, entry.meta, True
+        body, meta = self.refresh(key, self.get(key), load)
+        return body, meta, False
+
+    def refresh(self, key, entry, load):
+        body, etag, meta = load(entry.etag if entry is not None else None)
+        if body is None and entry is not None:
+            self._count("revalidated")
+            self.touch(key, entry)
+            return entry.body, entry.meta
+        self.put(key, Entry(body, time.time(), etag, meta))
+        return body, meta
+
+    def revalidate(self, key, entry, load):
+        """Refetch in a background thread (once per key at a time)"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(key, entry, load)
+            except Exception as e:
+                log.warning("response cache: revalidation of %s failed: %s", key[0], e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="BVCscrap-revalidate", daemon=True).start()
+
+    def clear(self):
+        """Drop every entry, and the files this cache wrote (not the rest of its directory)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.path:
+            for name in os.listdir(self.path):
+                if name.startswith(PREFIX) and name.endswith((".json", ".tmp")):
+                    try:
+                        os.remove(os.path.join(self.path, name))
+                    except OSError:
+                        pass
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes,
+                        path=self.path)
+
+
+_cache = None
+
+
+def enable_response_cache(max_bytes=64 * 2 ** 20, path=None, ttl=None):
+    """
+    Cache the responses of every fetcher.
+
+    max_bytes  size bound of the in-memory LRU
+    path       optional directory shared by several processes
+    ttl        {endpoint type: ttl or (ttl, stale)} overriding POLICIES;
+               a ttl is in seconds or "session" (until the next close)
+    """
+    global _cache
+    for kind, policy in (ttl or {}).items():
+        if kind not in POLICIES:
+            raise ValueError(f"Unknown endpoint type {kind!r}, expected one of {list(POLICIES)}")
+        _policies[kind] = tuple(policy) if isinstance(policy, (tuple, list)) else (policy, _policies[kind][1])
+    _cache = ResponseCache(max_bytes, path)
+
+
+def disable_response_cache():
+    global _cache
+    _cache = None
+    _policies.clear()
+    _policies.update(POLICIES)
+
+
+def response_cache():
+    """The active ResponseCache, or None"""
+    return _cache
+
+
+def response_cache_stats():
+    """Hits, stale hits, misses, revalidations, evictions, size"""
+    return _cache.info() if _cache is not None else {}
+
+
+def response_cache_clear():
+    if _cache is not None:
+        _cache.clear()
@@ -0,0 +1,277 @@
+import time
+import threading
+import queue
+from contextlib import contextmanager
+from . import metrics, intercept
+
+_active = threading.local()
+
+
+class BrowserPool:
+    """
+    Long-lived headless Chromium shared by all the Playwright fetchers.
+
+    The pool keeps one browser and at most ``size`` idle pages. Fetchers borrow
+    a page with ``pool.page()`` and give it back when done. Playwright's sync
+    API is bound to the thread that started it, so a pool is only used by the
+    thread that activated it; other threads fall back to a one-off browser.
+
+        with BrowserPool(size=2):
+            loadata('Attijariwafa')
+            getCours('BCP')
+    """
+
+    def __init__(self, size=2, headless=True, launch_options=None):
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.size = size
+        self.headless = headless
+        self.launch_options = dict(launch_options or {})
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._idle = queue.LifoQueue()
+        self._thread = None
+        self._previous = None
+
+    @property
+    def is_open(self):
+        return self._browser is not None
+
+    def open(self):
+        """Start Playwright and launch the browser (idempotent)"""
+        if self._browser is None:
+            from playwright.sync_api import sync_playwright
+            with metrics.span("browser.launch", pooled=True):
+                self._playwright = sync_playwright().start()
+                self._browser = self._playwright.chromium.launch(headless=self.headless, **self.launch_options)
+                self._context = self._browser.new_context()
+            self._thread = threading.get_ident()
+        return self
+
+    def close(self):
+        """Close every page, the browser and Playwright"""
+        while not self._idle.empty():
+            try:
+                self._idle.get_nowait().close()
+            except Exception:
+                pass
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            finally:
+                self._browser = None
+                self._context = None
+                self._playwright.stop()
+                self._playwright = None
+        self._thread = None
+        if getattr(_active, "pool", None) is self:
+            _active.pool = self._previous
+        self._previous = None
+
+    def activate(self):
+        """
+        Make this pool the one used transparently by the fetchers of this
+        thread. Chromium is only launched when a page is first borrowed.
+        """
+        if self._thread is None:
+            self._thread = threading.get_ident()
+        if getattr(_active, "pool", None) is not self:
+            self._previous = getattr(_active, "pool", None)
+            _active.pool = self
+        return self
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def page(self):
+        """
+        Borrow a page from the pool. When all ``size`` pages are already
+        borrowed (nested calls), an extra page is opened and closed on return.
+        """
+        self.open()
+        try:
+            page = self._idle.get_nowait()
+        except queue.Empty:
+            page = self._context.new_page()
+        broken = False
+        try:
+            yield page
+        except Exception:
+            broken = True
+            raise
+        finally:
+            if broken or page.is_closed() or self._idle.qsize() >= self.size:
+                # Ne pas remettre une page dans un état inconnu dans le pool
+                try:
+                    page.close()
+                except Exception:
+                    pass
+            else:
+                self._idle.put(page)
+
+
+def current_pool():
+    """Return the pool active in this thread, or None"""
+    pool = getattr(_active, "pool", None)
+    if pool is not None and pool._thread == threading.get_ident():
+        return pool
+    return None
+
+
+@contextmanager
+def browser_page():
+    """
+    Yield a Playwright page: borrowed from the active pool if there is one,
+    otherwise from a throw-away browser like before.
+    """
+    pool = current_pool()
+    if pool is not None:
+        with pool.page() as page:
+            yield page
+        return
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        with metrics.span("browser.launch", pooled=False):
+            browser = p.chromium.launch(headless=True)
+        try:
+            yield browser.new_page()
+        finally:
+            browser.close()
+
+
+# Attente événementielle au lieu de wait_for_timeout fixes
+_ready = {"timeout": 30000}
+
+POSTBACK_READY_JS = "() => typeof __doPostBack === 'function'"
+# Postback partiel (UpdatePanel) : attendre que le DOM soit mis à jour
+UPDATE_PANEL_IDLE_JS = """() => !(window.Sys && Sys.WebForms && Sys.WebForms.PageRequestManager
+    && Sys.WebForms.PageRequestManager.getInstance().get_isInAsyncPostBack())"""
+JSON_READY_JS = "() => document.body && document.body.innerText.trim().length > 0"
+# Appel d'un postback ASP.NET depuis la page, arguments [target, argument]
+POSTBACK_JS = "([t, a]) => __doPostBack(t, a)"
+# Le document lui-même a toujours au moins une minute pour arriver
+NAVIGATION_TIMEOUT = 60000
+
+
+def set_ready_timeout(ms):
+    """Upper bound (ms) of every readiness wait"""
+    _ready["timeout"] = int(ms)
+
+
+def ready_timeout():
+    return _ready["timeout"]
+
+
+def last_wait_ms():
+    """Time (ms) the last fetch of this thread spent waiting for the page"""
+    return getattr(_active, "wait_ms", None)
+
+
+def last_load():
+    """
+    Requests loaded and blocked, bytes and load time (ms) of the last fetch
+    of this thread (postbacks on the same page included)
+    """
+    return getattr(_active, "load", None)
+
+
+def navigation_timeout(timeout):
+    """Timeout (ms) of ``page.goto`` when the readiness waits are bounded by ``timeout``"""
+    return max(timeout, NAVIGATION_TIMEOUT)
+
+
+def is_postback_response(response):
+    """The POST response of an UpdatePanel postback"""
+    return response.request.method == "POST"
+
+
+def elapsed_ms(started):
+    return (time.perf_counter() - started) * 1000
+
+
+def _record(started, add=False):
+    elapsed = elapsed_ms(started)
+    previous = getattr(_active, "wait_ms", None) if add else None
+    _active.wait_ms = elapsed + (previous or 0)
+    return elapsed
+
+
+def _report(state, span, elapsed, add=False):
+    report = state.report(elapsed)
+    span.set(profile=report["profile"], blocked=report["blocked"], bytes=report["bytes"],
+             saved_bytes=report["saved_bytes"])
+    previous = getattr(_active, "load", None) if add else None
+    if previous is not None:
+        report = {key: value if key == "profile" else previous[key] + value for key, value in report.items()}
+    _active.load = report
+
+
+def goto_ready(page, link, selector=None, postback=False, timeout=None):
+    """
+    Navigate and return as soon as the page is usable: ``selector`` attached,
+    ``__doPostBack`` defined (postback=True), or network idle otherwise.
+    Returns the measured wait in ms, never more than the timeout bound.
+    """
+    # Playwright n'est importé qu'au premier navigateur lancé
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+    timeout = timeout or _ready["timeout"]
+    started = time.perf_counter()
+    state = intercept.attach(page, link)
+    with metrics.span("browser.navigate", link=link) as span:
+        page.goto(link, wait_until="domcontentloaded", timeout=navigation_timeout(timeout))
+        if selector:
+            page.wait_for_selector(selector, state="attached", timeout=timeout)
+        elif postback:
+            page.wait_for_function(POSTBACK_READY_JS, timeout=timeout)
+        else:
+            try:
+                page.wait_for_load_state("networkidle", timeout=timeout)
+            except PlaywrightTimeoutError:
+                # Pages avec pubs/analytics : le DOM est là, on continue
+                pass
+        elapsed = _record(started)
+        _report(state, span, elapsed)
+    return elapsed
+
+
+def postback(page, target, argument="", selector=None, navigation=False, timeout=None):
+    """
+    Fire an ASP.NET ``__doPostBack`` and wait for its result: the new
+    document for a full postback (``navigation=True``), otherwise the POST
+    response and the UpdatePanel refresh. Returns the measured wait in ms.
+    """
+    timeout = timeout or _ready["timeout"]
+    started = time.perf_counter()
+    state = intercept.attach(page, page.url)
+    with metrics.span("browser.postback", target=target, navigation=navigation) as span:
+        if navigation:
+            # La réponse POST arrive avant le nouveau document : attendre la navigation
+            with page.expect_navigation(wait_until="domcontentloaded", timeout=timeout):
+                page.evaluate(POSTBACK_JS, [target, argument])
+        else:
+            with page.expect_response(is_postback_response, timeout=timeout):
+                page.evaluate(POSTBACK_JS, [target, argument])
+            page.wait_for_function(UPDATE_PANEL_IDLE_JS, timeout=timeout)
+        if selector:
+            page.wait_for_selector(selector, state="attached", timeout=timeout)
+        elapsed = _record(started, add=True)
+        _report(state, span, elapsed, add=True)
+    return elapsed
+
+
+def json_ready(page, link, timeout=None):
+    """Navigate to a JSON endpoint and wait until its text is rendered"""
+    timeout = timeout or _ready["timeout"]
+    started = time.perf_counter()
+    state = intercept.attach(page, link)
+    with metrics.span("browser.navigate", link=link) as span:
+        page.goto(link, wait_until="domcontentloaded", timeout=navigation_timeout(timeout))
+        page.wait_for_function(JSON_READY_JS, timeout=timeout)
+        elapsed = _record(started)
+        _report(state, span, elapsed)
+    return elapsed
@@ -0,0 +1,227 @@
+"""
+Memory-mapped local store of daily histories.
+
+One directory per instrument (ISIN, or the index name for MASI/MSI20)
+holds fixed-width binary columns: ``Date.<version>.i8`` (int64
+nanoseconds, sorted) and one ``<field>.<version>.f8`` float64 file per
+field (Value, Min, Max, Variation, Volume). ``meta.json`` names the current version of the files; a write
+creates a new version and switches ``meta.json`` atomically, so readers
+never see a partial update and processes can share the files read-only.
+Writers of the same instrument take turns on a ``.lock`` file.
+
+Reads map the files (``numpy.memmap``), locate the date range by binary
+search and return a DataFrame whose columns are views on the mapping: no
+copy, and the pages are shared by every process reading the store.
+
+    store = open_store("~/bvc-store")
+    data = loadata("BCP", start="2020-01-01", end="2024-12-31", store=store)
+    data = store.read("BCP", "2023-01-01", "2023-06-30")
+"""
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from . import Notation
+
+DATE = "Date"
+LOCK = ".lock"
+# Un verrou plus vieux que ça vient d'un writer mort : il est repris
+LOCK_STALE = 120.0
+
+
+def instrument_key(name):
+    """Directory of an instrument: its ISIN, or its registry name for the indices"""
+    inst = Notation.REGISTRY.get(name)
+    return (inst.ISIN or inst.name) if inst is not None else name
+
+
+@contextmanager
+def locked(folder, timeout=60.0):
+    """
+    Exclusive lock of an instrument directory across threads and processes
+    (an O_EXCL lock file); TimeoutError after ``timeout`` seconds.
+    """
+    path = os.path.join(folder, LOCK)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime > LOCK_STALE:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{folder} is locked by another writer ({path})")
+            time.sleep(0.01)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Store:
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        os.makedirs(self.path, exist_ok=True)
+        self._maps = {}
+        self._metas = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, name):
+        return os.path.join(self.path, instrument_key(name))
+
+    def meta(self, name):
+        """Metadata of an instrument (name, version, rows, columns, updated) or None"""
+        path = os.path.join(self._dir(name), "meta.json")
+        try:
+            stamp = os.stat(path).st_mtime_ns
+            cached = self._metas.get(path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            with open(path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._metas[path] = (stamp, meta)
+        return meta
+
+    def __contains__(self, name):
+        return self.meta(name) is not None
+
+    def _columns(self, name, meta):
+        """{column: memmap} of the current version, mapped once per version"""
+        key = (instrument_key(name), meta["version"])
+        with self._lock:
+            maps = self._maps.get(key)
+        if maps is None or len(maps[DATE]) != meta["rows"]:
+            folder = self._dir(name)
+            maps = {}
+            for column in [DATE, *meta["columns"]]:
+                dtype = np.int64 if column == DATE else np.float64
+                path = os.path.join(folder, self._file(column, meta["version"]))
+                maps[column] = (np.memmap(path, dtype=dtype, mode="r", shape=(meta["rows"],))
+                                if meta["rows"] else np.empty(0, dtype=dtype))
+            with self._lock:
+                # Les versions précédentes de cet instrument ne servent plus
+                for old in [k for k in self._maps if k[0] == key[0]]:
+                    del self._maps[old]
+                self._maps[key] = maps
+        return maps
+
+    @staticmethod
+    def _file(column, version):
+        return f"{column}.{version}.{'i8' if column == DATE else 'f8'}"
+
+    def read(self, name, start=None, end=None):
+        """
+        History of ``name`` between start and end (inclusive), columns as
+        read-only views on the mapped files. None when it is not stored.
+        """
+        for attempt in range(3):
+            meta = self.meta(name)
+            if meta is None:
+                return None
+            try:
+                maps = self._columns(name, meta)
+                break
+            except FileNotFoundError:
+                # Une écriture concurrente vient de publier une autre version
+                if attempt == 2:
+                    raise
+        dates = maps[DATE]
+        lo = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).normalize().value, "left"))
+        hi = len(dates) if end is None else int(np.searchsorted(
+            dates, (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).value, "left"))
+        index = pd.DatetimeIndex(np.asarray(dates[lo:hi]).view("M8[ns]"), name="Date", copy=False)
+        columns = {column: np.asarray(maps[column][lo:hi]) for column in meta["columns"]}
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def write(self, name, data):
+        """
+        Merge ``data`` (DatetimeIndex, float columns) into the stored history
+        and publish it as a new version.
+        """
+        folder = self._dir(name)
+        os.makedirs(folder, exist_ok=True)
+        # Lecture, publication et purge sous le verrou : pas de mise à jour perdue
+        with locked(folder):
+            return self._write(name, folder, data)
+
+    def _write(self, name, folder, data):
+        old = self.read(name)
+        if old is not None and len(old):
+            data = pd.concat([old, data])
+            data = data[~data.index.duplicated(keep="last")]
+        data = data.sort_index()
+        previous = self.meta(name)
+        # Versions strictement croissantes, même si l'horloge recule
+        version = max(time.time_ns(), previous["version"] + 1 if previous else 0)
+        columns = [str(c) for c in data.columns]
+        arrays = {DATE: pd.DatetimeIndex(data.index).as_unit("ns").asi8.astype(np.int64)}
+        arrays.update((str(c), data[c].to_numpy(np.float64)) for c in data.columns)
+        for column, values in arrays.items():
+            np.ascontiguousarray(values).tofile(os.path.join(folder, self._file(column, version)))
+        meta = {"name": name, "version": version, "rows": len(data), "columns": columns,
+                "updated": datetime.datetime.now().isoformat(timespec="seconds")}
+        tmp = os.path.join(folder, f"meta.json.{version}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(folder, "meta.json"))
+        self._prune(folder, version)
+        return meta
+
+    @staticmethod
+    def _prune(folder, version):
+        """
+        Remove the files of the versions older than ``version``, the one just
+        published (still open mappings stay valid); newer ones are kept.
+        """
+        for file in os.listdir(folder):
+            parts = file.split(".")
+            if len(parts) != 3 or parts[0] == "meta" or not parts[1].isdigit():
+                continue
+            if int(parts[1]) < version:
+                try:
+                    os.remove(os.path.join(folder, file))
+                except OSError:
+                    pass
+
+    def info(self):
+        """One row per stored instrument: name, rows, first/last date, updated"""
+        rows = []
+        for key in sorted(os.listdir(self.path)):
+            try:
+                with open(os.path.join(self.path, key, "meta.json"), encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            dates = self._columns(meta["name"], meta)[DATE]
+            rows.append({"key": key, "name": meta["name"], "rows": meta["rows"],
+                         "first": pd.Timestamp(dates[0]) if len(dates) else None,
+                         "last": pd.Timestamp(dates[-1]) if len(dates) else None,
+                         "updated": meta["updated"]})
+        return pd.DataFrame(rows, columns=["key", "name", "rows", "first", "last", "updated"])
+
+
+_stores = {}
+
+
+def open_store(path):
+    """The Store of a directory (one instance per path and process)"""
+    path = os.path.abspath(os.path.expanduser(path))
+    if path not in _stores:
+        _stores[path] = Store(path)
+    return _stores[path]
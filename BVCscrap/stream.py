@@ -0,0 +1,113 @@
+import time
+import logging
+from collections import deque
+from contextlib import ExitStack
+import pandas as pd
+from .load import intraday_link
+from .utils import intradata
+from .session import BrowserPool, current_pool
+from .transport import fetch_json_text, replaying
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+
+class IntradayStream:
+    """
+    Poll the intraday series of several instruments (equities, MASI, MSI20)
+    and keep only what is new.
+
+    Each poll yields ``(name, ticks)`` for every instrument with new ticks,
+    ``ticks`` being a DataFrame of the bars not seen before (a bar whose value
+    changed since the last poll is yielded again, an identical one is not).
+    The last ``maxlen`` ticks of each instrument stay available in a ring
+    buffer through ``buffer(name)``. An instrument whose fetch fails is
+    logged and skipped for that poll (its error kept in ``errors``); the
+    others keep streaming.
+
+        for name, ticks in stream_intraday(['MASI', 'BCP'], interval=5):
+            print(name, ticks)
+    """
+
+    def __init__(self, names, interval=5.0, maxlen=5000, transport="auto", decode="utf-8", max_polls=None):
+        if isinstance(names, str):
+            names = [names]
+        self.names = list(names)
+        self.interval = interval
+        self.transport = transport
+        self.decode = decode
+        self.max_polls = max_polls
+        self.polls = 0
+        self._buffers = {name: deque(maxlen=maxlen) for name in self.names}
+        self._last = dict.fromkeys(self.names)
+        self.errors = {}
+
+    def update(self, name, data):
+        """Keep the ticks of ``data`` not seen yet for ``name`` and return them"""
+        data = data[~data.index.duplicated(keep="last")]
+        last = self._last[name]
+        if last is not None and len(data) and data.index.max() < last[0]:
+            # Nouvelle séance : les labels repartent du début
+            last = None
+        if last is None:
+            new = data
+        else:
+            label, value = last
+            # NaN == NaN : une barre sans valeur n'est pas "modifiée" à chaque poll
+            values = data["Value"]
+            same = (values == value) | (values.isna() & pd.isna(value))
+            new = data[(data.index > label) | ((data.index == label) & ~same)]
+        if len(new):
+            buffer = self._buffers[name]
+            for tick in new.itertuples():
+                if buffer and buffer[-1][0] == tick.Index:
+                    buffer.pop()
+                buffer.append((tick.Index, tick.Value))
+            self._last[name] = (new.index[-1], new["Value"].iloc[-1])
+        return new
+
+    def fetch(self, name):
+        json_text, _ = fetch_json_text(intraday_link(name), self.transport)
+        return intradata(json_text, self.decode)
+
+    def poll(self):
+        """One round over every instrument: {name: new ticks} (non-empty only)"""
+        self.polls += 1
+        updates = {}
+        for name in self.names:
+            try:
+                new = self.update(name, self.fetch(name))
+            except Exception as e:
+                self.errors[name] = e
+                log.warning("stream: %s failed, skipped this poll: %s", name, e,
+                            extra={"instrument": name, "error": repr(e)})
+                metrics.count("stream.error", instrument=name)
+                continue
+            self.errors.pop(name, None)
+            if len(new):
+                updates[name] = new
+        return updates
+
+    def buffer(self, name):
+        """Ring buffer of the last ticks of an instrument as a DataFrame"""
+        ticks = list(self._buffers[name])
+        return pd.DataFrame([value for _, value in ticks], index=[label for label, _ in ticks], columns=["Value"])
+
+    def done(self):
+        return self.max_polls is not None and self.polls >= self.max_polls
+
+    def __iter__(self):
+        with ExitStack() as stack:
+            # Une seule session navigateur (si le fallback Playwright sert) pour tout le flux
+            if current_pool() is None and not replaying():
+                stack.enter_context(BrowserPool(size=1))
+            while not self.done():
+                started = time.monotonic()
+                yield from self.poll().items()
+                if not self.done():
+                    time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+def stream_intraday(names, interval=5.0, maxlen=5000, transport="auto", decode="utf-8", max_polls=None):
+    """Iterable of (name, new ticks) polled every ``interval`` seconds, see IntradayStream"""
+    return IntradayStream(names, interval, maxlen, transport, decode, max_polls)
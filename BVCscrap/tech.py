@@ -1,184 +1,233 @@
-from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
-from .utils import *
+import pandas as pd
+from collections import namedtuple
+from contextlib import ExitStack
+from .Notation import get_valeur
+from .parse import getTables, getTablesFich, getDivi, getAllIndex, getPondval, getIndiceRecapScrap
+from .session import BrowserPool, current_pool
+from . import metrics, Notation
+from .errors import UnknownTickerError, wrap
+from .transport import fetch_html, replaying, with_meta
+
+COMPANY_LINK = "https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={code}&cat=7"
+
+# section -> (__EVENTTARGET du postback, extracteur) ; ces LinkButtons font
+# un postback complet (nouveau document), pas une mise à jour d'UpdatePanel
+COMPANY_SECTIONS = {
+    "cours": ("SocieteCotee1$LBIndicCle", getTables),
+    "indicators": ("SocieteCotee1$LBFicheTech", getTablesFich),
+    "dividends": ("SocieteCotee1$LBDividende", getDivi),
+}
+
+INDEX_LINK = "https://www.casablanca-bourse.com/bourseweb/Activite-marche.aspx?Cat=22&IdLink=297"
+POND_LINK = "https://www.casablanca-bourse.com/bourseweb/indice-ponderation.aspx?Cat=22&IdLink=298"
+RECAP_LINK = "https://www.casablanca-bourse.com/bourseweb/index.aspx"
+RECAP_TARGET = "FrontTabContainer1$ctl00$ImageButton1"
+
+# Colonnes du snapshot marché, dans l'ordre
+MARKET_COLUMNS = ["Name", "Cours", "Variation %", "Volume", "Capitalisation", "Capitalisation flottante", "Poids %"]
+
+CompanySnapshot = namedtuple("CompanySnapshot", ["name", "cours", "indicators", "dividends", "wait_ms", "error"])
+
+def company_link(name):
+    code = get_valeur(name)
+    if not code:
+        raise UnknownTickerError(f"Unknown name or missing code valeur for: {name}")
+    return COMPANY_LINK.format(code=code)
+
+def section_targets(sections):
+    """Validated section names and their postback targets"""
+    if isinstance(sections, str):
+        sections = (sections,)
+    unknown = set(sections) - set(COMPANY_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown sections {sorted(unknown)}, expected some of {list(COMPANY_SECTIONS)}")
+    return tuple(sections), [COMPANY_SECTIONS[s][0] for s in sections]
+
+def extract(extractor, content):
+    """Run a parse.py extractor on a page, timed as a ``parse`` span"""
+    with metrics.span("parse", extractor=extractor.__name__):
+        return extractor(content)
+
+def build_snapshot(name, sections, contents, waited):
+    """CompanySnapshot from the HTML returned after each section postback"""
+    result = dict.fromkeys(COMPANY_SECTIONS)
+    for section, content in zip(sections, contents):
+        result[section] = with_meta(extract(COMPANY_SECTIONS[section][1], content), wait_ms=waited)
+    return CompanySnapshot(name=name, wait_ms=waited, error=None, **result)
+
+def company_snapshot(name, sections):
+    """
+    Load the company page once and fire each section postback in turn on
+    the same page.
+    """
+    sections, targets = section_targets(sections)
+    contents, waited = fetch_html(company_link(name), targets, navigation=True)
+    return build_snapshot(name, sections, contents, waited)
+
+def getCompanySnapshot(name, sections=("cours", "indicators", "dividends")):
+    """
+    Load cours, key indicators and dividends of a company in one page visit
+    """
+    try:
+        return company_snapshot(name, sections)
+    except Exception as e:
+        raise wrap(e, f"Error fetching snapshot for {name}") from e
+
+def getCompanySnapshots(names, sections=("cours", "indicators", "dividends")):
+    """
+    Snapshots of many companies, all through one browser. A company that
+    fails gets a snapshot with empty sections and its error message.
+    """
+    if isinstance(names, str):
+        names = [names]
+    with ExitStack() as stack:
+        if current_pool() is None and not replaying():
+            stack.enter_context(BrowserPool(size=1))
+        snapshots = {}
+        for name in names:
+            try:
+                snapshots[name] = getCompanySnapshot(name, sections)
+            except Exception as e:
+                snapshots[name] = CompanySnapshot(name, None, None, None, None, str(e))
+    return snapshots
 
 def getCours(name):
     """
     Load session data with Playwright
     """
-    code = get_valeur(name)
-    data = {"__EVENTTARGET": "SocieteCotee1$LBIndicCle"}
-    
-    link = f"https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={code}&cat=7"
-    
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            # Faire la requête POST avec les données
-            page.goto(link)
-            page.wait_for_timeout(2000)
-            
-            # Simuler le clic sur le bouton/liens qui déclenche l'événement
-            page.evaluate("""() => {
-                __doPostBack('SocieteCotee1$LBIndicCle', '');
-            }""")
-            
-            page.wait_for_timeout(3000)
-            
-            content = page.content()
-            browser.close()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            result = getTables(soup)
-            return result
-            
+        return company_snapshot(name, "cours").cours
     except Exception as e:
-        raise ValueError(f"Error fetching cours data for {name}: {str(e)}")
+        raise wrap(e, f"Error fetching cours data for {name}") from e
 
 def getKeyIndicators(name, decode='utf-8'):
     """
     Load key indicators with Playwright
     """
-    code = get_valeur(name)
-    data = {"__EVENTTARGET": "SocieteCotee1$LBFicheTech"}
-    
-    link = f"https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={code}&cat=7"
-    
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            page.goto(link)
-            page.wait_for_timeout(2000)
-            
-            page.evaluate("""() => {
-                __doPostBack('SocieteCotee1$LBFicheTech', '');
-            }""")
-            
-            page.wait_for_timeout(3000)
-            
-            content = page.content()
-            browser.close()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            result = getTablesFich(soup)
-            return result
-            
+        return company_snapshot(name, "indicators").indicators
     except Exception as e:
-        raise ValueError(f"Error fetching key indicators for {name}: {str(e)}")
+        raise wrap(e, f"Error fetching key indicators for {name}") from e
 
 def getDividend(name, decode='utf-8'):
     """
     Load dividends with Playwright
     """
-    code = get_valeur(name)
-    data = {"__EVENTTARGET": "SocieteCotee1$LBDividende"}
-    
-    link = f"https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={code}&cat=7"
-    
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            page.goto(link)
-            page.wait_for_timeout(2000)
-            
-            page.evaluate("""() => {
-                __doPostBack('SocieteCotee1$LBDividende', '');
-            }""")
-            
-            page.wait_for_timeout(3000)
-            
-            content = page.content()
-            browser.close()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            result = getDivi(soup)
-            return result
-            
+        return company_snapshot(name, "dividends").dividends
     except Exception as e:
-        raise ValueError(f"Error fetching dividends for {name}: {str(e)}")
+        raise wrap(e, f"Error fetching dividends for {name}") from e
 
 def getIndex():
     """
     Load indexes summary with Playwright
     """
-    link = "https://www.casablanca-bourse.com/bourseweb/Activite-marche.aspx?Cat=22&IdLink=297"
-    
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            page.goto(link, timeout=60000)
-            page.wait_for_timeout(3000)
-            
-            content = page.content()
-            browser.close()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            result = getAllIndex(soup)
-            return result
+        (content,), waited = fetch_html(INDEX_LINK)
+
+        return with_meta(extract(getAllIndex, content), wait_ms=waited)
             
     except Exception as e:
-        raise ValueError(f"Error fetching index data: {str(e)}")
+        raise wrap(e, "Error fetching index data") from e
 
 def getPond():
     """
     Load weights with Playwright
     """
-    link = "https://www.casablanca-bourse.com/bourseweb/indice-ponderation.aspx?Cat=22&IdLink=298"
-    
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            page.goto(link, timeout=60000)
-            page.wait_for_timeout(3000)
-            
-            content = page.content()
-            browser.close()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            return getPondval(soup)
+        (content,), waited = fetch_html(POND_LINK)
+
+        return with_meta(extract(getPondval, content), wait_ms=waited)
             
     except Exception as e:
-        raise ValueError(f"Error fetching ponderation data: {str(e)}")
+        raise wrap(e, "Error fetching ponderation data") from e
 
 def getIndexRecap():
     """
     Load session recap with Playwright
     """
-    data = {"TopControl1$ScriptManager1": "FrontTabContainer1$ctl00$UpdatePanel1|FrontTabContainer1$ctl00$ImageButton1"}
-    link = "https://www.casablanca-bourse.com/bourseweb/index.aspx"
-    
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            # Pour les requêtes POST complexes, on peut utiliser l'API route
-            page.goto(link)
-            page.wait_for_timeout(3000)
-            
-            # Simuler la soumission du formulaire
-            page.evaluate("""() => {
-                // Simuler l'action du ScriptManager
-                __doPostBack('FrontTabContainer1$ctl00$ImageButton1', '');
-            }""")
-            
-            page.wait_for_timeout(3000)
-            
-            content = page.content()
-            browser.close()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            return getIndiceRecapScrap(soup)
+        # Simuler l'action du ScriptManager (réponse partielle UpdatePanel)
+        (content,), waited = fetch_html(RECAP_LINK, [RECAP_TARGET])
+
+        return with_meta(extract(getIndiceRecapScrap, content), wait_ms=waited)
             
     except Exception as e:
-        raise ValueError(f"Error fetching index recap: {str(e)}")
+        raise wrap(e, "Error fetching index recap") from e
+
+def find_column(data, *keywords):
+    """First column whose header contains every keyword (case-insensitive), or None"""
+    for column in data.columns:
+        label = str(column).casefold()
+        if all(keyword in label for keyword in keywords):
+            return column
+    return None
+
+def by_isin(data, label, columns):
+    """
+    Rows of a market table re-keyed by ISIN: {output column: page column}.
+    Returns the frame and the labels that matched no instrument.
+    """
+    labels = data.index if label is None else data[label]
+    picked = {name: data[column].to_numpy() for name, column in columns.items() if column is not None}
+    frame = pd.DataFrame(picked, index=pd.Index(labels, name="Instrument"))
+    isins = [getattr(Notation.REGISTRY.match(str(text)), "ISIN", None) or None for text in frame.index]
+    unmatched = [str(text) for text, isin in zip(frame.index, isins) if isin is None]
+    frame.index = pd.Index(isins, name="ISIN")
+    frame = frame[frame.index.notna()]
+    return frame[~frame.index.duplicated(keep="first")], unmatched
+
+def build_market(pond, recap):
+    """
+    Merge the weighting table and the recap quotes into one frame per ISIN:
+    last price, variation, volume, capitalisation (shares x price), floating
+    capitalisation and index weight.
+    """
+    frames, unmatched = [], []
+    for table in recap:
+        label = find_column(table, "instrument") or find_column(table, "valeur", "libell")
+        price = find_column(table, "cours")
+        if label is None or price is None:
+            continue
+        frame, missing = by_isin(table, label, {"Cours": price, "Variation %": find_column(table, "variation"),
+                                                "Volume": find_column(table, "volume")})
+        frames.append(frame)
+        unmatched += missing
+    quotes = pd.concat(frames) if frames else pd.DataFrame(columns=["Cours"], index=pd.Index([], name="ISIN"))
+    quotes = quotes[~quotes.index.duplicated(keep="first")]
+
+    weights, missing = by_isin(pond, None, {"Cours pond": find_column(pond, "cours"),
+                                            "Titres": find_column(pond, "nombre", "titres"),
+                                            "Capitalisation flottante": find_column(pond, "capitalisation"),
+                                            "Poids %": find_column(pond, "poids")})
+    unmatched += missing
+
+    data = quotes.join(weights, how="outer")
+    if "Cours pond" in data:
+        data["Cours"] = data["Cours"].fillna(data["Cours pond"]) if "Cours" in data else data["Cours pond"]
+    if "Titres" in data:
+        data["Capitalisation"] = data["Titres"] * data["Cours"]
+    names = {inst.ISIN: inst.name for inst in Notation.REGISTRY if inst.ISIN}
+    data["Name"] = [names.get(isin) for isin in data.index]
+    data = data.reindex(columns=MARKET_COLUMNS)
+    order = [isin for isin in names if isin in data.index]
+    data = data.loc[order]
+    data.attrs["unmatched"] = sorted(set(unmatched))
+    return data
+
+def getMarketSnapshot():
+    """
+    End-of-day snapshot of every listed instrument from the two market-wide
+    pages (weighting and session recap), indexed by ISIN. Labels of the
+    pages that match no known instrument are listed in attrs["unmatched"].
+    """
+    try:
+        with ExitStack() as stack:
+            if current_pool() is None and not replaying():
+                stack.enter_context(BrowserPool(size=1))
+            (pond,), waited = fetch_html(POND_LINK)
+            (recap,), recap_waited = fetch_html(RECAP_LINK, [RECAP_TARGET])
+        data = build_market(extract(getPondval, pond), extract(getIndiceRecapScrap, recap))
+        return with_meta(data, wait_ms=waited + recap_waited)
+    except Exception as e:
+        raise wrap(e, "Error fetching market snapshot") from e
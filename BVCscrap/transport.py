@@ -0,0 +1,295 @@
+import os
+import re
+import html
+import json
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from . import metrics, responses, flight
+from .session import browser_page, goto_ready, json_ready, postback
+from .errors import ChallengeError, UpstreamError
+from .limits import call, host_of, policy
+
+log = logging.getLogger(__name__)
+
+TRANSPORTS = ("auto", "http", "browser")
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"),
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+}
+
+# Marqueurs des pages anti-bot (Cloudflare & co)
+CHALLENGE_MARKERS = ("cf-chl", "challenge-platform", "Just a moment", "Attention Required", "captcha")
+# Chromium affiche une réponse JSON dans un <pre>
+_PRE = re.compile(r"<pre[^>]*>(.*?)</pre>", re.S)
+
+_lock = threading.Lock()
+_session = None
+
+# live : réseau ; record : réseau + sauvegarde ; replay : fichiers uniquement
+FIXTURE_MODES = ("live", "record", "replay")
+_fixtures = {"mode": os.environ.get("BVCSCRAP_FIXTURE_MODE", "live"), "dir": os.environ.get("BVCSCRAP_FIXTURE_DIR")}
+
+
+class FixtureMissing(LookupError):
+    """Replay mode and no saved response for this request"""
+
+
+def set_fixture_mode(mode, path=None):
+    """
+    Select how fetchers reach upstream: "live" (default), "record" (live and
+    save every response under ``path``) or "replay" (serve only saved
+    responses from ``path``, no network and no browser).
+    """
+    if mode not in FIXTURE_MODES:
+        raise ValueError(f"mode must be one of {FIXTURE_MODES}, got {mode!r}")
+    if mode != "live" and not path:
+        raise ValueError(f"a fixture directory is required for mode {mode!r}")
+    if mode == "record":
+        os.makedirs(path, exist_ok=True)
+    _fixtures.update(mode=mode, dir=path)
+
+
+def replaying():
+    """True when responses are served from fixtures (no network, no browser)"""
+    return _fixtures["mode"] == "replay"
+
+
+def recording():
+    return _fixtures["mode"] == "record"
+
+
+@contextmanager
+def fixture_mode(mode, path=None):
+    """Temporarily record to / replay from a fixture directory"""
+    previous = dict(_fixtures)
+    set_fixture_mode(mode, path)
+    try:
+        yield
+    finally:
+        _fixtures.update(previous)
+
+
+def fixture_key(link, targets=()):
+    """File name of a saved response: readable endpoint slug + request hash"""
+    request = "\n".join([link, *targets])
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", re.sub(r"^https?://[^/]+/", "", link.split("&")[0]))[:60]
+    return f"{slug}-{hashlib.sha1(request.encode()).hexdigest()[:12]}.json"
+
+
+def _fixture_path(link, targets):
+    return os.path.join(_fixtures["dir"], fixture_key(link, targets))
+
+
+def replay(link, targets=()):
+    path = _fixture_path(link, targets)
+    metrics.count("fixture.replay")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["body"]
+    except FileNotFoundError:
+        raise FixtureMissing(f"No saved response for {link} {list(targets) or ''} in {_fixtures['dir']}")
+
+
+def record(link, body, targets=()):
+    path = _fixture_path(link, targets)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"url": link, "targets": list(targets), "body": body}, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+def http_session():
+    """Shared keep-alive requests.Session (connection pooled)"""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+    return _session
+
+
+def is_challenge(status, content_type, text):
+    """
+    Return True when a response looks like a bot challenge page instead of
+    JSON. A 429 or 5xx without challenge markers is an overload, retried
+    by ``limits.call`` rather than handed to the browser.
+    """
+    head = text.lstrip()[:1]
+    if head in ("{", "["):
+        return False
+    if any(marker in text[:4096] for marker in CHALLENGE_MARKERS):
+        return True
+    # Page HTML à la place du JSON : challenge, sauf page d'erreur 429/5xx
+    return (status < 400 or status == 403) and ("html" in content_type or head == "<")
+
+
+def http_json_text(link, timeout=30):
+    """GET a JSON endpoint through the pooled HTTP session"""
+    return http_get(link, timeout)[0]
+
+
+def http_get(link, timeout=30, etag=None):
+    """
+    GET a JSON endpoint, conditionally when ``etag`` is given. Returns
+    ``(text, etag)``, text None when the server answered 304 Not Modified.
+    """
+    host = host_of(link)
+    headers = {"If-None-Match": etag} if etag else None
+    with metrics.span("http.get", host=host) as span:
+        response = http_session().get(link, timeout=timeout, headers=headers)
+        text = response.text
+        span.set(status=response.status_code, bytes=len(response.content))
+    metrics.count("bytes", len(response.content), transport="http", host=host)
+    if etag and response.status_code == 304:
+        return None, etag
+    if is_challenge(response.status_code, response.headers.get("Content-Type", ""), text):
+        raise ChallengeError(f"Bot challenge from {host} (HTTP {response.status_code})", host, response.status_code)
+    if response.status_code >= 400:
+        raise UpstreamError(f"HTTP {response.status_code} from {host}", host, response.status_code)
+    return text, response.headers.get("ETag")
+
+
+def browser_json_text(link):
+    """Render a JSON endpoint in Chromium and return the raw text"""
+    with browser_page() as page:
+        # Attendre que le contenu soit chargé (au plus le timeout de session)
+        json_ready(page, link)
+
+        with metrics.span("browser.extract"):
+            content = page.content()
+    return page_json_text(link, content)
+
+
+def page_json_text(link, content):
+    """
+    JSON text of an endpoint rendered in Chromium (the page HTML when there
+    is no ``<pre>``), ChallengeError when it is a bot challenge page
+    """
+    match = _PRE.search(content)
+    json_text = html.unescape(match.group(1)) if match else content
+    metrics.count("bytes", len(json_text), transport="browser", host=host_of(link))
+    if is_challenge(200, "", json_text):
+        raise ChallengeError(f"Bot challenge from {host_of(link)} (browser)", host_of(link))
+    return json_text
+
+
+def fall_back(error):
+    """A bot challenge over HTTP: slow its host down before going through the browser"""
+    # Le challenge signale qu'on va trop vite
+    policy(error.host).bucket.throttled()
+    log.info("falling back to the browser: %s", error, extra={"host": error.host, "status": error.status})
+    metrics.count("fallback", host=error.host)
+
+
+def fetch_json_text(link, transport="auto"):
+    """
+    Fetch a medias24 JSON endpoint and return ``(text, transport_used)``.
+
+    ``transport`` is "http" (requests only), "browser" (Playwright only) or
+    "auto": HTTP first, Playwright only when a bot challenge is detected.
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"transport must be one of {TRANSPORTS}, got {transport!r}")
+    # Appels identiques simultanés : un seul fetch (le texte est immuable)
+    return flight.coalesced(("json", transport, *flight.request_key(link)), lambda: _fetch_json_text(link, transport))
+
+
+def _fetch_json_text(link, transport):
+    cache = responses.response_cache()
+    if cache is not None and not recording():
+        text, used, hit = cache.fetch((link, ()), lambda etag: load_json_text(link, transport, etag))
+        return text, "cache" if hit else used
+    text, _, used = load_json_text(link, transport)
+    return text, used
+
+
+def load_json_text(link, transport="auto", etag=None):
+    """Replay, or fetch live (and record): (text, etag, transport_used)"""
+    if replaying():
+        return replay(link), None, "replay"
+    with metrics.span("fetch", link=link) as span:
+        text, etag, used = call(host_of(link), lambda: live_json_text(link, transport, etag))
+        span.set(transport=used)
+    if recording():
+        record(link, text)
+    return text, etag, used
+
+
+def live_json_text(link, transport="auto", etag=None):
+    if transport == "browser":
+        return browser_json_text(link), None, "browser"
+    try:
+        text, etag = http_get(link, etag=etag)
+        return text, etag, "http"
+    except ChallengeError as e:
+        if transport == "http":
+            raise
+        fall_back(e)
+    return browser_json_text(link), None, "browser"
+
+
+def browser_html(link, targets=(), navigation=False):
+    """
+    Load a page in Chromium and fire each ``__doPostBack`` target in turn on
+    the same page (full postbacks when ``navigation``, UpdatePanel ones
+    otherwise). Returns the HTML after each postback (or the page itself
+    when there is none) and the total wait in ms.
+    """
+    with browser_page() as page:
+        # Charger la page puis déclencher les postbacks dès qu'ils sont disponibles
+        waited = goto_ready(page, link, postback=bool(targets))
+        if not targets:
+            contents = [page.content()]
+        else:
+            contents = []
+            for target in targets:
+                waited += postback(page, target, navigation=navigation)
+                contents.append(page.content())
+    metrics.count("bytes", sum(map(len, contents)), transport="browser", host=host_of(link))
+    return contents, waited
+
+
+def fetch_html(link, targets=(), navigation=False):
+    """browser_html through the record/replay layer, returns (contents, wait_ms)"""
+    targets = tuple(targets)
+    return flight.coalesced(("html", *flight.request_key(link, targets)),
+                            lambda: _fetch_html(link, targets, navigation),
+                            copy=lambda result: (list(result[0]), result[1]))
+
+
+def _fetch_html(link, targets, navigation):
+    cache = responses.response_cache()
+    if cache is not None and not recording():
+        contents, waited, hit = cache.fetch((link, targets), lambda etag: load_html(link, targets, navigation))
+        return list(contents), 0.0 if hit else waited
+    contents, _, waited = load_html(link, targets, navigation)
+    return contents, waited
+
+
+def load_html(link, targets=(), navigation=False):
+    """Replay, or render live (and record): (contents, None, wait_ms)"""
+    if replaying():
+        return replay(link, targets), None, 0.0
+    with metrics.span("fetch", link=link, transport="browser"):
+        contents, waited = call(host_of(link), lambda: browser_html(link, targets, navigation))
+    if recording():
+        record(link, contents, targets)
+    return contents, None, waited
+
+
+def with_meta(result, **meta):
+    """Attach fetch metadata to a DataFrame result (``result.attrs``)"""
+    attrs = getattr(result, "attrs", None)
+    if attrs is not None:
+        attrs.update(meta)
+    return result
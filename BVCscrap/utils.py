@@ -1,96 +1,96 @@
-from bs4 import BeautifulSoup
 import pandas as pd
 import json
-import datetime
-from .Notation import *
-from playwright.sync_api import sync_playwright
+import numpy as np
+import logging
+from . import metrics
+from .session import browser_page, goto_ready
 
-def fetch_page_content(url, wait=3000):
-    """Ouvre l'URL avec Playwright et retourne le HTML."""
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+log = logging.getLogger(__name__)
+
+def fetch_page_content(url, wait=3000, selector=None):
+    """Ouvre l'URL avec Playwright et retourne le HTML (wait : attente max en ms)."""
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url, timeout=90000)
-            page.wait_for_timeout(wait)  # attendre que la page se charge
-            html = page.content()
-            browser.close()
+        with metrics.span("fetch", link=url, transport="browser"):
+            with browser_page() as page:
+                goto_ready(page, url, selector=selector, timeout=wait)  # attendre que la page se charge
+                html = page.content()
         return html
     except Exception as e:
-        print(f"Erreur fetch_page_content: {e}")
+        log.warning("fetch_page_content failed for %s: %s", url, e, extra={"url": url, "error": repr(e)})
         return None
 
-def getCours(name):
-    code = get_valeur(name)
-    link = f"https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={code}&cat=7"
-    html = fetch_page_content(link)
-    if html:
-        soup = BeautifulSoup(html, 'html.parser')
-        return getTables(soup)
-    return None
-
-def getKeyIndicators(name, decode='utf-8'):
-    code = get_valeur(name)
-    link = f"https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={code}&cat=7"
-    html = fetch_page_content(link)
-    if html:
-        soup = BeautifulSoup(html, 'html.parser')
-        return getTablesFich(soup)
-    return None
-
-def getDividend(name, decode='utf-8'):
-    code = get_valeur(name)
-    link = f"https://www.casablanca-bourse.com/bourseweb/Societe-Cote.aspx?codeValeur={code}&cat=7"
-    html = fetch_page_content(link)
-    if html:
-        soup = BeautifulSoup(html, 'html.parser')
-        return getDivi(soup)
-    return None
+# Décodage JSON -> DataFrame typé (colonne par colonne)
+HISTORY_COLUMNS = ["Value", "Min", "Max", "Variation", "Volume"]
 
-def getIndex():
-    link = "https://www.casablanca-bourse.com/bourseweb/Activite-marche.aspx?Cat=22&IdLink=297"
-    html = fetch_page_content(link)
-    if html:
-        soup = BeautifulSoup(html, 'html.parser')
-        return getAllIndex(soup)
-    return None
+def loads(json_text, decode='utf-8'):
+    """json.loads, through orjson when it is installed"""
+    if decode.lower().replace("-", "") != "utf8":
+        json_text = json_text.encode().decode(decode)
+    return _loads(json_text)
 
-def getPond():
-    link = "https://www.casablanca-bourse.com/bourseweb/indice-ponderation.aspx?Cat=22&IdLink=298"
-    html = fetch_page_content(link)
-    if html:
-        soup = BeautifulSoup(html, 'html.parser')
-        return getPondval(soup)
-    return None
-
-def getIndexRecap():
-    link = "https://www.casablanca-bourse.com/bourseweb/index.aspx"
-    html = fetch_page_content(link)
-    if html:
-        soup = BeautifulSoup(html, 'html.parser')
-        return getIndiceRecapScrap(soup)
-    return None
+def to_numeric(values, integer=False):
+    """List of API values -> float64 (or int64 when every value is integral)"""
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        array = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(np.float64)
+    if integer and np.isfinite(array).all() and (array == np.floor(array)).all():
+        return array.astype(np.int64)
+    return array
 
-# Les fonctions JSON/DataFrame restent inchangées
 def get_data(json_text, decode='utf-8'):
-    table = json.loads(json_text.encode().decode(decode))
-    row_data = pd.DataFrame(table["result"])
-    row_data.columns = ["Date", "Value", "Min", "Max", "Variation", "Volume"]
-    date = row_data['Date']
-    row_data.drop(['Date'], axis=1, inplace=True)
-    row_data.index = date
+    """
+    Decode a medias24 history payload into a DataFrame with a sorted
+    DatetimeIndex and float64 columns (Volume int64 when integral).
+    """
+    with metrics.span("decode.json", bytes=len(json_text)):
+        rows = loads(json_text, decode)["result"]
+    if not rows:
+        return pd.DataFrame({c: np.array([], dtype=np.float64) for c in HISTORY_COLUMNS},
+                            index=pd.DatetimeIndex([], name="Date"))
+    with metrics.span("decode.frame", rows=len(rows)):
+        if isinstance(rows[0], dict):
+            columns = list(zip(*(row.values() for row in rows)))
+        else:
+            columns = list(zip(*rows))
+        # 2 colonnes pour les indices (Date, Value), 6 pour les actions
+        names = ["Value"] if len(columns) == 2 else HISTORY_COLUMNS[:len(columns) - 1]
+        index = parse_dates(columns[0])
+        data = {name: to_numeric(values, integer=name == "Volume") for name, values in zip(names, columns[1:])}
+        row_data = pd.DataFrame(data, index=index, copy=False)
+        if not index.is_monotonic_increasing:
+            row_data = row_data.take(np.argsort(index.values, kind="stable"))
     return row_data
 
 def intradata(json_text, decode='utf-8'):
-    table = json.loads(json_text.encode().decode(decode))
-    row_data = pd.DataFrame(table["result"][0])
-    index = row_data['labels'].values
-    row_data.drop(['labels'], axis=1, inplace=True)
-    row_data.index = index
-    row_data.columns = ["Value"]
+    with metrics.span("decode.json", bytes=len(json_text)):
+        table = json.loads(json_text.encode().decode(decode))
+    with metrics.span("decode.frame"):
+        row_data = pd.DataFrame(table["result"][0])
+        index = row_data['labels'].values
+        row_data.drop(['labels'], axis=1, inplace=True)
+        row_data.index = index
+        row_data.columns = ["Value"]
     return row_data
 
+def parse_dates(values):
+    """Dates from the API: epoch seconds or date strings -> DatetimeIndex"""
+    values = pd.Index(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.DatetimeIndex(pd.to_datetime(values, unit="s", errors="coerce"), name="Date")
+    return pd.DatetimeIndex(pd.to_datetime(values, errors="coerce"), name="Date")
+
 def produce_data(data, start, end):
-    start = pd.to_datetime(start).date()
-    end = pd.to_datetime(end).date()
-    return data.loc[start:end]
+    """Rows of a date-sorted frame between start and end (inclusive), by binary search"""
+    index = data.index
+    if not isinstance(index, pd.DatetimeIndex):
+        index = parse_dates(index)
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+    i, j = index.searchsorted(start, side="left"), index.searchsorted(end, side="left")
+    return data.iloc[i:j]
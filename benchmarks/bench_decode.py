@@ -0,0 +1,62 @@
+"""
+Micro-benchmark: decoding a 10-year getPriceHistory payload.
+
+    python -m benchmarks.bench_decode
+"""
+import json
+import timeit
+import numpy as np
+import pandas as pd
+from BVCscrap.utils import get_data, produce_data
+
+
+def payload(years=10, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end="2024-12-31", periods=years * 250)
+    value = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+    rows = [{"date": d.strftime("%Y-%m-%d"), "value": round(v, 2), "min": round(v * 0.99, 2),
+             "max": round(v * 1.01, 2), "variation": round(float(rng.normal()), 2),
+             "volume": int(rng.integers(0, 10 ** 6))}
+            for d, v in zip(days, value)]
+    return json.dumps({"result": rows})
+
+
+def legacy_get_data(json_text, decode="utf-8"):
+    # get_data avant le pipeline typé (index objet, colonnes non typées)
+    table = json.loads(json_text.encode().decode(decode))
+    row_data = pd.DataFrame(table["result"])
+    row_data.columns = ["Date", "Value", "Min", "Max", "Variation", "Volume"]
+    date = row_data["Date"]
+    row_data.drop(["Date"], axis=1, inplace=True)
+    row_data.index = date
+    return row_data
+
+
+def legacy_typed(json_text):
+    # ce qu'il fallait faire ensuite pour obtenir un index de dates trié
+    data = legacy_get_data(json_text)
+    data.index = pd.to_datetime(data.index)
+    return data.sort_index().astype("float64")
+
+
+def best(stmt, number=20, repeat=5):
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    text = payload()
+    old, old_typed, new = best(lambda: legacy_get_data(text)), best(lambda: legacy_typed(text)), best(lambda: get_data(text))
+    data = get_data(text)
+    legacy = legacy_typed(text)
+    slice_old = best(lambda: legacy.loc["2019-01-01":"2019-12-31"], number=200)
+    slice_new = best(lambda: produce_data(data, "2019-01-01", "2019-12-31"), number=200)
+    print(f"rows: {len(data)}  payload: {len(text) / 1e6:.2f} MB")
+    print(f"legacy get_data (untyped) : {old * 1e3:8.2f} ms")
+    print(f"legacy + typing + sort    : {old_typed * 1e3:8.2f} ms")
+    print(f"get_data (typed pipeline) : {new * 1e3:8.2f} ms  ({old_typed / new:.1f}x)")
+    print(f"range filter .loc         : {slice_old * 1e6:8.1f} us")
+    print(f"range filter searchsorted : {slice_new * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Startup cost: time of ``import BVCscrap`` (and of the first calls a short
+worker makes) in a fresh interpreter, and which heavy dependencies it loads.
+
+    python -m benchmarks.bench_import
+"""
+import sys
+import json
+import subprocess
+
+HEAVY = ("pandas", "numpy", "playwright", "lxml", "bs4", "requests", "pyarrow")
+
+# Chaque étape suppose les précédentes (même interpréteur)
+STEPS = {
+    "import BVCscrap": "import BVCscrap",
+    "notation_code()": "BVCscrap.notation_code()",
+    "loadata (imported)": "BVCscrap.loadata",
+    "getCours (imported)": "BVCscrap.getCours",
+}
+
+PROBE = """
+import sys, json, time
+steps, heavy, out = json.loads(sys.argv[1]), json.loads(sys.argv[2]), []
+for label, statement in steps:
+    started = time.perf_counter()
+    exec(statement)
+    out.append((label, time.perf_counter() - started, [m for m in heavy if m in sys.modules]))
+print(json.dumps(out))
+"""
+
+
+def probe(steps=None):
+    """[(label, seconds, heavy modules loaded)] of each step, in a new interpreter"""
+    steps = list((steps or STEPS).items())
+    output = subprocess.run([sys.executable, "-c", PROBE, json.dumps(steps), json.dumps(HEAVY)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def bare_import():
+    """Seconds of ``import BVCscrap``; fails if it loaded a heavy dependency"""
+    (_, seconds, loaded), = probe({"import BVCscrap": "import BVCscrap"})
+    if loaded:
+        raise AssertionError(f"import BVCscrap loaded {', '.join(loaded)}")
+    return seconds
+
+
+def main():
+    for label, seconds, loaded in probe():
+        print(f"{label:22} {seconds * 1e3:8.2f} ms  loaded: {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
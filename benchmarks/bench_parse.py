@@ -0,0 +1,49 @@
+"""
+Parse-time benchmark of the HTML extractors against saved fixtures:
+lxml (BVCscrap.parse) vs the former BeautifulSoup(html, 'html.parser') walk.
+
+    python -m benchmarks.bench_parse
+"""
+import os
+import timeit
+from bs4 import BeautifulSoup
+from BVCscrap import parse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CASES = {
+    "societe_cours.html": parse.getTables,
+    "societe_fiche.html": parse.getTablesFich,
+    "societe_dividende.html": parse.getDivi,
+    "activite_marche.html": parse.getAllIndex,
+    "indice_ponderation.html": parse.getPondval,
+    "index_recap.html": parse.getIndiceRecapScrap,
+}
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def soup_tables(html):
+    # Ancienne approche : arbre html.parser complet puis parcours des tables
+    soup = BeautifulSoup(html, "html.parser")
+    return [[[td.get_text(strip=True) for td in tr.find_all(["td", "th"])] for tr in t.find_all("tr")]
+            for t in soup.find_all("table") if not t.find("table")]
+
+
+def best(stmt, number=5, repeat=3):
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    print(f"{'fixture':26} {'KB':>6} {'html.parser':>12} {'lxml':>9} {'speedup':>8}")
+    for name, extractor in CASES.items():
+        html = fixture(name)
+        old, new = best(lambda: soup_tables(html)), best(lambda: extractor(html))
+        print(f"{name:26} {len(html) / 1024:6.0f} {old * 1e3:9.1f} ms {new * 1e3:6.1f} ms {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Regenerate the fixtures used by the benchmarks.
+
+The HTML pages mimic the casablanca-bourse ASP.NET layout (nested grid
+tables, menus, scripts, viewstate) around the data tables the extractors
+read. replay/ holds the same pages and synthetic medias24 payloads as saved
+responses for the replay transport (see BVCscrap.transport.set_fixture_mode).
+
+    python -m benchmarks.fixtures.make_fixtures
+"""
+import os
+import json
+import random
+from BVCscrap.tech import COMPANY_LINK, COMPANY_SECTIONS
+from BVCscrap.load import windows
+from BVCscrap.transport import fixture_mode, record
+from BVCscrap.Notation import get_code, get_valeur
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPLAY = os.path.join(HERE, "replay")
+
+# Requêtes servies en mode replay par la suite de benchmarks
+TICKERS = ["Attijariwafa", "BCP", "Cosumar", "Managem", "Maroc Telecom"]
+START, END = "2015-01-01", "2024-12-31"
+COMPANY = "BCP"
+
+# Libellés des instruments tels qu'affichés sur les pages de marché
+LABELS = [
+    "DOUJA PROM ADDOHA", "AFMA", "AFRIC INDUSTRIES SA", "AFRIQUIA GAZ", "AGMA", "AKDITAL", "ALLIANCES",
+    "ALUMINIUM DU MAROC", "ARADEI CAPITAL", "ATLANTASANAD", "ATTIJARIWAFA BANK", "AUTO HALL", "AUTO NEJMA", "BALIMA",
+    "BANK OF AFRICA", "BCP", "BMCI", "CARTIER SAADA", "CREDIT DU MAROC", "CFG BANK", "CIH", "CIMENTS DU MAROC",
+    "CMT", "CMGP GROUP", "COLORADO", "COSUMAR", "CTM", "DARI COUSPATE", "DELTA HOLDING", "DISTY TECHNOLOGIES",
+    "DISWAY", "ENNAKL", "EQDOM", "FENIE BROSSETTE", "HPS", "IB MAROC.COM", "IMMORENTE INVEST", "INVOLYS",
+    "JET CONTRACTORS", "LABEL VIE", "HOLCIM MAROC", "LESIEUR CRISTAL", "M2M Group", "MAGHREB OXYGENE", "MAGHREBAIL",
+    "MANAGEM", "MAROC LEASING", "ITISSALAT AL-MAGHRIB", "MICRODATA", "MUTANDIS SCA", "OULMES", "PROMOPHARM S.A.",
+    "REBAB COMPANY", "RES DAR SAADA", "RISMA", "S.M MONETIQUE", "SANLAM MAROC", "SALAFIN", "SMI",
+    "STOKVIS NORD AFRIQUE", "SNEP", "SODEP-MARSA MAROC", "SONASID", "SOTHEMA", "REALISATIONS MECANIQUES",
+    "SOCIETE DES BOISSONS DU MAROC", "STROC INDUSTRIE", "TAQA MOROCCO", "TGCC S.A", "TIMAR",
+    "TOTALENERGIES MARKETING MAROC", "UNIMER", "WAFA ASSURANCE", "ZELLIDJA S.A",
+]
+
+
+def fr(x, digits=2):
+    """French number formatting: 1 234,56"""
+    text = f"{x:,.{digits}f}".replace(",", " ").replace(".", ",")
+    return text
+
+
+def layout(title, body, rng):
+    menu = "".join(f'<tr><td><a href="/bourseweb/page{i}.aspx">Rubrique {i}</a></td></tr>' for i in range(120))
+    news = "".join(f"<div class='news'><p>{'Lorem ipsum dolor sit amet ' * 8}</p></div>" for _ in range(60))
+    viewstate = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/") for _ in range(40000))
+    scripts = "<script>function __doPostBack(t, a) { document.forms[0].submit(); }</script>" * 5
+    return f"""<!DOCTYPE html><html><head><title>{title}</title>{scripts}
+<link rel="stylesheet" href="/bourseweb/style.css"></head><body>
+<form method="post" action="./page.aspx"><input type="hidden" name="__VIEWSTATE" value="{viewstate}"/>
+<table width="100%"><tr><td valign="top"><table class="menu">{menu}</table></td>
+<td valign="top"><table width="100%"><tr><td>{body}</td></tr></table></td>
+<td valign="top">{news}</td></tr></table></form></body></html>"""
+
+
+def table(header, rows, attrs=""):
+    head = "".join(f"<th>{h}</th>" for h in header)
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>" for row in rows)
+    return f"<table {attrs}><tr>{head}</tr>{body}</table>"
+
+
+def pages(seed=0):
+    rng = random.Random(seed)
+    cours = ("<table>" + "".join(f"<tr><td>{k}</td><td>{v}</td></tr>" for k, v in [
+        ("Cours", fr(512.3)), ("Variation", fr(-0.35) + " %"), ("Ouverture", fr(510)),
+        ("Plus haut", fr(515.5)), ("Plus bas", fr(508.1)), ("Volume", fr(1234567, 0)),
+        ("Capitalisation", fr(11890456789, 0)), ("Date", "17/10/2024")]) + "</table>")
+    years = ["2019", "2020", "2021", "2022", "2023"]
+    fich = table(["Indicateur"] + years, [[label] + [fr(rng.uniform(1e6, 1e9)) for _ in years] for label in [
+        "Chiffre d'affaires", "Résultat d'exploitation", "Résultat net", "Capitaux propres",
+        "Capitalisation", "PER", "Dividende par action", "Rendement"]])
+    divi = table(["Année", "Montant du dividende", "Date de détachement", "Date de paiement"], [
+        [str(y), fr(rng.uniform(1, 50)), f"0{rng.randint(1, 9)}/07/{y}", f"1{rng.randint(0, 9)}/07/{y}"]
+        for y in range(2005, 2024)])
+    index = table(["Indice", "Valeur", "Veille", "Variation %", "Variation 31/12 %"], [
+        [f"Indice {i}", fr(rng.uniform(1e3, 2e4)), fr(rng.uniform(1e3, 2e4)), fr(rng.uniform(-3, 3)), fr(rng.uniform(-20, 20))]
+        for i in range(40)])
+    pond = table(["Instrument", "Nombre de titres", "Cours", "Facteur flottant", "Facteur plafonnement",
+                  "Capitalisation flottante", "Poids %"], [
+        [n, fr(rng.randint(10 ** 6, 10 ** 9), 0), fr(rng.uniform(10, 5000)), fr(rng.random()),
+         fr(1), fr(rng.uniform(1e7, 1e11)), fr(rng.uniform(0.01, 20))] for n in LABELS])
+    recap = (table(["Indice", "Valeur", "Variation %"], [["MASI", fr(13250.6), fr(0.42)], ["MSI20", fr(1080.2), fr(0.51)]])
+             + table(["Instrument", "Cours", "Variation %", "Volume"], [
+                 [n, fr(rng.uniform(10, 5000)), fr(rng.uniform(-5, 5)), fr(rng.uniform(1e4, 1e8), 0)] for n in LABELS]))
+    return {
+        "societe_cours.html": layout("Cours", cours, rng),
+        "societe_fiche.html": layout("Fiche technique", fich, rng),
+        "societe_dividende.html": layout("Dividendes", divi, rng),
+        "activite_marche.html": layout("Indices", index, rng),
+        "indice_ponderation.html": layout("Pondération", pond, rng),
+        "index_recap.html": layout("Récapitulatif", recap, rng),
+    }
+
+
+def intraday(seed=0):
+    rng = random.Random(seed)
+    labels = [f"{9 + (30 + i) // 60:02d}:{(30 + i) % 60:02d}" for i in range(0, 360)]
+    values, value = [], 500.0
+    for _ in labels:
+        value *= 1 + rng.gauss(0, 0.001)
+        values.append(round(value, 2))
+    return json.dumps({"result": [{"labels": labels, "values": values}]})
+
+
+def replay_responses(html):
+    from benchmarks.bench_decode import payload
+    api = "https://medias24.com/content/api?method="
+    for i, name in enumerate(TICKERS):
+        years = 10 if i == 0 else 3
+        record(f"{api}getPriceHistory&ISIN={get_code(name)}&format=json&from={START}&to={END}", payload(years, seed=i))
+        record(f"{api}getStockIntraday&ISIN={get_code(name)}&format=json", intraday(seed=i))
+    # Même historique découpé par année (loadata(..., chunk="year"))
+    rows = json.loads(payload(10, seed=0))["result"]
+    for first, last in windows(START, END, "year"):
+        record(f"{api}getPriceHistory&ISIN={get_code(TICKERS[0])}&format=json&from={first}&to={last}",
+               json.dumps({"result": [row for row in rows if str(first) <= row["date"] <= str(last)]}))
+    record(f"{api}getMasiHistory&periode=10y&format=json",
+           json.dumps({"result": [[row["date"], row["value"]] for row in json.loads(payload(seed=99))["result"]]}))
+    record(f"{api}getMarketIntraday&format=json", intraday(seed=99))
+
+    link = COMPANY_LINK.format(code=get_valeur(COMPANY))
+    section_pages = {"cours": html["societe_cours.html"], "indicators": html["societe_fiche.html"],
+                     "dividends": html["societe_dividende.html"]}
+    for section, (target, _) in COMPANY_SECTIONS.items():
+        record(link, [section_pages[section]], (target,))
+    record(link, [section_pages[s] for s in COMPANY_SECTIONS], tuple(t for t, _ in COMPANY_SECTIONS.values()))
+    bourse = "https://www.casablanca-bourse.com/bourseweb/"
+    record(f"{bourse}Activite-marche.aspx?Cat=22&IdLink=297", [html["activite_marche.html"]])
+    record(f"{bourse}indice-ponderation.aspx?Cat=22&IdLink=298", [html["indice_ponderation.html"]])
+    record(f"{bourse}index.aspx", [html["index_recap.html"]], ("FrontTabContainer1$ctl00$ImageButton1",))
+
+
+def main():
+    html = pages()
+    for name, page in html.items():
+        with open(os.path.join(HERE, name), "w", encoding="utf-8") as f:
+            f.write(page)
+    with fixture_mode("record", REPLAY):
+        replay_responses(html)
+
+
+if __name__ == "__main__":
+    main()
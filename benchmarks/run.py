@@ -0,0 +1,186 @@
+"""
+Offline benchmark suite of the fetch pipeline, run against the replay
+fixtures (no network, no browser needed).
+
+Stages are timed separately (browser startup, fetch, decode, parse) and
+end to end for loadata, loadmany, getIntraday and the tech.py scrapers;
+``stage.import`` times ``import BVCscrap`` in a fresh interpreter.
+Timings are compared with benchmarks/baselines.json; a case slower than
+``tolerance`` x its baseline, or failing, makes the run exit with status 1.
+
+    python -m benchmarks.run                 # compare with the baselines
+    python -m benchmarks.run --save          # record new baselines
+    python -m benchmarks.run -k parse        # only cases containing "parse"
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import BVCscrap
+import BVCscrap.analytics
+from BVCscrap import cache
+from BVCscrap.session import BrowserPool
+from BVCscrap.transport import fixture_mode, fetch_json_text, load_json_text
+from BVCscrap.responses import ResponseCache
+from BVCscrap.utils import get_data
+from BVCscrap.Notation import get_code
+from benchmarks import bench_import, bench_parse
+from benchmarks.fixtures.make_fixtures import REPLAY, TICKERS, START, END, COMPANY
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(HERE, "baselines.json")
+HISTORY = (f"https://medias24.com/content/api?method=getPriceHistory&ISIN={get_code(TICKERS[0])}"
+           f"&format=json&from={START}&to={END}")
+
+CASES = {}
+
+
+def case(name, number=20, repeat=5):
+    def register(fn):
+        CASES[name] = (fn, number, repeat)
+        return fn
+    return register
+
+
+def browser_startup():
+    pool = BrowserPool(size=1)
+    pool.open()
+    pool.close()
+
+
+def timed(fn, number, repeat):
+    """Best mean time (s) of ``repeat`` runs of ``number`` calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+# Étapes
+# Interpréteur neuf à chaque appel : échoue si l'import charge pandas, Playwright...
+case("stage.import", number=1, repeat=5)(bench_import.bare_import)
+case("stage.browser_startup", number=1, repeat=3)(browser_startup)
+case("stage.fetch")(lambda: fetch_json_text(HISTORY))
+_responses = ResponseCache()
+case("stage.response_cache_hit", number=1000)(
+    lambda: _responses.fetch((HISTORY, ()), lambda etag: load_json_text(HISTORY, etag=etag)))
+_payload = None
+
+
+@case("stage.decode")
+def decode():
+    global _payload
+    if _payload is None:
+        _payload = fetch_json_text(HISTORY)[0]
+    get_data(_payload)
+
+
+for _fixture, _extractor in bench_parse.CASES.items():
+    _html = bench_parse.fixture(_fixture)
+    case(f"stage.parse.{_extractor.__name__}")(lambda html=_html, extractor=_extractor: extractor(html))
+
+# Bout en bout (replay)
+case("e2e.loadata")(lambda: BVCscrap.loadata(TICKERS[0], START, END))
+case("e2e.loadata.chunked")(lambda: BVCscrap.loadata(TICKERS[0], START, END, chunk="year"))
+case("e2e.loadata.MASI")(lambda: BVCscrap.loadata("MASI", "2020-01-01", "2020-12-31"))
+case("e2e.loadmany", number=5)(lambda: BVCscrap.loadmany(TICKERS, start=START, end=END))
+case("e2e.loadpanel", number=5)(lambda: BVCscrap.loadpanel(TICKERS, start=START, end=END))
+# 8 appels identiques simultanés (coalescés quand ils se chevauchent)
+_threads = ThreadPoolExecutor(8)
+case("e2e.loadata.concurrent", number=5)(
+    lambda: list(_threads.map(lambda _: BVCscrap.loadata(TICKERS[0], START, END), range(8))))
+_store = None
+
+
+@case("stage.store_read", number=200)
+def store_read():
+    global _store
+    if _store is None:
+        _store = BVCscrap.Store(tempfile.mkdtemp(prefix="bvcscrap-bench-"))
+        _store.write("MASI", BVCscrap.loadata("MASI"))
+    _store.read("MASI", "2020-01-01", "2020-12-31")
+
+
+_history = None
+
+
+@case("stage.analytics")
+def analytics():
+    global _history
+    if _history is None:
+        _history = BVCscrap.loadmany(TICKERS, start=START, end=END)
+    BVCscrap.analytics.rolling_volatility(_history, window=20)
+    BVCscrap.analytics.beta(_history, benchmark=_history[TICKERS[0]])
+    BVCscrap.analytics.correlation(_history)
+
+
+case("e2e.getIntraday")(lambda: BVCscrap.getIntraday(TICKERS[0]))
+case("e2e.getIntraday.MASI")(lambda: BVCscrap.getIntraday("MASI"))
+case("e2e.getCours")(lambda: BVCscrap.getCours(COMPANY))
+case("e2e.getKeyIndicators")(lambda: BVCscrap.getKeyIndicators(COMPANY))
+case("e2e.getDividend")(lambda: BVCscrap.getDividend(COMPANY))
+case("e2e.getCompanySnapshot")(lambda: BVCscrap.getCompanySnapshot(COMPANY))
+case("e2e.getIndex")(BVCscrap.getIndex)
+case("e2e.getPond")(BVCscrap.getPond)
+case("e2e.getIndexRecap")(BVCscrap.getIndexRecap)
+case("e2e.getMarketSnapshot")(BVCscrap.getMarketSnapshot)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--save", action="store_true", help="write the timings as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="allowed slowdown factor (default 2.0)")
+    parser.add_argument("-k", dest="keyword", default="", help="only run cases containing this text")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+
+    results, failed = {}, []
+    cache.disable_cache()
+    with fixture_mode("replay", REPLAY):
+        for name, (fn, number, repeat) in CASES.items():
+            if args.keyword not in name:
+                continue
+            try:
+                fn()  # échauffement
+                results[name] = timed(fn, number, repeat)
+            except Exception as e:
+                if name == "stage.browser_startup":
+                    print(f"{name:36} skipped ({type(e).__name__}: no local Chromium)")
+                    continue
+                print(f"{name:36} ERROR {type(e).__name__}: {e}")
+                failed.append(name)
+                continue
+            base = baselines.get(name)
+            status = ""
+            if base:
+                ratio = results[name] / base
+                status = f"{ratio:5.2f}x baseline"
+                if ratio > args.tolerance:
+                    status += "  SLOWER"
+                    failed.append(name)
+            print(f"{name:36} {results[name] * 1e3:10.3f} ms  {status}")
+
+    if args.save:
+        baselines.update(results)
+        with open(BASELINES, "w") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=1)
+        print(f"baselines saved to {BASELINES}")
+    elif failed:
+        print(f"{len(failed)} case(s) failed or regressed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,6 +21,12 @@ setup(
         'lxml' ,
         'playwright'
     ],
+    extras_require={
+        'arrow': ['pyarrow'],
+    },
+    entry_points={
+        'console_scripts': ['bvcscrap=BVCscrap.cli:main'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
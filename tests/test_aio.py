@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+import pandas as pd
+from BVCscrap import aio
+from BVCscrap.errors import ChallengeError
+from BVCscrap.limits import policy
+
+
+def test_loadmany_keeps_missing_feature_in_errors(monkeypatch):
+    async def loadata(name, *args, **kwargs):
+        index = pd.DatetimeIndex(["2024-01-02", "2024-01-03"], name="Date")
+        columns = {"Value": [1.0, 2.0]} if name == "BCP" else {"Volume": [10, 20]}
+        return pd.DataFrame(columns, index=index)
+
+    monkeypatch.setattr(aio, "loadata", loadata)
+    data = asyncio.run(aio.loadmany(["BCP", "Attijariwafa"]))
+    assert list(data.columns) == ["BCP"]
+    assert data.attrs["errors"] == {"Attijariwafa": "No field 'Value' for Attijariwafa"}
+
+
+def test_challenge_falls_back_like_the_sync_transport(monkeypatch):
+    host = "aio-fallback.test"
+    browser = []
+
+    def http_json_text(link):
+        raise ChallengeError(f"Bot challenge from {host} (HTTP 403)", host, 403)
+
+    async def browser_json_text(link):
+        browser.append(link)
+        return '{"result": []}'
+
+    monkeypatch.setattr(aio, "http_json_text", http_json_text)
+    monkeypatch.setattr(aio, "browser_json_text", browser_json_text)
+    link = f"https://{host}/content/api?method=x"
+    bucket = policy(host).bucket
+    assert asyncio.run(aio.live_json_text(link)) == ('{"result": []}', "browser")
+    assert browser == [link]
+    assert bucket.rate < bucket.max_rate
+    # transport="http" ne passe jamais par le navigateur
+    with pytest.raises(ChallengeError):
+        asyncio.run(aio.live_json_text(link, "http"))
+    assert browser == [link]
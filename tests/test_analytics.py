@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from BVCscrap import analytics
+from BVCscrap.transport import fixture_mode
+
+REPLAY = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures", "replay")
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2022-01-03", periods=300, name="Date")
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (300, 3)), axis=0))
+    data = pd.DataFrame(values, index=index, columns=["BCP", "Cosumar", "MASI"])
+    # Trous : séances manquantes d'une valeur
+    data.iloc[[5, 40, 41, 200], 1] = np.nan
+    return data
+
+
+def test_returns_match_pandas(prices):
+    expected = np.log(prices / prices.shift()).iloc[1:]
+    pd.testing.assert_frame_equal(analytics.returns(prices), expected)
+    pd.testing.assert_frame_equal(analytics.returns(prices, kind="simple"),
+                                  (prices / prices.shift() - 1).iloc[1:])
+
+
+def test_rolling_volatility_matches_pandas(prices):
+    r = np.log(prices / prices.shift()).iloc[1:]
+    expected = r.rolling(20).std() * np.sqrt(analytics.PERIODS_PER_YEAR)
+    pd.testing.assert_frame_equal(analytics.rolling_volatility(prices, window=20), expected)
+
+
+def test_drawdown_matches_pandas(prices):
+    pd.testing.assert_frame_equal(analytics.drawdown(prices), prices / prices.cummax() - 1)
+
+
+def test_beta_and_correlation_match_pandas(prices):
+    r = np.log(prices / prices.shift()).iloc[1:]
+    stocks, masi = prices[["BCP", "Cosumar"]], prices[["MASI"]]
+    b = r["MASI"]
+    beta = pd.Series({c: r[c].cov(b) / b[r[c].notna()].var() for c in ("BCP", "Cosumar")}, name="beta")
+    pd.testing.assert_series_equal(analytics.beta(stocks, benchmark=masi), beta)
+    corr = pd.Series({c: r[c].corr(b) for c in ("BCP", "Cosumar")}, name="correlation")
+    pd.testing.assert_series_equal(analytics.correlation(stocks, benchmark=masi), corr)
+    rolling = pd.DataFrame({c: r[c].rolling(30).cov(b) / b.where(r[c].notna()).rolling(30).var()
+                            for c in ("BCP", "Cosumar")})
+    pd.testing.assert_frame_equal(analytics.beta(stocks, benchmark=masi, window=30), rolling, check_freq=False)
+
+
+def test_correlation_matrix_matches_pandas(prices):
+    r = np.log(prices / prices.shift()).iloc[1:]
+    pd.testing.assert_frame_equal(analytics.correlation(prices), r.corr())
+
+
+def test_benchmark_by_name_keeps_the_first_return(monkeypatch, prices):
+    loaded = []
+
+    def history(names, start=None, end=None):
+        loaded.append((start, end))
+        return prices[list(names)]
+    monkeypatch.setattr(analytics, "history", history)
+    beta = analytics.beta(prices[["MASI"]], benchmark="MASI")
+    assert beta["MASI"] == pytest.approx(1.0)
+    # Chargé depuis le premier cours, pas le premier rendement
+    assert loaded[0][0] == prices.index[0]
+
+
+def test_beta_by_names_in_replay():
+    from benchmarks.run import TICKERS, START, END
+    analytics.clear_memo()
+    with fixture_mode("replay", REPLAY):
+        beta = analytics.beta(TICKERS, benchmark=TICKERS[0], start=START, end=END)
+    assert beta[TICKERS[0]] == pytest.approx(1.0)
+    assert beta.notna().all()
@@ -0,0 +1,101 @@
+import json
+import datetime
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+import pytest
+from BVCscrap import cache, load
+
+ISIN = "MA0000011884"
+
+
+@pytest.fixture
+def history_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_config", dict(cache._config))
+    cache.enable_cache(str(tmp_path))
+    return tmp_path
+
+
+def frame(start, periods):
+    index = pd.bdate_range(start, periods=periods, name="Date").as_unit("ns")
+    values = np.array([day.toordinal() for day in index], dtype=np.float64)
+    return pd.DataFrame({"Value": values, "Volume": np.arange(periods, dtype=np.int64)}, index=index)
+
+
+def checked(when):
+    index = cache._read_index()
+    index[ISIN]["checked"] = when.isoformat(timespec="seconds")
+    cache._write_index(index)
+
+
+def test_last_close_skips_weekends_and_holidays(history_cache):
+    cache.enable_cache(str(history_cache), holidays=["2024-05-01"])
+    # Jeudi 2 mai avant la clôture : la dernière séance est le mardi 30 avril
+    assert cache.last_session(datetime.datetime(2024, 5, 2, 10)) == datetime.date(2024, 4, 30)
+    assert cache.last_session(datetime.datetime(2024, 5, 2, 16)) == datetime.date(2024, 5, 2)
+    assert cache.last_close(datetime.datetime(2024, 5, 5, 12)) == datetime.datetime(2024, 5, 3, 15, 30)
+
+
+def test_is_stale_around_the_close(history_cache):
+    assert cache.is_stale(ISIN)
+    cache.write_history(ISIN, frame("2024-01-01", 5), "BCP")
+    checked(datetime.datetime(2024, 5, 3, 15, 0))
+    assert not cache.is_stale(ISIN, now=datetime.datetime(2024, 5, 3, 15, 29))
+    assert cache.is_stale(ISIN, now=datetime.datetime(2024, 5, 3, 15, 31))
+    checked(datetime.datetime(2024, 5, 3, 15, 31))
+    # Le week-end n'a pas de séance
+    assert not cache.is_stale(ISIN, now=datetime.datetime(2024, 5, 6, 9))
+
+
+def test_max_age(history_cache):
+    cache.enable_cache(str(history_cache), max_age=datetime.timedelta(hours=1))
+    cache.write_history(ISIN, frame("2024-01-01", 5), "BCP")
+    checked(datetime.datetime(2024, 5, 3, 16))
+    assert cache.is_stale(ISIN, now=datetime.datetime(2024, 5, 3, 18))
+
+
+def test_npz_round_trip(history_cache, monkeypatch):
+    monkeypatch.setattr(cache, "has_parquet", lambda: False)
+    data = frame("2024-01-01", 30)
+    cache.write_history(ISIN, data, "BCP")
+    assert (history_cache / f"{ISIN}.npz").exists()
+    pd.testing.assert_frame_equal(cache.read_history(ISIN), data, check_freq=False)
+
+
+def test_parquet_round_trip_replaces_npz(history_cache, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(cache, "has_parquet", lambda: False)
+    cache.write_history(ISIN, frame("2024-01-01", 3), "BCP")
+    monkeypatch.setattr(cache, "has_parquet", lambda: True)
+    data = frame("2024-01-01", 30)
+    cache.write_history(ISIN, data, "BCP")
+    assert not (history_cache / f"{ISIN}.npz").exists()
+    pd.testing.assert_frame_equal(cache.read_history(ISIN), data, check_freq=False)
+
+
+def test_incremental_update_fetches_only_new_sessions(history_cache, monkeypatch):
+    calls = []
+
+    def fetch_json_text(link, transport="auto"):
+        query = parse_qs(urlsplit(link).query)
+        first, last = pd.Timestamp(query["from"][0]), pd.Timestamp(query["to"][0])
+        calls.append((first.date(), last.date()))
+        # Le serveur renvoie aussi deux séances déjà en cache
+        rows = [{"date": day.strftime("%Y-%m-%d"), "value": day.toordinal(), "min": 0, "max": 0, "variation": 0,
+                 "volume": 1} for day in pd.bdate_range(first - pd.Timedelta(days=2), last)]
+        return json.dumps({"result": rows}), "http"
+    monkeypatch.setattr(load, "fetch_json_text", fetch_json_text)
+
+    cached = frame(datetime.date.today() - datetime.timedelta(days=60), 20)
+    cache.write_history(ISIN, cached, "BCP")
+    checked(datetime.datetime(2000, 1, 3))
+    data = load.loadata("BCP", cache=True)
+    last = cached.index[-1].date()
+    assert calls == [(last + datetime.timedelta(days=1), datetime.date.today())]
+    assert data.index.is_unique and data.index.is_monotonic_increasing
+    assert data.index[0] == cached.index[0]
+    assert (data["Value"] == [day.toordinal() for day in data.index]).all()
+    assert data.attrs["transport"] == "http"
+    # Fraîchement vérifié : servi sans requête
+    assert load.loadata("BCP", cache=True).attrs["transport"] == "cache"
+    assert len(calls) == 1
@@ -0,0 +1,84 @@
+import json
+import datetime
+import threading
+from contextlib import nullcontext
+import pandas as pd
+import pytest
+from BVCscrap import cli
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    monkeypatch.setattr(cli, "BrowserPool", lambda size: nullcontext())
+
+    def loadata(name, *args, **kwargs):
+        if name == "CIH":
+            raise ValueError("upstream down")
+        return pd.DataFrame({"Value": [1.0]}, index=pd.DatetimeIndex(["2024-01-02"], name="Date"))
+    monkeypatch.setattr(cli, "loadata", loadata)
+
+
+def manifest(out):
+    with open(out / "history" / "manifest.json", encoding="utf-8") as f:
+        return json.load(f)["tickers"]
+
+
+def test_failures_are_reported(offline, tmp_path):
+    assert cli.main(["history", "BCP", "CIH", "-o", str(tmp_path), "--format", "csv"]) == 1
+    entries = manifest(tmp_path)
+    assert entries["BCP"]["status"] == "done"
+    assert entries["CIH"] == dict(entries["CIH"], status="failed", error="upstream down")
+
+
+def test_run_one_error_still_yields_a_result(offline, monkeypatch, tmp_path):
+    def run_one(kind, name, *args):
+        raise OSError("disk full")
+    monkeypatch.setattr(cli, "run_one", run_one)
+    assert cli.main(["history", "BCP", "-o", str(tmp_path), "--format", "csv"]) == 1
+
+
+def test_dead_workers_do_not_hang(offline, monkeypatch, tmp_path):
+    def worker(*args):
+        raise RuntimeError("worker crashed")
+    monkeypatch.setattr(cli, "worker", worker)
+    monkeypatch.setattr(threading, "excepthook", lambda args: None)
+    assert cli.main(["history", "BCP", "CIH", "-o", str(tmp_path), "--format", "csv", "-w", "2"]) == 1
+    assert {entry["error"] for entry in manifest(tmp_path).values()} == {"worker stopped"}
+
+
+def done_manifest(tmp_path, end, finished):
+    manifest = cli.Manifest(str(tmp_path / "manifest.json"), {"format": "csv", "start": None, "end": end})
+    manifest.entries = {"BCP": {"status": "done", "finished": finished}, "CIH": {"status": "failed"}}
+    return manifest
+
+
+# Jeudi 17/10/2024 au soir : la dernière séance close est celle du jour
+NOW = datetime.datetime(2024, 10, 17, 18, 0)
+
+
+@pytest.mark.parametrize("end, finished, todo", [
+    # Sans --end ou jusqu'à aujourd'hui : refetch si fini avant la dernière clôture
+    (None, "2024-10-17T12:00:00", ["BCP", "CIH"]),
+    (None, "2024-10-17T16:00:00", ["CIH"]),
+    ("2024-12-31", "2024-10-17T12:00:00", ["BCP", "CIH"]),
+    ("2024-10-17", "2024-10-17T12:00:00", ["BCP", "CIH"]),
+    # --end passée : complet dès que fini après la clôture de cette séance
+    ("2024-06-30", "2024-10-17T12:00:00", ["CIH"]),
+    ("2024-06-30", "2024-07-01T09:00:00", ["CIH"]),
+    # 30/06/2024 est un dimanche : la séance du vendredi 28 suffit
+    ("2024-06-30", "2024-06-29T10:00:00", ["CIH"]),
+    ("2024-06-30", "2024-06-28T12:00:00", ["BCP", "CIH"]),
+])
+def test_pending_applies_the_close_rule_up_to_end(tmp_path, end, finished, todo):
+    assert done_manifest(tmp_path, end, finished).pending(["BCP", "CIH"], now=NOW) == todo
+
+
+def test_force_refetches_everything(tmp_path):
+    assert done_manifest(tmp_path, "2024-06-30", "2024-10-17T12:00:00").pending(["BCP", "CIH"], True) == ["BCP", "CIH"]
+
+
+def test_bad_end_date_is_a_usage_error(offline, tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit:
+        cli.main(["history", "BCP", "-o", str(tmp_path), "--end", "31/12/2024"])
+    assert exit.value.code == 2
+    assert "not a YYYY-MM-DD date" in capsys.readouterr().err
@@ -0,0 +1,72 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from BVCscrap import flight
+from BVCscrap.flight import Flight, request_key
+
+
+def crowd(group, fn, n=4, copy=None):
+    """n callers of the same key while the leader is blocked in fn"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    with ThreadPoolExecutor(n) as pool:
+        leader = pool.submit(group.do, "key", leader_fn, copy)
+        started.wait(5)
+        waiters = [pool.submit(group.do, "key", lambda: pytest.fail("second fetch"), copy) for _ in range(n - 1)]
+        while group.info()["coalesced"] < n - 1:
+            threading.Event().wait(0.001)
+        release.set()
+    return leader, waiters
+
+
+def test_one_fetch_for_concurrent_callers():
+    group = Flight()
+    leader, waiters = crowd(group, lambda: "text")
+    assert leader.result() == "text"
+    assert [w.result() for w in waiters] == ["text"] * 3
+    assert group.info() == {"fetches": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_leader_error_reaches_every_waiter():
+    group = Flight()
+
+    def fail():
+        raise ValueError("upstream down")
+    leader, waiters = crowd(group, fail)
+    for future in [leader, *waiters]:
+        with pytest.raises(ValueError, match="upstream down"):
+            future.result()
+    # L'échec n'est pas mémorisé : l'appel suivant refait le fetch
+    assert group.do("key", lambda: "again") == "again"
+    assert group.info()["fetches"] == 2
+
+
+def test_waiters_get_their_own_copy():
+    group = Flight()
+    leader, waiters = crowd(group, lambda: ["a"], copy=list)
+    results = [leader.result(), *(w.result() for w in waiters)]
+    results[1].append("b")
+    assert results[0] == results[2] == ["a"]
+    assert len({id(result) for result in results}) == len(results)
+
+
+def test_request_key_normalizes_the_query():
+    assert (request_key("HTTPS://Medias24.com/content/api?format=json&method=x")
+            == request_key("https://medias24.com/content/api?method=x&format=json"))
+    assert request_key("https://a.ma/p", ["t"]) != request_key("https://a.ma/p")
+
+
+def test_disabled_coalescing_calls_through():
+    flight.disable_coalescing()
+    try:
+        before = flight.coalescing_stats()["fetches"]
+        assert flight.coalesced("key", lambda: 1) == 1
+        assert flight.coalescing_stats()["fetches"] == before
+    finally:
+        flight.enable_coalescing()
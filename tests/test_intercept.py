@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+import pytest
+from BVCscrap import intercept
+from BVCscrap.intercept import BrowserProfile, PageLoad, PROFILES, browser_profile
+
+POND = "https://www.casablanca-bourse.com/bourseweb/indice-ponderation.aspx?Cat=22&IdLink=298"
+HOME = "https://www.casablanca-bourse.com/fr/accueil"
+API = "https://medias24.com/content/api?method=getPriceHistory&ISIN=MA0000011884"
+ARTICLE = "https://medias24.com/2024/10/17/article.html"
+
+
+@pytest.fixture(autouse=True)
+def sizes(monkeypatch):
+    monkeypatch.setattr(intercept, "SIZES", intercept.OrderedDict())
+
+
+def request(url, resource_type="script", navigation=False):
+    frame = SimpleNamespace(parent_frame=None)
+    return SimpleNamespace(url=url, resource_type=resource_type, frame=frame,
+                           is_navigation_request=lambda: navigation)
+
+
+def response(url, size):
+    return SimpleNamespace(url=url, headers={"content-length": str(size)})
+
+
+@pytest.mark.parametrize("url, resource_type, page, blocked", [
+    # Scripts du postback : chargés sur les pages bourseweb
+    ("https://www.casablanca-bourse.com/bourseweb/WebResource.axd?d=x", "script", POND, False),
+    ("https://ajax.aspnetcdn.com/ajax/4.5/MicrosoftAjax.js", "script", POND, False),
+    # Même site, autre endpoint : l'allowlist ne s'applique pas
+    ("https://ajax.aspnetcdn.com/ajax/4.5/MicrosoftAjax.js", "script", HOME, True),
+    ("https://www.casablanca-bourse.com/WebResource.axd?d=x", "script", HOME, False),
+    # Types jamais lus, même du site de la page
+    ("https://www.casablanca-bourse.com/bourseweb/logo.png", "image", POND, True),
+    ("https://www.casablanca-bourse.com/bourseweb/style.css", "stylesheet", POND, True),
+    ("https://www.casablanca-bourse.com/bourseweb/menu.js", "script", POND, False),
+    # Tiers : bloqués, sauf le challenge de l'API medias24
+    ("https://www.googletagmanager.com/gtag/js", "script", POND, True),
+    ("https://challenges.cloudflare.com/turnstile/v0/api.js", "script", API, False),
+    ("https://medias24.com/cdn-cgi/challenge-platform/h/b/orchestrate", "script", API, False),
+    ("https://challenges.cloudflare.com/turnstile/v0/api.js", "script", ARTICLE, True),
+])
+def test_light_profile_decisions(url, resource_type, page, blocked):
+    assert PROFILES["light"].blocks(url, resource_type, page) is blocked
+
+
+def test_full_profile_blocks_nothing():
+    full = PROFILES["full"]
+    assert not full.intercepts
+    assert not full.blocks("https://www.googletagmanager.com/gtag/js", "image", POND)
+
+
+def test_longest_prefix_wins():
+    profile = BrowserProfile(allow={"example.com/": (r"/a\.js",), "example.com/app/": (r"/b\.js",)})
+    assert not profile.blocks("https://cdn.net/a.js", "script", "https://example.com/page")
+    assert profile.blocks("https://cdn.net/b.js", "script", "https://example.com/page")
+    assert not profile.blocks("https://cdn.net/b.js", "script", "https://example.com/app/page")
+    assert profile.blocks("https://cdn.net/a.js", "script", "https://example.com/app/page")
+
+
+def test_custom_profile_types_only():
+    profile = BrowserProfile(block_types=("image",), third_party=False, allow={})
+    assert profile.blocks("https://example.com/a.png", "image", POND)
+    assert not profile.blocks("https://tracker.net/t.js", "script", POND)
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError, match="Unknown browser profile"):
+        intercept.set_browser_profile("nope")
+
+
+def test_main_document_is_never_blocked():
+    with browser_profile(BrowserProfile(block_types=("document",))):
+        state = PageLoad()
+        state.reset(POND)
+    assert state.decide(request(POND, "document", navigation=True)) is False
+    assert state.decide(request("https://www.casablanca-bourse.com/bourseweb/frame.aspx", "document")) is True
+
+
+def test_report_counts_loaded_and_saved_bytes():
+    state = PageLoad()
+    state.reset(POND)
+    logo = "https://www.casablanca-bourse.com/bourseweb/logo.png"
+    # Une première page en "full" a vu la taille du logo
+    state.response(response(logo, 5000))
+    state.response(response(POND, 60000))
+    assert state.decide(request(logo, "image")) is True
+    assert state.decide(request("https://www.googletagmanager.com/gtag/js")) is True
+    report = state.report(12.5)
+    assert report == {"profile": "light", "requests": 2, "blocked": 2, "bytes": 65000,
+                      "saved_bytes": 5000, "load_ms": 12.5}
+    assert state.report(1.0)["saved_bytes"] == 0
+
+
+def test_sizes_are_bounded(monkeypatch):
+    monkeypatch.setattr(intercept, "MAX_SIZES", 2)
+    for i in range(3):
+        intercept.remember_size(f"https://example.com/{i}", i + 1)
+    assert list(intercept.SIZES) == ["https://example.com/1", "https://example.com/2"]
@@ -0,0 +1,102 @@
+import os
+import json
+import datetime
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+import pytest
+from BVCscrap import load
+from BVCscrap.load import windows, history_link, history_range
+
+
+def d(text):
+    return datetime.date.fromisoformat(text)
+
+
+def test_year_windows_cut_at_each_year():
+    assert windows("2022-06-15", "2024-02-01", "year") == [
+        (d("2022-06-15"), d("2022-12-31")), (d("2023-01-01"), d("2023-12-31")), (d("2024-01-01"), d("2024-02-01"))]
+
+
+def test_quarter_windows_starting_on_a_boundary():
+    assert windows("2024-01-01", "2024-07-01", "quarter") == [
+        (d("2024-01-01"), d("2024-03-31")), (d("2024-04-01"), d("2024-06-30")), (d("2024-07-01"), d("2024-07-01"))]
+
+
+def test_single_day_window():
+    assert windows("2024-03-05", "2024-03-05") == [(d("2024-03-05"), d("2024-03-05"))]
+
+
+def test_inverted_range_raises():
+    with pytest.raises(ValueError, match="after end"):
+        windows("2024-02-01", "2023-01-01")
+
+
+def test_unknown_chunk_raises():
+    with pytest.raises(ValueError, match="chunk"):
+        windows("2023-01-01", "2024-01-01", "month")
+
+
+def test_missing_bounds_follow_one_rule():
+    today = str(datetime.date.today())
+    assert history_range("2020-01-01") == ("2020-01-01", today)
+    assert history_range(end="2020-01-01") == (load.FIRST_SESSION, "2020-01-01")
+    assert history_link("BCP", "2020-01-01").endswith(f"from=2020-01-01&to={today}")
+
+
+def server(spill=0):
+    """fetch_json_text answering every business day of the requested range (plus ``spill`` days around it)"""
+    calls = []
+
+    def fetch_json_text(link, transport="auto"):
+        query = parse_qs(urlsplit(link).query)
+        first, last = pd.Timestamp(query["from"][0]), pd.Timestamp(query["to"][0])
+        calls.append((first.date(), last.date()))
+        days = pd.bdate_range(first - pd.Timedelta(days=spill), last + pd.Timedelta(days=spill))
+        rows = [{"date": day.strftime("%Y-%m-%d"), "value": day.toordinal(), "min": 0, "max": 0, "variation": 0,
+                 "volume": 1} for day in days]
+        return json.dumps({"result": rows}), "http"
+    return fetch_json_text, calls
+
+
+def test_overlapping_windows_are_merged_once(monkeypatch):
+    fetch, calls = server(spill=3)
+    monkeypatch.setattr(load, "fetch_json_text", fetch)
+    data = load.loadata("BCP", "2022-01-01", "2024-12-31", cache=False, chunk="quarter", workers=3)
+    assert len(calls) == 12
+    assert data.index.is_unique and data.index.is_monotonic_increasing
+    assert (data["Value"] == [day.toordinal() for day in data.index]).all()
+    # Les jours débordant des fenêtres hors de [start, end] sont retirés
+    assert data.index[0] == pd.Timestamp("2022-01-03")
+    assert data.index[-1] == pd.Timestamp("2024-12-31")
+    assert len(data) == len(pd.bdate_range("2022-01-01", "2024-12-31"))
+
+
+def test_start_only_gives_the_same_range_with_and_without_chunk(monkeypatch):
+    fetch, _ = server()
+    monkeypatch.setattr(load, "fetch_json_text", fetch)
+    start = str(datetime.date.today() - datetime.timedelta(days=500))
+    whole = load.loadata("BCP", start, cache=False)
+    chunked = load.loadata("BCP", start, cache=False, chunk="year")
+    pd.testing.assert_frame_equal(whole, chunked, check_freq=False)
+    assert whole.index[0] >= pd.Timestamp(start)
+
+
+@pytest.mark.parametrize("name", ["masi", "Masi", "msi20"])
+def test_indices_resolve_case_insensitively(name):
+    assert load.check_name(name) == ""
+    assert load.canonical_name(name) == name.upper()
+    assert history_link(name) == history_link(name.upper())
+    assert load.intraday_link(name) == load.intraday_link(name.upper())
+
+
+def test_unknown_name_still_raises():
+    from BVCscrap.errors import UnknownTickerError
+    with pytest.raises(UnknownTickerError):
+        load.check_name("NotAStock")
+
+
+def test_loadata_lowercase_index_in_replay():
+    from BVCscrap.transport import fixture_mode
+    replay = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures", "replay")
+    with fixture_mode("replay", replay):
+        pd.testing.assert_frame_equal(load.loadata("masi"), load.loadata("MASI"))
@@ -0,0 +1,85 @@
+import json
+import pytest
+from BVCscrap import Notation
+from BVCscrap.Notation import REGISTRY, get_code, get_valeur, notation, notation_code, notation_value
+
+
+@pytest.mark.parametrize("alias, name", [
+    ("CMPG", "CMGP"),
+    ("Disty Technologis", "Disty Technolog"),
+    ("Sanlam Assurance", "Sanlam Maroc"),
+])
+def test_legacy_spellings_are_aliases(alias, name):
+    assert REGISTRY.get(alias).name == name
+    assert get_code(alias) == get_code(name)
+    assert get_valeur(alias) == get_valeur(name)
+    # Un alias n'est pas un instrument de plus
+    assert alias not in notation()
+
+
+@pytest.mark.parametrize("label, name", [
+    ("BANK OF AFRICA", "BOA"),
+    ("CREDIT DU MAROC", "CDM"),
+    ("ITISSALAT AL-MAGHRIB", "Maroc Telecom"),
+    ("SOCIETE DES BOISSONS DU MAROC", "Ste Boissons"),
+    ("TOTALENERGIES MARKETING MAROC", "Total Maroc"),
+    ("HOLCIM MAROC", "LafargeHolcim"),
+    ("DOUJA PROM ADDOHA", "Addoha"),
+    ("ATTIJARIWAFA BANK", "Attijariwafa"),
+    ("TGCC S.A", "TGCC"),
+])
+def test_market_page_labels_match(label, name):
+    assert REGISTRY.match(label).name == name
+
+
+def test_fixture_labels_all_match():
+    from benchmarks.fixtures.make_fixtures import LABELS
+    names = [name for name in notation() if name not in ("MASI", "MSI20")]
+    assert [getattr(REGISTRY.match(label), "name", None) for label in LABELS] == names
+
+
+def test_aliases_are_not_shared():
+    keys = [key.casefold() for inst in REGISTRY for key in (inst.name, *inst.aliases)]
+    assert len(keys) == len(set(keys))
+
+
+def test_salafin_is_stripped():
+    assert "Salafin" in notation()
+    assert " Salafin" not in notation()
+    assert get_code(" Salafin") == get_code("Salafin") == "MA0000011744"
+
+
+def test_lookup_by_isin_code_and_case():
+    inst = REGISTRY.get("Attijariwafa")
+    assert REGISTRY.get("MA0000012445") is inst
+    assert REGISTRY.get("8200") is inst
+    assert REGISTRY.get("  attijariwafa ") is inst
+
+
+def test_unknown_names():
+    assert get_code("Nope") is None
+    assert get_valeur(None) is None
+    with pytest.raises(KeyError, match="did you mean"):
+        REGISTRY.resolve("Attijariwaffa")
+
+
+def test_derived_tables():
+    codes = {row["name"]: row["ISIN"] for row in notation_code()}
+    assert codes["BCP"] == "MA0000011884"
+    assert codes["MASI"] == ""
+    # Les valeurs radiées gardent leur code mais ne sont plus cotées
+    assert "Med Paper" not in codes
+    assert notation_value()["Med Paper"] == "6500"
+
+
+def test_load_instruments_merges_by_name(tmp_path, monkeypatch):
+    monkeypatch.setattr(Notation, "REGISTRY", REGISTRY)
+    path = tmp_path / "instruments.json"
+    path.write_text(json.dumps([
+        {"name": "BCP", "ISIN": "MA0000011884", "code": "8000", "aliases": "Banque Populaire"},
+        {"name": "New Listing", "ISIN": "MA0000099999", "code": "99"},
+    ]))
+    Notation.load_instruments(str(path))
+    assert get_code("Banque Populaire") == "MA0000011884"
+    assert get_valeur("New Listing") == "99"
+    assert get_code("Attijariwafa") == "MA0000012445"
@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from BVCscrap.panel import build_panel, to_long, loadpanel, fill_column
+from BVCscrap.transport import fixture_mode
+
+REPLAY = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures", "replay")
+
+
+@pytest.fixture
+def frames():
+    index = pd.bdate_range("2024-01-01", periods=5, name="Date")
+    return {
+        "BCP": pd.DataFrame({"Value": np.arange(1.0, 6.0), "Volume": np.arange(10.0, 15.0)}, index=index),
+        "MASI": pd.DataFrame({"Value": [100.0, 101.0, 102.0]}, index=index[[0, 2, 4]]),
+    }
+
+
+def test_wide_layout(frames):
+    panel = build_panel(frames)
+    assert list(panel.columns) == [("BCP", "Value"), ("BCP", "Volume"), ("MASI", "Value"), ("MASI", "Volume")]
+    assert panel.index.equals(frames["BCP"].index)
+    assert panel[("MASI", "Value")].isna().tolist() == [False, True, False, True, False]
+    assert panel[("MASI", "Volume")].isna().all()
+    pd.testing.assert_series_equal(panel["BCP"]["Value"], frames["BCP"]["Value"], check_names=False,
+                                  check_freq=False)
+
+
+def test_to_numpy_is_fortran_ordered_without_copy(frames):
+    panel = build_panel(frames, dtype="float32")
+    values = panel.to_numpy()
+    assert values.dtype == np.float32
+    assert values.flags.f_contiguous
+    assert np.shares_memory(values, panel.to_numpy())
+
+
+def test_inner_alignment_and_fill(frames):
+    assert len(build_panel(frames, align="inner")) == 3
+    filled = build_panel(frames, fields="Value", fill="ffill")
+    assert filled[("MASI", "Value")].tolist() == [100.0, 100.0, 101.0, 101.0, 102.0]
+    column = np.array([1.0, np.nan, np.nan, np.nan, 5.0])
+    fill_column(column, "bfill", limit=2)
+    assert np.isnan(column[1]) and column[2:].tolist() == [5.0, 5.0, 5.0]
+
+
+def test_long_layout(frames):
+    data = to_long(build_panel(frames))
+    assert data.index.names == ["Date", "ticker"]
+    assert list(data.columns) == ["Value", "Volume"]
+    # Une ligne par (date, ticker) ayant au moins une valeur
+    assert len(data) == 5 + 3
+    assert data.loc[(pd.Timestamp("2024-01-03"), "MASI"), "Value"] == 101.0
+    assert data.loc[(pd.Timestamp("2024-01-03"), "BCP"), "Volume"] == 12.0
+
+
+def test_bad_arguments(frames):
+    with pytest.raises(ValueError, match="fill"):
+        build_panel(frames, fill="linear")
+    with pytest.raises(ValueError, match="float"):
+        build_panel(frames, dtype="int64")
+    with pytest.raises(ValueError, match="layout"):
+        loadpanel(["BCP"], layout="tall")
+
+
+def test_missing_tickers_are_left_out():
+    from benchmarks.run import TICKERS, START, END
+    with fixture_mode("replay", REPLAY):
+        panel = loadpanel([TICKERS[0], "NotAStock", TICKERS[1]], start=START, end=END)
+        long = loadpanel([TICKERS[0], "NotAStock"], start=START, end=END, layout="long")
+        with pytest.raises(ValueError, match="all of"):
+            loadpanel(["NotAStock"], start=START, end=END)
+    assert list(panel.columns.get_level_values("ticker").unique()) == [TICKERS[0], TICKERS[1]]
+    assert list(panel.attrs["errors"]) == ["NotAStock"]
+    assert set(long.index.get_level_values("ticker")) == {TICKERS[0]}
+    assert "NotAStock" in long.attrs["errors"]
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from BVCscrap import parse, tech
+from BVCscrap.transport import fixture_mode
+
+FIXTURES = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures")
+REPLAY = os.path.join(FIXTURES, "replay")
+
+# Les pages générées par benchmarks/fixtures/make_fixtures.py
+YEARS = ["2019", "2020", "2021", "2022", "2023"]
+POND = ["Nombre de titres", "Cours", "Facteur flottant", "Facteur plafonnement", "Capitalisation flottante", "Poids %"]
+
+
+def page(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1 234,56", 1234.56), ("12,5 %", 12.5), ("-0,30%", -0.3), ("1\xa0000", 1000.0),
+])
+def test_number(text, expected):
+    assert parse.number(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "-", "n.d.", "17/10/2024"])
+def test_number_is_nan_otherwise(text):
+    assert np.isnan(parse.number(text))
+
+
+def test_typed_column():
+    assert parse.typed_column(["1,5", "", "2"]).dtype == np.float64
+    dates = parse.typed_column(["17/10/2024", "-"])
+    assert dates.dtype.kind == "M" and dates.isna().tolist() == [False, True]
+    assert parse.typed_column(["MASI", "1,5"]).dtype == "string"
+
+
+def check_cours(data):
+    assert data.shape == (1, 8)
+    assert list(data.columns) == ["Cours", "Variation", "Ouverture", "Plus haut", "Plus bas",
+                                  "Volume", "Capitalisation", "Date"]
+    assert data.loc[0, "Cours"] == 512.3
+    assert data.loc[0, "Variation"] == -0.35
+    assert data.loc[0, "Volume"] == 1234567
+    assert data.loc[0, "Date"] == pd.Timestamp("2024-10-17")
+
+
+def check_indicators(data):
+    assert data.shape == (8, 5)
+    assert data.index.name == "Indicateur"
+    assert list(data.columns) == YEARS
+    assert data.index[0] == "Chiffre d'affaires" and "Résultat net" in data.index
+    assert (data.dtypes == np.float64).all()
+
+
+def check_dividends(data):
+    assert data.shape == (19, 4)
+    assert list(data.columns) == ["Année", "Montant du dividende", "Date de détachement", "Date de paiement"]
+    assert data["Année"].tolist() == list(range(2005, 2024))
+    assert data["Date de détachement"].dtype.kind == "M"
+    assert data["Date de paiement"].dtype.kind == "M"
+
+
+def check_pond(data):
+    assert data.shape == (74, 6)
+    assert data.index.name == "Instrument"
+    assert list(data.columns) == POND
+    assert data.index[0] == "DOUJA PROM ADDOHA"
+    assert (data.dtypes == np.float64).all()
+
+
+def check_recap(tables):
+    indices, instruments = tables
+    assert list(indices.columns) == ["Indice", "Valeur", "Variation %"]
+    assert indices["Indice"].tolist() == ["MASI", "MSI20"]
+    assert indices["Valeur"].tolist() == [13250.6, 1080.2]
+    assert instruments.shape == (74, 4)
+    assert list(instruments.columns) == ["Instrument", "Cours", "Variation %", "Volume"]
+
+
+@pytest.mark.parametrize("extractor, name, check", [
+    (parse.getTables, "societe_cours.html", check_cours),
+    (parse.getTablesFich, "societe_fiche.html", check_indicators),
+    (parse.getDivi, "societe_dividende.html", check_dividends),
+    (parse.getPondval, "indice_ponderation.html", check_pond),
+    (parse.getIndiceRecapScrap, "index_recap.html", check_recap),
+])
+def test_extractors_on_saved_pages(extractor, name, check):
+    check(extractor(page(name)))
+
+
+def test_all_index_on_saved_page():
+    data = parse.getAllIndex(page("activite_marche.html"))
+    assert data.shape == (40, 4)
+    assert data.index.name == "Indice"
+    assert list(data.columns) == ["Valeur", "Veille", "Variation %", "Variation 31/12 %"]
+
+
+def test_company_snapshot_in_replay():
+    # Mêmes pages, servies par les réponses enregistrées (un postback par section)
+    with fixture_mode("replay", REPLAY):
+        snapshot = tech.getCompanySnapshot("BCP")
+        cours = tech.getCours("BCP")
+    assert snapshot.error is None
+    check_cours(snapshot.cours)
+    check_indicators(snapshot.indicators)
+    check_dividends(snapshot.dividends)
+    check_cours(cours)
+
+
+def test_market_pages_in_replay():
+    with fixture_mode("replay", REPLAY):
+        pond = tech.getPond()
+        recap = tech.getIndexRecap()
+        index = tech.getIndex()
+    check_pond(pond)
+    check_recap(recap)
+    assert index.shape == (40, 4)
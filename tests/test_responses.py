@@ -0,0 +1,95 @@
+import os
+import time
+import threading
+from BVCscrap.responses import ResponseCache, Entry
+
+INTRADAY = ("https://medias24.com/content/api?method=getStockIntraday&ISIN=MA0000011884&format=json", ())
+PAGE = ("https://www.casablanca-bourse.com/bourseweb/index.aspx", ("target",))
+
+
+def entry(body, age=0.0, etag=None):
+    return Entry(body, time.time() - age, etag)
+
+
+def test_intraday_ttl_and_stale_window():
+    cache = ResponseCache()
+    now = time.time()
+    assert cache.state(INTRADAY, Entry("x", now - 5), now) == "fresh"
+    assert cache.state(INTRADAY, Entry("x", now - 25), now) == "stale"
+    assert cache.state(INTRADAY, Entry("x", now - 60), now) == "expired"
+
+
+def test_expired_entry_is_refetched_before_returning():
+    cache = ResponseCache()
+    cache.put(INTRADAY, entry("old", age=60))
+    body, _, hit = cache.fetch(INTRADAY, lambda etag: ("new", None, None))
+    assert (body, hit) == ("new", False)
+    assert cache.get(INTRADAY).body == "new"
+
+
+def test_stale_hit_returns_at_once_and_refreshes_once():
+    cache = ResponseCache()
+    cache.put(INTRADAY, entry("old", age=20))
+    release, calls = threading.Event(), []
+
+    def load(etag):
+        calls.append(etag)
+        release.wait(5)
+        return "new", None, None
+    started = time.perf_counter()
+    assert cache.fetch(INTRADAY, load)[0] == "old"
+    assert cache.fetch(INTRADAY, load)[0] == "old"
+    assert time.perf_counter() - started < 1
+    release.set()
+    for _ in range(500):
+        if cache.get(INTRADAY).body == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get(INTRADAY).body == "new"
+    assert len(calls) == 1
+    assert cache.info()["stale"] == 2
+
+
+def test_not_modified_keeps_the_body():
+    cache = ResponseCache()
+    cache.put(INTRADAY, entry("body", age=60, etag='"v1"'))
+    seen = []
+
+    def load(etag):
+        seen.append(etag)
+        return None, etag, None
+    body, _, _ = cache.fetch(INTRADAY, load)
+    assert body == "body" and seen == ['"v1"']
+    assert cache.state(INTRADAY, cache.get(INTRADAY)) == "fresh"
+    assert cache.info()["revalidated"] == 1
+
+
+def test_lru_eviction_is_bounded_in_bytes():
+    cache = ResponseCache(max_bytes=10)
+    keys = [(f"https://x.ma/{i}", ()) for i in range(3)]
+    cache.put(keys[0], entry("aaaa"))
+    cache.put(keys[1], entry("bbbb"))
+    cache.get(keys[0])
+    cache.put(keys[2], entry("cccc"))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).body == "aaaa"
+    assert cache.info()["evictions"] == 1
+    cache.put(("https://x.ma/big", ()), entry("z" * 11))
+    assert cache.get(("https://x.ma/big", ())) is None
+
+
+def test_disk_entries_are_shared(tmp_path):
+    ResponseCache(path=str(tmp_path)).put(PAGE, entry(("<html>1</html>", "<html>2</html>"), etag="e"))
+    other = ResponseCache(path=str(tmp_path))
+    saved = other.get(PAGE)
+    assert saved.body == ("<html>1</html>", "<html>2</html>") and saved.etag == "e"
+    assert other.info()["disk_hits"] == 1
+
+
+def test_clear_only_removes_its_own_files(tmp_path):
+    (tmp_path / "index.json").write_text("{}")
+    cache = ResponseCache(path=str(tmp_path))
+    cache.put(PAGE, entry(("<html/>",)))
+    cache.clear()
+    assert os.listdir(tmp_path) == ["index.json"]
+    assert cache.get(PAGE) is None
@@ -0,0 +1,98 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from BVCscrap import store as store_module
+from BVCscrap.store import Store, locked, instrument_key
+
+
+def history(start, periods, first=1.0):
+    index = pd.bdate_range(start, periods=periods, name="Date")
+    values = np.arange(first, first + periods)
+    return pd.DataFrame({"Value": values, "Volume": values * 10}, index=index)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Store(str(tmp_path))
+
+
+def files(store, name):
+    return sorted(f for f in os.listdir(os.path.join(store.path, instrument_key(name))) if f != "meta.json")
+
+
+def test_round_trip_and_range(store):
+    data = history("2024-01-01", 20)
+    store.write("BCP", data)
+    # Le store garde les dates en nanosecondes
+    pd.testing.assert_frame_equal(store.read("BCP"), data.set_axis(data.index.as_unit("ns")), check_freq=False)
+    part = store.read("BCP", "2024-01-03", "2024-01-05")
+    assert list(part.index.strftime("%Y-%m-%d")) == ["2024-01-03", "2024-01-04", "2024-01-05"]
+    assert store.read("Attijariwafa") is None
+
+
+def test_columns_are_views_on_the_mapping(store):
+    store.write("BCP", history("2024-01-01", 20))
+    data = store.read("BCP", "2024-01-10")
+    maps = store._columns("BCP", store.meta("BCP"))
+    assert np.shares_memory(data["Value"].to_numpy(), maps["Value"])
+    assert not data["Value"].to_numpy().flags.writeable
+
+
+def test_append_bumps_the_version_and_merges(store):
+    first = store.write("BCP", history("2024-01-01", 10))
+    # Chevauchement : la nouvelle valeur gagne
+    second = store.write("BCP", history("2024-01-10", 5, first=100.0))
+    assert second["version"] > first["version"]
+    data = store.read("BCP")
+    assert data.index.is_unique and data.index.is_monotonic_increasing
+    assert len(data) == second["rows"] == 12
+    assert data.loc["2024-01-10", "Value"] == 100.0
+
+
+def test_prune_keeps_the_published_version(store):
+    store.write("BCP", history("2024-01-01", 10))
+    meta = store.write("BCP", history("2024-01-15", 5))
+    assert files(store, "BCP") == sorted(f"{c}.{meta['version']}.{'i8' if c == 'Date' else 'f8'}"
+                                         for c in ("Date", "Value", "Volume"))
+
+
+def test_prune_never_removes_a_newer_version(store):
+    meta = store.write("BCP", history("2024-01-01", 10))
+    folder = os.path.join(store.path, instrument_key("BCP"))
+    newer = os.path.join(folder, f"Date.{meta['version'] + 5}.i8")
+    open(newer, "wb").close()
+    Store._prune(folder, meta["version"])
+    assert os.path.exists(newer)
+    assert os.path.exists(os.path.join(folder, f"Date.{meta['version']}.i8"))
+
+
+def test_concurrent_writers_keep_every_row(tmp_path):
+    # Deux Store sur le même dossier : comme deux processus
+    writers = [Store(str(tmp_path)) for _ in range(4)]
+    chunks = [history(pd.Timestamp("2020-01-01") + pd.offsets.BDay(10 * i), 10, first=10 * i) for i in range(8)]
+    threads = [threading.Thread(target=lambda i=i: writers[i % 4].write("BCP", chunks[i])) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    data = Store(str(tmp_path)).read("BCP")
+    assert len(data) == 80
+    assert data["Value"].tolist() == list(range(80))
+
+
+def test_stale_lock_is_taken_over(tmp_path, monkeypatch):
+    lock = tmp_path / store_module.LOCK
+    lock.write_text("12345")
+    os.utime(lock, (0, 0))
+    with locked(str(tmp_path), timeout=1):
+        assert lock.exists()
+    assert not lock.exists()
+
+
+def test_lock_times_out(tmp_path):
+    with locked(str(tmp_path)):
+        with pytest.raises(TimeoutError):
+            with locked(str(tmp_path), timeout=0.05):
+                pass
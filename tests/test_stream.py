@@ -0,0 +1,87 @@
+import pandas as pd
+from BVCscrap.stream import IntradayStream
+
+
+def ticks(*pairs):
+    return pd.DataFrame({"Value": [value for _, value in pairs]}, index=[label for label, _ in pairs])
+
+
+def test_first_poll_yields_everything():
+    stream = IntradayStream("MASI")
+    new = stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.0)))
+    assert list(new.index) == ["09:30", "09:31"]
+
+
+def test_seen_ticks_are_not_yielded_again():
+    stream = IntradayStream("MASI")
+    stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.0)))
+    new = stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.0), ("09:32", 3.0)))
+    assert list(new.index) == ["09:32"]
+    assert not len(stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.0), ("09:32", 3.0))))
+
+
+def test_changed_last_bar_is_yielded_and_replaced_in_buffer():
+    stream = IntradayStream("MASI")
+    stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.0)))
+    new = stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.5)))
+    assert new["Value"].tolist() == [2.5]
+    buffer = stream.buffer("MASI")
+    assert list(buffer.index) == ["09:30", "09:31"]
+    assert buffer["Value"].tolist() == [1.0, 2.5]
+
+
+def test_duplicated_labels_keep_the_last_value():
+    stream = IntradayStream("MASI")
+    new = stream.update("MASI", ticks(("09:30", 1.0), ("09:30", 1.5)))
+    assert new["Value"].tolist() == [1.5]
+
+
+def test_session_restart_yields_the_new_session():
+    stream = IntradayStream("MASI")
+    stream.update("MASI", ticks(("09:30", 1.0), ("15:30", 2.0)))
+    # Nouvelle séance : les labels repartent avant le dernier vu
+    new = stream.update("MASI", ticks(("09:30", 4.0), ("09:31", 5.0)))
+    assert list(new.index) == ["09:30", "09:31"]
+    assert not len(stream.update("MASI", ticks(("09:30", 4.0), ("09:31", 5.0))))
+
+
+def test_buffer_is_bounded_and_streams_are_separate():
+    stream = IntradayStream(["MASI", "BCP"], maxlen=2)
+    stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.0), ("09:32", 3.0)))
+    assert list(stream.buffer("MASI").index) == ["09:31", "09:32"]
+    assert list(stream.update("BCP", ticks(("09:30", 7.0))).index) == ["09:30"]
+
+
+def test_nan_bar_is_not_yielded_again():
+    stream = IntradayStream("MASI")
+    stream.update("MASI", ticks(("09:30", 1.0), ("09:31", float("nan"))))
+    assert not len(stream.update("MASI", ticks(("09:30", 1.0), ("09:31", float("nan")))))
+    assert stream.update("MASI", ticks(("09:30", 1.0), ("09:31", 2.0)))["Value"].tolist() == [2.0]
+
+
+def test_failed_fetch_does_not_stop_the_others(monkeypatch):
+    stream = IntradayStream(["MASI", "BCP"], interval=0, max_polls=2)
+    polls = []
+
+    def fetch(name):
+        polls.append(name)
+        if name == "MASI" and polls.count("MASI") == 1:
+            raise ValueError("upstream down")
+        return ticks(("09:30", 1.0), (f"09:3{len(polls)}", 2.0))
+    monkeypatch.setattr(stream, "fetch", fetch)
+    monkeypatch.setattr("BVCscrap.stream.replaying", lambda: True)
+    names = [name for name, _ in stream]
+    assert names == ["BCP", "MASI", "BCP"]
+    assert stream.errors == {}
+
+
+def test_failed_fetch_is_kept_in_errors(monkeypatch):
+    stream = IntradayStream(["MASI", "BCP"])
+
+    def fetch(name):
+        if name == "MASI":
+            raise ValueError("upstream down")
+        return ticks(("09:30", 1.0))
+    monkeypatch.setattr(stream, "fetch", fetch)
+    assert list(stream.poll()) == ["BCP"]
+    assert str(stream.errors["MASI"]) == "upstream down"
@@ -0,0 +1,90 @@
+import pytest
+from BVCscrap import transport
+from BVCscrap.errors import UpstreamError
+from BVCscrap.limits import configure_host, policy
+
+CHALLENGE = "<html><head><title>Just a moment...</title></head><body>cf-chl</body></html>"
+
+
+class Response:
+    def __init__(self, status, text, content_type="text/html"):
+        self.status_code = status
+        self.text = text
+        self.content = text.encode()
+        self.headers = {"Content-Type": content_type}
+
+
+class Session:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, link, timeout=None, headers=None):
+        self.calls += 1
+        return self.responses[min(self.calls, len(self.responses)) - 1]
+
+
+@pytest.fixture
+def upstream(monkeypatch, request):
+    host = f"{request.node.name.replace('_', '-')}.test"
+    configure_host(host, retries=2, backoff=0.0)
+    monkeypatch.setitem(transport._fixtures, "mode", "live")
+    browser = []
+    monkeypatch.setattr(transport, "browser_json_text", lambda link: browser.append(link) or '{"result": []}')
+
+    def serve(*responses):
+        session = Session(*responses)
+        monkeypatch.setattr(transport, "http_session", lambda: session)
+        return f"https://{host}/content/api?method=x", session, browser
+    return serve
+
+
+@pytest.mark.parametrize("status, text, expected", [
+    (200, '{"result": []}', False),
+    (200, CHALLENGE, True),
+    (403, "<html>Forbidden</html>", True),
+    (503, CHALLENGE, True),
+    (429, "<html>Too Many Requests</html>", False),
+    (502, "<html>Bad Gateway</html>", False),
+])
+def test_is_challenge(status, text, expected):
+    assert transport.is_challenge(status, "text/html", text) is expected
+
+
+def test_429_is_retried_and_throttled_without_browser(upstream):
+    link, session, browser = upstream(Response(429, "Too Many Requests", "text/plain"))
+    bucket = policy(transport.host_of(link)).bucket
+    with pytest.raises(UpstreamError) as error:
+        transport.load_json_text(link)
+    assert error.value.status == 429
+    assert session.calls == 3
+    assert bucket.rate < bucket.max_rate
+    assert not browser
+
+
+def test_503_then_success_stays_on_http(upstream):
+    link, session, browser = upstream(Response(503, "<html>Service Unavailable</html>"),
+                                      Response(200, '{"result": [1]}', "application/json"))
+    text, _, used = transport.load_json_text(link)
+    assert (text, used, session.calls) == ('{"result": [1]}', "http", 2)
+    assert not browser
+
+
+def test_challenge_page_throttles_then_falls_back(upstream):
+    link, session, browser = upstream(Response(403, CHALLENGE))
+    bucket = policy(transport.host_of(link)).bucket
+    _, _, used = transport.load_json_text(link)
+    assert used == "browser"
+    assert browser == [link]
+    assert bucket.rate < bucket.max_rate
+
+
+def test_page_json_text_reads_the_pre_chromium_renders():
+    content = ('<html><head></head><body><pre style="word-wrap: break-word;">{"result": "a &amp; b &lt;c&gt;"}</pre>'
+               '<div class="json-formatter-container"></div></body></html>')
+    assert transport.page_json_text("https://medias24.com/content/api?method=x", content) == '{"result": "a & b <c>"}'
+
+
+def test_page_json_text_raises_on_a_challenge_page():
+    with pytest.raises(transport.ChallengeError):
+        transport.page_json_text("https://medias24.com/content/api?method=x", CHALLENGE)